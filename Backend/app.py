@@ -1,5 +1,11 @@
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
+import os
+import database
+import sesiones
+from archivo_historial import iniciar_archivador
+from busqueda import iniciar_indice
+from referencias import iniciar_referencias
 from routes.auth import auth_bp
 from routes.panel import panel_bp
 from routes.usuarios import usuarios_bp
@@ -11,6 +17,8 @@ from routes.entidades import entidades_bp
 
 app = Flask(__name__)
 CORS(app)
+database.init_app(app)
+sesiones.init_app(app)
 app.register_blueprint(auth_bp, url_prefix="/auth")
 app.register_blueprint(panel_bp, url_prefix="/panel") 
 app.register_blueprint(usuarios_bp, url_prefix="/usuarios")
@@ -18,13 +26,25 @@ app.register_blueprint(categorias_bp, url_prefix="/categorias")
 app.register_blueprint(grupos_bp, url_prefix="/grupos")
 app.register_blueprint(entidades_bp, url_prefix="/entidades")
 
+# Tareas en segundo plano: archivador de historial, índice de búsqueda (si
+# están habilitados), precarga de las referencias por nombre y recarga de la
+# lista de revocación de sesiones. Con el recargador de debug el script corre
+# dos veces; solo se arrancan en el proceso que atiende solicitudes.
+if __name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+    iniciar_archivador()
+    iniciar_indice()
+    iniciar_referencias()
+    sesiones.iniciar_revocacion()
+
 # Servir archivos subidos
 @app.route('/uploads/<path:filename>')
 def uploaded_file(filename):
     return send_from_directory('uploads', filename, as_attachment=False)
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    # threaded: las conexiones SSE de /usuarios/tickets/eventos ocupan un
+    # hilo cada una mientras están abiertas
+    app.run(debug=True, threaded=True)
 
 
 
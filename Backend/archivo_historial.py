@@ -0,0 +1,112 @@
+"""Mueve el historial frío de tickets cerrados a historial_tickets_archivo.
+
+Uso:
+    python archivo_historial.py             # usa ARCHIVO_HISTORIAL_CONFIG
+    python archivo_historial.py --dias 90   # otra antigüedad mínima
+
+Se archivan los cambios de campos (filas de los triggers y de
+actualizar_ticket) de los tickets cerrados hace más de `dias` días. Los
+seguimientos, soluciones y encuestas se quedan en historial_tickets porque
+el detalle del ticket y sus adjuntos los siguen leyendo. Con
+"automatico": True la app ejecuta el mismo proceso en un hilo de fondo.
+"""
+import argparse
+import sys
+import threading
+import time
+
+from config.config import ARCHIVO_HISTORIAL_CONFIG
+from database import get_db_connection
+
+COLUMNAS = ('id_historial, id_ticket2, campo_modificado, valor_anterior, valor_nuevo, '
+            'fecha_modificacion, modificado_por, nombre_modificador, rol_modificador, '
+            'comentario_reapertura, descripcion, calificacion')
+
+
+def mover_lote(conn, cursor, dias, lote):
+    """Mueve hasta `lote` filas en una transacción. Devuelve cuántas movió."""
+    cursor.execute(
+        """
+        SELECT h.id_historial
+        FROM historial_tickets h
+        JOIN tickets t ON t.id_ticket = h.id_ticket2
+        WHERE t.estado_ticket = 'cerrado'
+          AND COALESCE(t.fecha_cierre, t.fecha_actualizacion) < NOW() - INTERVAL %s DAY
+          AND h.campo_modificado NOT IN ('seguimiento', 'solucion', 'encuesta')
+        ORDER BY h.id_historial
+        LIMIT %s
+        """,
+        (dias, lote)
+    )
+    ids = [fila[0] for fila in cursor.fetchall()]
+    if not ids:
+        return 0
+    marcadores = ', '.join(['%s'] * len(ids))
+    cursor.execute(
+        f"""
+        INSERT IGNORE INTO historial_tickets_archivo ({COLUMNAS})
+        SELECT {COLUMNAS} FROM historial_tickets
+        WHERE id_historial IN ({marcadores})
+        """,
+        ids
+    )
+    cursor.execute(f"DELETE FROM historial_tickets WHERE id_historial IN ({marcadores})", ids)
+    conn.commit()
+    return len(ids)
+
+
+def archivar(dias=None, lote=None):
+    """Archiva todo el historial pendiente, lote a lote. Devuelve el total."""
+    dias = ARCHIVO_HISTORIAL_CONFIG['dias'] if dias is None else dias
+    lote = lote or ARCHIVO_HISTORIAL_CONFIG['lote']
+    conn = get_db_connection()
+    if conn is None:
+        return 0
+    cursor = conn.cursor()
+    total = 0
+    try:
+        while True:
+            movidas = mover_lote(conn, cursor, dias, lote)
+            total += movidas
+            if movidas < lote:
+                break
+        return total
+    except Exception as e:
+        print(f"Error al archivar historial: {e}")
+        conn.rollback()
+        return total
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _ciclo_archivador(intervalo):
+    while True:
+        time.sleep(intervalo)
+        total = archivar()
+        if total:
+            print(f"Historial archivado: {total} filas")
+
+
+def iniciar_archivador():
+    """Arranca el hilo de fondo si ARCHIVO_HISTORIAL_CONFIG lo habilita."""
+    if not ARCHIVO_HISTORIAL_CONFIG.get('automatico'):
+        return None
+    hilo = threading.Thread(target=_ciclo_archivador, name='archivador-historial',
+                            args=(ARCHIVO_HISTORIAL_CONFIG['intervalo'],), daemon=True)
+    hilo.start()
+    return hilo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dias', type=int, default=None,
+                        help='antigüedad mínima del cierre en días')
+    args = parser.parse_args()
+    total = archivar(dias=args.dias)
+    print(f"Historial archivado: {total} filas")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,490 @@
+"""Índice invertido de trigramas en memoria para la búsqueda global.
+
+Indexa el título y el extracto de la descripción (los primeros
+LONGITUD_EXTRACTO caracteres, los mismos que muestra la respuesta) de los
+tickets, nombre/usuario/correo de usuarios y nombres de categorías y grupos
+para que GET /usuarios/buscar responda desde memoria sin tocar la base de
+datos. La descripción completa no se indexa: con descripciones largas el
+índice crecería con el texto y no con la cantidad de tickets. El texto se
+normaliza (minúsculas, sin tildes) y se rodea de espacios, de modo que las
+consultas de 2 caracteres también encuentran candidatos por inicio de
+palabra. Los candidatos que salen del índice se confirman con una búsqueda
+de subcadena, así que el resultado equivale a LIKE %q% sobre ese texto
+(salvo consultas de 2 caracteres, que solo coinciden al inicio de una
+palabra).
+
+Se carga completo al iniciar la app (cargar) y las rutas de escritura lo
+mantienen al día con refrescar_ticket / refrescar_usuario /
+recargar_catalogos. Esas rutas solo actualizan el índice de su propio
+proceso: cada BUSQUEDA_CONFIG['refresco'] segundos refrescar_cambios
+vuelve a indexar los tickets y usuarios con fecha_actualizacion posterior
+al refresco anterior (lo que trae las escrituras de otros workers) y cada
+BUSQUEDA_CONFIG['recarga'] segundos se carga completo, para quitar lo que
+se borró de la base. Mientras no esté listo, buscar_global usa la base.
+"""
+import heapq
+import sys
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+
+from cache import cache_busqueda
+from config.config import BUSQUEDA_CONFIG
+from database import get_db_connection
+
+LIMITE_RESULTADOS = 10
+# Caracteres de la descripción que se guardan, se muestran y se indexan
+LONGITUD_EXTRACTO = 180
+# Elementos por contenedor con los que estadisticas() estima la memoria
+MUESTRA_TAMANO = 200
+# Segundos que se restan a la marca de refrescar_cambios para no perder
+# cambios de transacciones que confirmaron después de leer NOW()
+MARGEN_REFRESCO_SEGUNDOS = 5
+# Ids por consulta al reindexar lo modificado
+LOTE_REFRESCO = 1000
+
+SQL_TICKETS = f"""
+    SELECT
+        t.id_ticket AS id,
+        t.titulo,
+        LEFT(t.descripcion, {LONGITUD_EXTRACTO}) AS descripcion,
+        t.estado_ticket AS estado,
+        t.prioridad,
+        t.fecha_creacion,
+        ut.id_usuario1 AS solicitanteId,
+        t.id_tecnico_asignado AS tecnicoId
+    FROM tickets t
+    LEFT JOIN usuarios_tickets ut ON t.id_ticket = ut.id_ticket3
+    WHERE t.estado_ticket != 'eliminado'
+"""
+
+SQL_USUARIOS = """
+    SELECT id_usuario AS id, nombre_completo, nombre_usuario, correo, rol, estado,
+           fecha_registro
+    FROM usuarios
+"""
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes y con espacios simples."""
+    texto = unicodedata.normalize('NFKD', str(texto or '').lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.split())
+
+
+def trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def _estimar_bytes(elementos, total, medir=sys.getsizeof):
+    """Bytes aproximados de `total` elementos a partir de los primeros
+    MUESTRA_TAMANO: medir todo el índice llevaría tanto como recorrerlo."""
+    muestra = list(islice(elementos, MUESTRA_TAMANO))
+    if not muestra:
+        return 0
+    return sum(medir(e) for e in muestra) * total // len(muestra)
+
+
+class _Coleccion:
+    """Documentos de un tipo, su texto normalizado y su índice de trigramas."""
+
+    def __init__(self):
+        self.documentos = {}
+        self.textos = {}
+        self.indice = defaultdict(set)
+
+    def poner(self, id_doc, documento, texto):
+        self.quitar(id_doc)
+        texto = f" {normalizar(texto)} "
+        self.documentos[id_doc] = documento
+        self.textos[id_doc] = texto
+        for trigrama in trigramas(texto):
+            self.indice[trigrama].add(id_doc)
+
+    def quitar(self, id_doc):
+        texto = self.textos.pop(id_doc, None)
+        self.documentos.pop(id_doc, None)
+        if texto is None:
+            return
+        for trigrama in trigramas(texto):
+            ids = self.indice.get(trigrama)
+            if ids is not None:
+                ids.discard(id_doc)
+                if not ids:
+                    del self.indice[trigrama]
+
+    def candidatos(self, consulta):
+        """Ids del trigrama menos frecuente de la consulta: todo documento que
+        la contenga está ahí, y confirmar la subcadena sobre esa lista sale
+        más barato que intersectar todas."""
+        # Con 2 caracteres no hay trigrama propio: se busca como inicio de palabra
+        claves = trigramas(consulta if len(consulta) >= 3 else f" {consulta}")
+        if not claves:
+            return set()
+        return min((self.indice.get(t, set()) for t in claves), key=len)
+
+    def coincide(self, id_doc, consulta):
+        # Con 2 caracteres, igual que en candidatos, solo al inicio de una palabra
+        return (consulta if len(consulta) >= 3 else f" {consulta}") in self.textos[id_doc]
+
+    def buscar(self, consulta):
+        """Ids cuyo texto contiene la consulta (ya normalizada)."""
+        return [i for i in self.candidatos(consulta) if self.coincide(i, consulta)]
+
+    def tamano(self):
+        """Bytes estimados de contenedores, documentos, textos y trigramas,
+        midiendo una muestra de cada uno."""
+        tamano = sys.getsizeof(self.documentos) + sys.getsizeof(self.textos)
+        tamano += sys.getsizeof(self.indice)
+        tamano += _estimar_bytes(self.documentos.values(), len(self.documentos))
+        tamano += _estimar_bytes(self.textos.values(), len(self.textos))
+        tamano += _estimar_bytes(self.indice.items(), len(self.indice),
+                                 lambda par: sys.getsizeof(par[0]) + sys.getsizeof(par[1]))
+        return tamano
+
+
+class _ColeccionTickets(_Coleccion):
+    """Además del índice mantiene los tickets ordenados por fecha de creación
+    y agrupados por solicitante, para que las consultas muy comunes corten en
+    cuanto tienen suficientes resultados en vez de ordenar todos los
+    candidatos."""
+
+    def __init__(self):
+        super().__init__()
+        self.orden = []  # (fecha_creacion, id) ascendente
+        self.por_solicitante = defaultdict(set)
+
+    @staticmethod
+    def clave(documento):
+        return (documento['fecha_creacion'] or datetime.min, documento['id'])
+
+    def poner(self, id_doc, documento, texto):
+        super().poner(id_doc, documento, texto)
+        # La carga completa llega ordenada, así que insort casi siempre agrega al final
+        insort(self.orden, self.clave(documento))
+        self.por_solicitante[documento['solicitanteId']].add(id_doc)
+
+    def quitar(self, id_doc):
+        documento = self.documentos.get(id_doc)
+        if documento is not None:
+            clave = self.clave(documento)
+            i = bisect_left(self.orden, clave)
+            if i < len(self.orden) and self.orden[i] == clave:
+                del self.orden[i]
+            ids = self.por_solicitante.get(documento['solicitanteId'])
+            if ids is not None:
+                ids.discard(id_doc)
+                if not ids:
+                    del self.por_solicitante[documento['solicitanteId']]
+        super().quitar(id_doc)
+
+    def recientes(self, consulta, limite, solicitante=None):
+        """Los `limite` tickets más recientes que contienen la consulta."""
+        candidatos = self.candidatos(consulta)
+        propios = None
+        if solicitante is not None:
+            propios = self.por_solicitante.get(solicitante, set())
+            candidatos = min(candidatos, propios, key=len)
+        if len(candidatos) * 20 < len(self.orden):
+            # Pocos candidatos: confirmarlos todos y quedarse con los mejores
+            documentos = [self.documentos[i] for i in candidatos
+                          if (propios is None or i in propios) and self.coincide(i, consulta)]
+            return heapq.nlargest(limite, documentos, key=self.clave)
+        # Consulta muy común: recorrer del más reciente hacia atrás, solo los
+        # candidatos, para que ambos caminos den el mismo resultado
+        resultado = []
+        for _, id_doc in reversed(self.orden):
+            if (id_doc in candidatos and (propios is None or id_doc in propios)
+                    and self.coincide(id_doc, consulta)):
+                resultado.append(self.documentos[id_doc])
+                if len(resultado) == limite:
+                    break
+        return resultado
+
+    def tamano(self):
+        return (super().tamano() + sys.getsizeof(self.orden)
+                + _estimar_bytes(self.orden, len(self.orden))
+                + _estimar_bytes(self.por_solicitante.values(), len(self.por_solicitante)))
+
+
+class IndiceBusqueda:
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._colecciones = self._colecciones_vacias()
+        self.listo = False
+        self._ultima_carga = None
+        self._duracion_carga_ms = None
+        self._marca = None  # NOW() de la base al empezar la última carga o refresco
+        self._ultimo_refresco = None
+        self._refrescados = 0
+
+    @staticmethod
+    def _colecciones_vacias():
+        return {'tickets': _ColeccionTickets(), 'usuarios': _Coleccion(),
+                'categorias': _Coleccion(), 'grupos': _Coleccion()}
+
+    # -- carga y mantenimiento -------------------------------------------
+
+    def cargar(self):
+        """Construye el índice completo desde la base y lo reemplaza."""
+        inicio = time.perf_counter()
+        conn = get_db_connection()
+        if conn is None:
+            return False
+        cursor = conn.cursor(dictionary=True)
+        try:
+            nuevas = self._colecciones_vacias()
+            marca = self._leer_marca(cursor)
+            cursor.execute(SQL_TICKETS + " ORDER BY t.fecha_creacion, t.id_ticket")
+            for fila in cursor.fetchall():
+                # Con más de un solicitante en usuarios_tickets se queda la primera fila
+                if fila['id'] not in nuevas['tickets'].documentos:
+                    self._poner_ticket(nuevas['tickets'], fila)
+            cursor.execute(SQL_USUARIOS)
+            for fila in cursor.fetchall():
+                self._poner_usuario(nuevas['usuarios'], fila)
+            self._cargar_catalogos(cursor, nuevas)
+        except Exception as e:
+            print(f"Error al cargar el índice de búsqueda: {e}")
+            return False
+        finally:
+            cursor.close()
+            conn.close()
+
+        with self._lock:
+            self._colecciones = nuevas
+            self._marca = marca
+            self.listo = True
+            self._ultima_carga = time.strftime('%Y-%m-%d %H:%M:%S')
+            self._duracion_carga_ms = round((time.perf_counter() - inicio) * 1000, 2)
+        return True
+
+    @staticmethod
+    def _leer_marca(cursor):
+        cursor.execute("SELECT NOW() - INTERVAL %s SECOND AS marca", (MARGEN_REFRESCO_SEGUNDOS,))
+        return cursor.fetchone()['marca']
+
+    def refrescar_cambios(self):
+        """Vuelve a indexar los tickets y usuarios modificados desde la carga o
+        el refresco anterior y recarga los catálogos. Devuelve el conjunto de
+        colecciones que cambiaron ('tickets', 'usuarios', 'categorias',
+        'grupos'), los ámbitos a invalidar en cache_busqueda. No ve los registros borrados de la base (los
+        tickets eliminados sí: el soft delete actualiza fecha_actualizacion);
+        esos los quita la siguiente carga completa."""
+        if not self.listo:
+            return set()
+        with self._lock:
+            desde = self._marca
+        conn = get_db_connection()
+        if conn is None:
+            return set()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            marca = self._leer_marca(cursor)
+            cursor.execute("SELECT id_ticket FROM tickets WHERE fecha_actualizacion >= %s", (desde,))
+            tickets = [fila['id_ticket'] for fila in cursor.fetchall()]
+            cursor.execute("SELECT id_usuario FROM usuarios WHERE fecha_actualizacion >= %s", (desde,))
+            usuarios = [fila['id_usuario'] for fila in cursor.fetchall()]
+            # Por tramos: tras una importación masiva pueden ser miles de ids
+            for i in range(0, len(tickets), LOTE_REFRESCO):
+                self.refrescar_tickets(cursor, tickets[i:i + LOTE_REFRESCO])
+            for i in range(0, len(usuarios), LOTE_REFRESCO):
+                self.refrescar_usuarios(cursor, usuarios[i:i + LOTE_REFRESCO])
+            catalogos = {'categorias': _Coleccion(), 'grupos': _Coleccion()}
+            self._cargar_catalogos(cursor, catalogos)
+        finally:
+            cursor.close()
+            conn.close()
+        with self._lock:
+            cambiaron = {t for t, c in catalogos.items() if c.textos != self._colecciones[t].textos}
+            self._colecciones.update(catalogos)
+            self._marca = marca
+            self._ultimo_refresco = time.strftime('%Y-%m-%d %H:%M:%S')
+            self._refrescados += len(tickets) + len(usuarios)
+        if tickets:
+            cambiaron.add('tickets')
+        if usuarios:
+            cambiaron.add('usuarios')
+        return cambiaron
+
+    def refrescar_ticket(self, cursor, id_ticket):
+        """Vuelve a indexar un ticket (o lo quita si ya no existe o fue eliminado)."""
+        self.refrescar_tickets(cursor, [id_ticket])
+
+    def refrescar_tickets(self, cursor, ids):
+        """Igual que refrescar_ticket para varios tickets, con una sola consulta."""
+        ids = [int(i) for i in ids]
+        if not ids:
+            return
+        marcadores = ', '.join(['%s'] * len(ids))
+        cursor.execute(SQL_TICKETS + f" AND t.id_ticket IN ({marcadores})", ids)
+        filas = {}
+        for fila in cursor.fetchall():
+            filas.setdefault(fila['id'], fila)
+        with self._lock:
+            for id_ticket in ids:
+                if id_ticket in filas:
+                    self._poner_ticket(self._colecciones['tickets'], filas[id_ticket])
+                else:
+                    self._colecciones['tickets'].quitar(id_ticket)
+
+    def refrescar_usuario(self, cursor, id_usuario):
+        self.refrescar_usuarios(cursor, [id_usuario])
+
+    def refrescar_usuarios(self, cursor, ids):
+        ids = [int(i) for i in ids]
+        if not ids:
+            return
+        marcadores = ', '.join(['%s'] * len(ids))
+        cursor.execute(SQL_USUARIOS + f" WHERE id_usuario IN ({marcadores})", ids)
+        filas = {fila['id']: fila for fila in cursor.fetchall()}
+        with self._lock:
+            for id_usuario in ids:
+                if id_usuario in filas:
+                    self._poner_usuario(self._colecciones['usuarios'], filas[id_usuario])
+                else:
+                    self._colecciones['usuarios'].quitar(id_usuario)
+
+    def recargar_catalogos(self):
+        """Categorías y grupos son tablas pequeñas: se recargan completas.
+        Se llama después del commit; un fallo aquí no afecta la respuesta."""
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor(dictionary=True)
+            try:
+                nuevas = {'categorias': _Coleccion(), 'grupos': _Coleccion()}
+                self._cargar_catalogos(cursor, nuevas)
+            finally:
+                cursor.close()
+                conn.close()
+            with self._lock:
+                self._colecciones.update(nuevas)
+        except Exception as e:
+            print(f"Error al recargar catálogos del índice de búsqueda: {e}")
+
+    @staticmethod
+    def _cargar_catalogos(cursor, colecciones):
+        cursor.execute("SELECT id_categoria AS id, nombre_categoria AS nombre FROM categorias")
+        for fila in cursor.fetchall():
+            colecciones['categorias'].poner(fila['id'], fila, fila['nombre'])
+        cursor.execute("SELECT id_grupo AS id, nombre_grupo AS nombre FROM grupos")
+        for fila in cursor.fetchall():
+            colecciones['grupos'].poner(fila['id'], fila, fila['nombre'])
+
+    @staticmethod
+    def _poner_ticket(coleccion, fila):
+        # Título y extracto: lo mismo que se muestra en el resultado
+        coleccion.poner(fila['id'], dict(fila),
+                        f"{fila['titulo'] or ''} {fila['descripcion'] or ''}")
+
+    @staticmethod
+    def _poner_usuario(coleccion, fila):
+        texto = ' '.join(str(fila[c] or '') for c in ('nombre_completo', 'nombre_usuario', 'correo'))
+        coleccion.poner(fila['id'], dict(fila), texto)
+
+    # -- consultas ---------------------------------------------------------
+
+    def buscar(self, q, rol=None, usuario_id=None, limite=LIMITE_RESULTADOS):
+        """Mismos grupos y campos que la búsqueda en base de datos."""
+        consulta = normalizar(q)
+        with self._lock:
+            tickets = self._buscar_tickets(consulta, q, rol, usuario_id, limite)
+            usuarios = self._buscar_usuarios(consulta, limite)
+            categorias = self._buscar_catalogo('categorias', consulta, limite)
+            grupos = self._buscar_catalogo('grupos', consulta, limite)
+        return {'tickets': tickets, 'usuarios': usuarios,
+                'categorias': categorias, 'grupos': grupos}
+
+    def _buscar_tickets(self, consulta, q, rol, usuario_id, limite):
+        coleccion = self._colecciones['tickets']
+        solicitante = None
+        if rol == 'usuario' and usuario_id:
+            try:
+                solicitante = int(usuario_id)
+            except (TypeError, ValueError):
+                return []
+        documentos = coleccion.recientes(consulta, limite, solicitante)
+        # El ticket con ese número va primero
+        exacto = coleccion.documentos.get(int(q)) if q.isdigit() else None
+        if exacto and (solicitante is None or exacto['solicitanteId'] == solicitante):
+            documentos = [exacto] + [d for d in documentos if d is not exacto][:limite - 1]
+        nombres = self._colecciones['usuarios'].documentos
+        return [{
+            'id': d['id'],
+            'titulo': d['titulo'],
+            'descripcion': d['descripcion'],
+            'estado': d['estado'],
+            'prioridad': d['prioridad'],
+            'solicitante': (nombres.get(d['solicitanteId']) or {}).get('nombre_completo'),
+            'tecnico': (nombres.get(d['tecnicoId']) or {}).get('nombre_completo')
+        } for d in documentos]
+
+    def _buscar_usuarios(self, consulta, limite):
+        coleccion = self._colecciones['usuarios']
+        documentos = [coleccion.documentos[i] for i in coleccion.buscar(consulta)]
+        mejores = heapq.nlargest(limite, documentos,
+                                 key=lambda d: (d['fecha_registro'] or datetime.min, d['id']))
+        campos = ('id', 'nombre_completo', 'nombre_usuario', 'correo', 'rol', 'estado')
+        return [{c: d[c] for c in campos} for d in mejores]
+
+    def _buscar_catalogo(self, tipo, consulta, limite):
+        coleccion = self._colecciones[tipo]
+        documentos = [coleccion.documentos[i] for i in coleccion.buscar(consulta)]
+        return heapq.nsmallest(limite, documentos, key=lambda d: (d['nombre'], d['id']))
+
+    # -- métricas ------------------------------------------------------------
+
+    def estadisticas(self):
+        # tamano() mide una muestra por contenedor: sostener el lock es breve
+        with self._lock:
+            return {
+                'listo': self.listo,
+                'ultima_carga': self._ultima_carga,
+                'duracion_carga_ms': self._duracion_carga_ms,
+                'ultimo_refresco': self._ultimo_refresco,
+                'refrescados': self._refrescados,
+                'refresco': BUSQUEDA_CONFIG.get('refresco'),
+                'recarga': BUSQUEDA_CONFIG.get('recarga'),
+                'documentos': {t: len(c.documentos) for t, c in self._colecciones.items()},
+                'trigramas': {t: len(c.indice) for t, c in self._colecciones.items()},
+                'memoria_bytes_estimada': sum(c.tamano() for c in self._colecciones.values())
+            }
+
+
+indice_busqueda = IndiceBusqueda()
+
+
+def _ciclo_indice(refresco, recarga):
+    proxima_carga = 0
+    while True:
+        try:
+            # Las búsquedas guardadas se armaron con el índice anterior
+            if time.monotonic() >= proxima_carga or not indice_busqueda.listo:
+                if indice_busqueda.cargar():
+                    cache_busqueda.limpiar()
+                    proxima_carga = time.monotonic() + (recarga or float('inf'))
+            else:
+                cache_busqueda.avanzar(*indice_busqueda.refrescar_cambios())
+        except Exception as e:
+            print(f"Error al refrescar el índice de búsqueda: {e}")
+        if not refresco:
+            return
+        time.sleep(refresco)
+
+
+def iniciar_indice():
+    """Carga el índice en segundo plano si BUSQUEDA_CONFIG lo habilita, lo
+    refresca con los cambios cada BUSQUEDA_CONFIG['refresco'] segundos y lo
+    vuelve a cargar completo cada BUSQUEDA_CONFIG['recarga'] segundos."""
+    if not BUSQUEDA_CONFIG.get('indice_memoria'):
+        return None
+    hilo = threading.Thread(target=_ciclo_indice, name='indice-busqueda',
+                            args=(BUSQUEDA_CONFIG.get('refresco'), BUSQUEDA_CONFIG.get('recarga')),
+                            daemon=True)
+    hilo.start()
+    return hilo
@@ -0,0 +1,104 @@
+"""Caché en memoria LRU con expiración para documentos ya armados.
+
+Cada entrada se guarda junto con la versión con la que se construyó; una
+lectura con otra versión cuenta como fallo, de modo que un cambio hecho por
+otro proceso nunca se sirve viejo. Las rutas de escritura además invalidan
+la clave para liberar la memoria cuanto antes.
+
+Para valores que dependen de conjuntos de datos (la búsqueda global) la
+versión puede ser generacion_de(ámbitos): avanzar('tickets') invalida solo
+lo armado con datos de tickets y deja vigente el resto.
+"""
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from config.config import CACHE_TICKETS_CONFIG, CACHE_BUSQUEDA_CONFIG
+
+
+class CacheLRU:
+
+    def __init__(self, max_entradas=1000, ttl=300):
+        self._max_entradas = max_entradas
+        self._ttl = ttl
+        self._entradas = OrderedDict()  # clave -> (version, valor, expira)
+        self._lock = threading.Lock()
+        self._aciertos = 0
+        self._fallos = 0
+        self._invalidaciones = 0
+        self._generacion = 0
+        self._generaciones = defaultdict(int)  # ámbito -> generación
+
+    @property
+    def generacion(self):
+        """Aumenta con cada limpiar(). Quien arma un valor puede tomarla como
+        versión antes de consultar la base, para que un resultado calculado
+        antes de una invalidación no se sirva después de ella."""
+        return self._generacion
+
+    def generacion_de(self, *ambitos):
+        """Versión para un valor armado con los datos de `ambitos`: cambia con
+        limpiar() y con avanzar() de cualquiera de ellos. Se toma antes de
+        consultar, igual que `generacion`."""
+        with self._lock:
+            return (self._generacion,) + tuple(self._generaciones[a] for a in ambitos)
+
+    def avanzar(self, *ambitos):
+        """Invalida los valores guardados con generacion_de() de alguno de
+        `ambitos`. No recorre las entradas: las viejas fallan al leerse y se
+        descartan, o las saca el LRU."""
+        with self._lock:
+            for ambito in ambitos:
+                self._generaciones[ambito] += 1
+
+    def obtener(self, clave, version=None):
+        """Devuelve el valor guardado para `clave` si sigue vigente y fue
+        construido con `version`; si no, None."""
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None or entrada[2] < ahora or entrada[0] != version:
+                if entrada is not None:
+                    del self._entradas[clave]
+                self._fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self._aciertos += 1
+            return entrada[1]
+
+    def guardar(self, clave, valor, version=None):
+        with self._lock:
+            self._entradas[clave] = (version, valor, time.monotonic() + self._ttl)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self._max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, clave):
+        with self._lock:
+            if self._entradas.pop(clave, None) is not None:
+                self._invalidaciones += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._invalidaciones += len(self._entradas)
+            self._entradas.clear()
+            self._generacion += 1
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self._aciertos + self._fallos
+            return {
+                "entradas": len(self._entradas),
+                "max_entradas": self._max_entradas,
+                "ttl": self._ttl,
+                "aciertos": self._aciertos,
+                "fallos": self._fallos,
+                "invalidaciones": self._invalidaciones,
+                "tasa_aciertos": round(self._aciertos / consultas, 3) if consultas else 0.0
+            }
+
+
+# Detalle armado de cada ticket, por id y versión (ver obtener_ticket_por_id)
+cache_tickets = CacheLRU(**CACHE_TICKETS_CONFIG)
+# Resultados de /usuarios/buscar por grupo, consulta normalizada y modo, con
+# la versión de los ámbitos de los que depende cada grupo
+cache_busqueda = CacheLRU(**CACHE_BUSQUEDA_CONFIG)
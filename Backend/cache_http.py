@@ -0,0 +1,28 @@
+"""Utilidades de caché HTTP (ETag / Last-Modified) para respuestas JSON."""
+import hashlib
+from flask import request, Response
+
+
+def calcular_etag(*partes):
+    return hashlib.sha1(repr(partes).encode('utf-8')).hexdigest()
+
+
+def marcar_version(respuesta, etag, ultima_modificacion=None, debil=False,
+                   cache_control='no-cache'):
+    """Agrega ETag, Last-Modified y Cache-Control a la respuesta. Con
+    'no-cache' el navegador guarda la respuesta pero la revalida siempre."""
+    respuesta.set_etag(etag, weak=debil)
+    if ultima_modificacion:
+        respuesta.last_modified = ultima_modificacion
+    respuesta.headers['Cache-Control'] = cache_control
+    return respuesta
+
+
+def no_modificado(etag, debil=False):
+    """Devuelve una respuesta 304 si el cliente ya tiene esta versión
+    (If-None-Match); si no, None. If-Modified-Since no se usa: la fecha de
+    un ticket no cambia con sus seguimientos ni al renombrar su categoría,
+    y el ETag sí."""
+    if not request.if_none_match or not request.if_none_match.contains_weak(etag):
+        return None
+    return marcar_version(Response(status=304), etag, debil=debil)
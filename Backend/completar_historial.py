@@ -0,0 +1,96 @@
+"""Completa descripcion, calificacion e historial_adjuntos a partir del JSON
+guardado en historial_tickets.valor_nuevo.
+
+Uso:
+    python completar_historial.py
+
+Lo ejecuta la migración 0004; puede volver a ejecutarse a mano si quedaron
+filas escritas por una versión anterior del backend (solo procesa las que
+tienen descripcion en NULL).
+"""
+import json
+import sys
+
+from database import get_db_connection
+
+LOTE = 1000
+
+
+def _leer_payload(valor):
+    try:
+        payload = json.loads(valor) if valor else {}
+    except Exception:
+        payload = {'descripcion': valor}
+    return payload if isinstance(payload, dict) else {'descripcion': str(payload)}
+
+
+def completar(conn, cursor):
+    ultimo = 0
+    total = 0
+    while True:
+        cursor.execute(
+            """
+            SELECT id_historial, campo_modificado, valor_nuevo
+            FROM historial_tickets
+            WHERE id_historial > %s AND descripcion IS NULL
+              AND campo_modificado IN ('seguimiento', 'solucion', 'encuesta')
+            ORDER BY id_historial
+            LIMIT %s
+            """,
+            (ultimo, LOTE)
+        )
+        filas = cursor.fetchall()
+        if not filas:
+            break
+
+        cambios = []
+        adjuntos = []
+        for id_historial, campo, valor_nuevo in filas:
+            payload = _leer_payload(valor_nuevo)
+            descripcion = payload.get('descripcion') or payload.get('comentario') or ''
+            calificacion = None
+            if campo == 'encuesta':
+                try:
+                    calificacion = int(payload.get('calificacion'))
+                except (TypeError, ValueError):
+                    calificacion = None
+            cambios.append((str(descripcion), calificacion, id_historial))
+            for nombre in payload.get('archivos') or []:
+                adjuntos.append((id_historial, str(nombre)))
+
+        cursor.executemany(
+            "UPDATE historial_tickets SET descripcion = %s, calificacion = %s WHERE id_historial = %s",
+            cambios
+        )
+        if adjuntos:
+            cursor.executemany(
+                "INSERT INTO historial_adjuntos (id_historial, nombre_archivo) VALUES (%s, %s)",
+                adjuntos
+            )
+        conn.commit()
+        ultimo = filas[-1][0]
+        total += len(filas)
+        print(f"   {total} filas de historial completadas")
+    return total
+
+
+def main():
+    conn = get_db_connection()
+    if conn is None:
+        return 1
+    cursor = conn.cursor()
+    try:
+        total = completar(conn, cursor)
+        print(f"Historial completado: {total} filas")
+        return 0
+    except Exception as e:
+        print(f"Error al completar el historial: {e}")
+        conn.rollback()
+        return 1
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
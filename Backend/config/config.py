@@ -1,6 +1,86 @@
+import os
+
 DATABASE_CONFIG = {
     "host": "localhost",
     "user": "root",
     "password": "",
     "database": "help_desk_jcbd"
-}
\ No newline at end of file
+}
+
+# Pool de conexiones (ver database.py)
+POOL_CONFIG = {
+    "tamano": 10,            # conexiones que se mantienen abiertas
+    "max_desborde": 10,      # conexiones extra permitidas en picos
+    "timeout": 30,           # segundos máximos de espera por una conexión
+    "reciclar": 3600,        # segundos de vida antes de reemplazar una conexión
+    "ping_inactividad": 30   # segundos sin uso tras los cuales se hace ping
+}
+
+# Caché en memoria del detalle de tickets (ver cache.py)
+CACHE_TICKETS_CONFIG = {
+    "max_entradas": 2000,    # tickets armados que se guardan
+    "ttl": 600               # segundos de vida de cada entrada
+}
+
+# Caché en memoria de las respuestas de la búsqueda global (ver cache.py)
+CACHE_BUSQUEDA_CONFIG = {
+    "max_entradas": 500,     # consultas distintas que se guardan
+    "ttl": 60                # segundos de vida de cada entrada
+}
+
+# Datos de referencia en memoria: nombre -> id y catálogos (ver referencias.py)
+REFERENCIAS_CONFIG = {
+    "ttl": 300,                  # segundos antes de recargar lo cambiado por otro proceso
+    "cache_control": "no-cache"  # el navegador guarda los catálogos y revalida con ETag
+}
+
+# Tamaño máximo de las operaciones por lote
+LOTES_CONFIG = {
+    "max_tickets_consulta": 100,   # ids por solicitud en /usuarios/tickets/lote
+    "max_usuarios_creacion": 1000, # usuarios por solicitud en /usuarios/creacion/lote
+    "usuarios_por_insercion": 200, # filas por INSERT (y por transacción) de ese alta
+    "max_tickets_actualizacion": 500  # tickets por PUT /usuarios/tickets/lote
+}
+
+# Importación masiva de tickets desde CSV o NDJSON (ver importacion.py)
+IMPORTACION_CONFIG = {
+    "lote": 1000,            # tickets insertados por transacción
+    "max_filas": 50000       # filas aceptadas por archivo en la API
+}
+
+# Archivo del historial de tickets cerrados (ver archivo_historial.py)
+ARCHIVO_HISTORIAL_CONFIG = {
+    "dias": 180,             # antigüedad mínima del cierre para archivar
+    "lote": 1000,            # filas movidas por transacción
+    "automatico": False,     # mover en un hilo de fondo al iniciar la app
+    "intervalo": 3600        # segundos entre ejecuciones del hilo de fondo
+}
+
+# Canal SSE de cambios de tickets (ver eventos.py). Vive en el proceso: hay que
+# servir la app con un solo worker o los clientes de un worker no reciben los
+# cambios hechos en otro
+EVENTOS_CONFIG = {
+    "max_conexiones": 100    # clientes SSE abiertos a la vez; cada uno ocupa un hilo
+}
+
+# Índice de trigramas en memoria para /usuarios/buscar (ver busqueda.py)
+BUSQUEDA_CONFIG = {
+    "indice_memoria": True,      # cargar el índice al iniciar y responder desde memoria
+    "refresco": 30,              # segundos entre refrescos con lo modificado (otros workers)
+    "recarga": 3600,             # segundos entre cargas completas (registros borrados)
+    "hilos": 8,                  # subconsultas en paralelo de la búsqueda en base
+    "timeout_subconsulta": 2.0,  # segundos de espera por subconsulta antes de omitirla;
+                                 # también límite de cada sentencia en el servidor
+    "max_simultaneas": 2         # búsquedas en base a la vez (4 conexiones cada una);
+                                 # con hilos / 4 ninguna subconsulta espera en cola
+}
+
+# Tokens de sesión firmados (ver sesiones.py)
+SESION_CONFIG = {
+    "secreto": os.environ.get("HELPDESK_SECRETO", ""),  # clave de firma, común a todos los procesos (obligatoria)
+    "duracion": 8 * 3600,        # segundos de vigencia de un token
+    "intervalo_revocacion": 30,  # segundos entre recargas de la lista de revocación
+    "exigir": False,             # True: todas las rutas no públicas sin token responden 401
+    "identidad_query": False     # True: sin token, tomar rol/usuario_id de la query string
+                                 # (clientes anteriores al token; inseguro, solo transición)
+}
@@ -1,12 +1,278 @@
+import threading
+import time
 import mysql.connector
+from flask import g, has_request_context
 from mysql.connector import Error
-from config.config import DATABASE_CONFIG
+from config.config import DATABASE_CONFIG, POOL_CONFIG
 
-def get_db_connection():
+
+class PoolAgotadoError(Error):
+    """No se pudo obtener una conexión del pool dentro del tiempo de espera."""
+
+
+class ConexionPool:
+    """Envoltorio de una conexión prestada por el pool.
+
+    Se comporta como la conexión de mysql.connector, pero `close()` la
+    devuelve al pool en lugar de cerrar el socket.
+    """
+
+    def __init__(self, pool, conn, creada):
+        self._pool = pool
+        self._conn = conn
+        self._creada = creada
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.liberar(conn, self._creada)
+
+    def __getattr__(self, nombre):
+        if self._conn is None:
+            raise Error("La conexión ya fue devuelta al pool")
+        return getattr(self._conn, nombre)
+
+
+class ConexionSolicitud:
+    """Conexión compartida durante toda una solicitud HTTP.
+
+    Las rutas y helpers que llamen a get_db_connection() dentro de la misma
+    solicitud reciben esta misma conexión (y su transacción). `close()` no
+    hace nada: al terminar la solicitud se cierran los cursores que hayan
+    quedado abiertos, se confirma o revierte la transacción pendiente y la
+    conexión vuelve al pool una sola vez.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._cursores = []
+
+    def cursor(self, *args, **kwargs):
+        # Con buffer por defecto para que varios cursores puedan convivir
+        # sobre la misma conexión sin "Unread result found"
+        kwargs.setdefault("buffered", True)
+        cursor = self._conn.cursor(*args, **kwargs)
+        self._cursores.append(cursor)
+        return cursor
+
+    def close(self):
+        pass
+
+    def finalizar(self, confirmar):
+        for cursor in self._cursores:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+        self._cursores = []
+        try:
+            if self._conn.in_transaction:
+                if confirmar:
+                    self._conn.commit()
+                else:
+                    self._conn.rollback()
+        except Exception as e:
+            print(f"Error al finalizar la transacción de la solicitud: {e}")
+        finally:
+            self._conn.close()
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+
+class PoolConexiones:
+    """Pool acotado de conexiones MySQL.
+
+    Mantiene hasta `tamano` conexiones abiertas para reutilizar y admite
+    `max_desborde` conexiones temporales adicionales en picos, que se cierran
+    al devolverse. Si no hay conexiones disponibles se espera hasta `timeout`
+    segundos. Las conexiones más viejas que `reciclar` segundos se reemplazan
+    y las que llevan más de `ping_inactividad` segundos sin usarse se
+    verifican con un ping antes de entregarse.
+    """
+
+    def __init__(self, config, tamano=10, max_desborde=10, timeout=30,
+                 reciclar=3600, ping_inactividad=30):
+        self._config = config
+        self._tamano = tamano
+        self._max_desborde = max_desborde
+        self._timeout = timeout
+        self._reciclar = reciclar
+        self._ping_inactividad = ping_inactividad
+
+        self._cond = threading.Condition()
+        self._libres = []  # (conexion, creada, ultimo_uso), se usa como pila
+        self._abiertas = 0
+        self._en_uso = 0
+        self._esperando = 0
+
+        self._prestamos = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+        self._timeouts = 0
+        self._recicladas = 0
+
+    def obtener(self):
+        inicio = time.perf_counter()
+        limite = inicio + self._timeout
+        entrada = None
+
+        with self._cond:
+            self._esperando += 1
+            try:
+                while True:
+                    if self._libres:
+                        entrada = self._libres.pop()
+                        break
+                    if self._abiertas < self._tamano + self._max_desborde:
+                        # Reservar el cupo; la conexión se abre fuera del lock
+                        self._abiertas += 1
+                        break
+                    restante = limite - time.perf_counter()
+                    if restante <= 0:
+                        self._timeouts += 1
+                        raise PoolAgotadoError(
+                            f"Sin conexiones disponibles tras {self._timeout}s de espera")
+                    self._cond.wait(restante)
+            finally:
+                self._esperando -= 1
+
+        conn = None
+        try:
+            if entrada is not None:
+                conn, creada = self._validar(entrada)
+            if conn is None:
+                conn = mysql.connector.connect(**self._config)
+                creada = time.monotonic()
+        except Exception:
+            with self._cond:
+                self._abiertas -= 1
+                self._cond.notify()
+            raise
+
+        espera = time.perf_counter() - inicio
+        with self._cond:
+            self._en_uso += 1
+            self._prestamos += 1
+            self._espera_total += espera
+            self._espera_max = max(self._espera_max, espera)
+        return ConexionPool(self, conn, creada)
+
+    def _validar(self, entrada):
+        """Devuelve (conexion, creada) o (None, None) si hay que abrir otra."""
+        conn, creada, ultimo_uso = entrada
+        ahora = time.monotonic()
+        if self._reciclar and ahora - creada > self._reciclar:
+            self._cerrar(conn)
+            with self._cond:
+                self._recicladas += 1
+            return None, None
+        if ahora - ultimo_uso > self._ping_inactividad:
+            try:
+                conn.ping(reconnect=False)
+            except Exception:
+                self._cerrar(conn)
+                with self._cond:
+                    self._recicladas += 1
+                return None, None
+        return conn, creada
+
+    def liberar(self, conn, creada):
+        reutilizable = True
+        try:
+            # Nunca devolver al pool una transacción a medias
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            reutilizable = False
+
+        with self._cond:
+            self._en_uso -= 1
+            if reutilizable and self._abiertas <= self._tamano:
+                self._libres.append((conn, creada, time.monotonic()))
+                conn = None
+            else:
+                self._abiertas -= 1
+            self._cond.notify()
+
+        if conn is not None:
+            self._cerrar(conn)
+
+    @staticmethod
+    def _cerrar(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def estadisticas(self):
+        with self._cond:
+            return {
+                "tamano": self._tamano,
+                "max_desborde": self._max_desborde,
+                "abiertas": self._abiertas,
+                "libres": len(self._libres),
+                "en_uso": self._en_uso,
+                "esperando": self._esperando,
+                "prestamos": self._prestamos,
+                "timeouts": self._timeouts,
+                "recicladas": self._recicladas,
+                "espera_promedio_ms": round(
+                    self._espera_total / self._prestamos * 1000, 3) if self._prestamos else 0.0,
+                "espera_max_ms": round(self._espera_max * 1000, 3)
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obtener_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolConexiones(DATABASE_CONFIG, **POOL_CONFIG)
+    return _pool
+
+
+def estadisticas_pool():
+    return obtener_pool().estadisticas()
+
+
+def _conexion_del_pool():
     try:
-        conn = mysql.connector.connect(**DATABASE_CONFIG)
-        if conn.is_connected():
-            return conn
+        return obtener_pool().obtener()
     except Error as e:
         print(f"Error al conectar a la base de datos: {e}")
         return None
+
+
+def get_db_connection():
+    """Devuelve la conexión de la solicitud actual o, fuera de una solicitud
+    (scripts, hilos de fondo), una conexión propia del pool."""
+    if not has_request_context():
+        return _conexion_del_pool()
+    conn = g.get("_db_conexion")
+    if conn is None:
+        base = _conexion_del_pool()
+        if base is None:
+            return None
+        conn = g._db_conexion = ConexionSolicitud(base)
+    return conn
+
+
+def init_app(app):
+    """Registra el cierre de la conexión de solicitud en la app Flask."""
+
+    @app.after_request
+    def _registrar_estado(response):
+        g._db_estado = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finalizar_conexion(exc):
+        conn = g.pop("_db_conexion", None)
+        if conn is not None:
+            confirmar = exc is None and g.get("_db_estado", 500) < 400
+            conn.finalizar(confirmar)
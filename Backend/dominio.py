@@ -0,0 +1,7 @@
+"""Valores válidos de los campos de un ticket, compartidos por la importación
+masiva y las rutas que los validan."""
+
+PRIORIDADES = {'alta', 'media', 'baja'}
+TIPOS = {'incidencia', 'requerimiento'}
+# Estados que se pueden asignar; 'eliminado' solo lo pone la eliminación (soft delete)
+ESTADOS = {'nuevo', 'en-curso', 'en-espera', 'resuelto', 'cerrado'}
@@ -0,0 +1,105 @@
+"""Canal de eventos de tickets para los clientes conectados por SSE.
+
+Las rutas de escritura publican un evento por cada cambio y el canal lo
+reparte en memoria a cada suscriptor cuyos filtros coincidan, de modo que
+los navegadores abiertos no necesitan consultar la base de datos para
+enterarse de los cambios.
+
+El canal vive en el proceso y no hay un intermediario compartido: con
+varios workers cada uno reparte solo los eventos que generan sus propias
+solicitudes, así que la app se sirve con un único proceso (con hilos). Cada
+cliente conectado ocupa un hilo, por eso el canal admite como máximo
+EVENTOS_CONFIG['max_conexiones'] suscriptores.
+"""
+import itertools
+import json
+import queue
+import threading
+
+from config.config import EVENTOS_CONFIG
+
+# Eventos pendientes por suscriptor; si un cliente lento la llena se
+# descartan sus eventos más viejos
+TAMANO_COLA = 100
+# Segundos sin eventos tras los cuales se envía un comentario de keep-alive
+INTERVALO_PING = 15
+
+
+class CanalLleno(Exception):
+    """El canal ya tiene el máximo de suscriptores."""
+
+
+def _coincide(evento, clave, valor):
+    return evento.get(clave) == valor or evento.get(f'{clave}_anterior') == valor
+
+
+class CanalEventos:
+
+    def __init__(self, tamano_cola=TAMANO_COLA, max_suscriptores=None):
+        self._tamano_cola = tamano_cola
+        self._max_suscriptores = max_suscriptores
+        self._suscriptores = {}
+        self._lock = threading.Lock()
+        self._ids_suscripcion = itertools.count(1)
+        self._ids_evento = itertools.count(1)
+
+    def suscribir(self, filtros=None):
+        """Registra un suscriptor. `filtros` es un dict (id_tecnico, id_grupo,
+        id_solicitante) y solo se reciben los eventos que coinciden en todos.
+        Un filtro coincide con el valor del evento o con su '<clave>_anterior'
+        (el técnico o grupo que tenía el ticket antes de reasignarlo).
+        Lanza CanalLleno si ya hay max_suscriptores."""
+        cola = queue.Queue(maxsize=self._tamano_cola)
+        with self._lock:
+            if (self._max_suscriptores is not None
+                    and len(self._suscriptores) >= self._max_suscriptores):
+                raise CanalLleno("Demasiados clientes conectados al canal de eventos")
+            token = next(self._ids_suscripcion)
+            self._suscriptores[token] = (cola, dict(filtros or {}))
+        return token, cola
+
+    def desuscribir(self, token):
+        with self._lock:
+            self._suscriptores.pop(token, None)
+
+    def publicar(self, evento):
+        with self._lock:
+            evento = dict(evento, id_evento=next(self._ids_evento))
+            destinos = [cola for cola, filtros in self._suscriptores.values()
+                        if all(_coincide(evento, k, v) for k, v in filtros.items())]
+        for cola in destinos:
+            while True:
+                try:
+                    cola.put_nowait(evento)
+                    break
+                except queue.Full:
+                    try:
+                        cola.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def total_suscriptores(self):
+        with self._lock:
+            return len(self._suscriptores)
+
+    def stream(self, token, cola):
+        """Generador con el formato text/event-stream para un suscriptor ya
+        registrado con suscribir(). Lo desuscribe al cerrarse; si el cliente
+        se va antes de empezar a leer, quien lo registró debe desuscribirlo
+        (desuscribir() se puede llamar dos veces)."""
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    evento = cola.get(timeout=INTERVALO_PING)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                yield (f"id: {evento['id_evento']}\n"
+                       f"event: ticket\n"
+                       f"data: {json.dumps(evento, ensure_ascii=False)}\n\n")
+        finally:
+            self.desuscribir(token)
+
+
+canal_tickets = CanalEventos(max_suscriptores=EVENTOS_CONFIG['max_conexiones'])
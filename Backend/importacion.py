@@ -0,0 +1,335 @@
+"""Importación masiva de tickets desde CSV o NDJSON.
+
+Uso:
+    python importacion.py tickets.csv
+    python importacion.py tickets.ndjson --validar   # solo valida, no inserta
+    python importacion.py tickets.csv --lote 500
+
+Cada fila trae titulo, descripcion, prioridad, tipo, ubicacion y
+solicitante, y opcionalmente estado, categoria, grupo, tecnico,
+fecha_creacion y fecha_cierre. Categoría y grupo se indican por nombre o
+id; solicitante y técnico por nombre de usuario, correo o id. Las
+referencias de todo el archivo se resuelven con una consulta por tabla y
+los tickets válidos se insertan `lote` por transacción.
+El resultado informa, por cada fila, el id creado o sus errores.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from busqueda import normalizar
+from config.config import IMPORTACION_CONFIG
+from database import get_db_connection
+from dominio import ESTADOS, PRIORIDADES, TIPOS
+from versiones import avanzar_version
+
+REQUERIDOS = ('titulo', 'descripcion', 'prioridad', 'tipo', 'ubicacion', 'solicitante')
+FORMATOS_FECHA = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d')
+LONGITUDES = {'titulo': 200, 'prioridad': 100, 'tipo': 100, 'ubicacion': 100}
+
+
+class ErrorFormato(ValueError):
+    """El archivo completo no se puede leer (formato desconocido, CSV sin
+    encabezado, demasiadas filas)."""
+
+
+def detectar_formato(nombre=None, tipo_contenido=None):
+    """'csv' o 'ndjson' según la extensión o el Content-Type; None si no se sabe."""
+    extension = os.path.splitext(nombre or '')[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    tipo_contenido = (tipo_contenido or '').split(';')[0].strip().lower()
+    if tipo_contenido in ('text/csv', 'application/csv'):
+        return 'csv'
+    if tipo_contenido in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+        return 'ndjson'
+    return None
+
+
+def leer_filas(texto, formato, max_filas=None):
+    """Devuelve [(numero, datos, error)]. `datos` es un dict con las claves en
+    minúsculas, o None si la fila no se pudo leer (y entonces hay `error`)."""
+    filas = []
+    if formato == 'csv':
+        muestra = texto[:4096]
+        try:
+            dialecto = csv.Sniffer().sniff(muestra.splitlines()[0] if muestra else '', delimiters=',;\t')
+        except csv.Error:
+            dialecto = csv.excel
+        lector = csv.DictReader(io.StringIO(texto), dialect=dialecto)
+        if not lector.fieldnames:
+            raise ErrorFormato('El CSV no tiene encabezado')
+        # La fila 1 es el encabezado
+        for numero, datos in enumerate(lector, start=2):
+            if None in datos:
+                filas.append((numero, None, 'La fila tiene más columnas que el encabezado'))
+            else:
+                filas.append((numero, {(k or '').strip().lower(): v for k, v in datos.items()}, None))
+            if max_filas and len(filas) > max_filas:
+                raise ErrorFormato(f'El archivo supera el máximo de {max_filas} filas')
+    elif formato == 'ndjson':
+        for numero, linea in enumerate(texto.splitlines(), start=1):
+            if not linea.strip():
+                continue
+            try:
+                datos = json.loads(linea)
+            except ValueError as e:
+                filas.append((numero, None, f'JSON inválido: {e}'))
+            else:
+                if isinstance(datos, dict):
+                    filas.append((numero, {str(k).strip().lower(): v for k, v in datos.items()}, None))
+                else:
+                    filas.append((numero, None, 'Cada línea debe ser un objeto JSON'))
+            if max_filas and len(filas) > max_filas:
+                raise ErrorFormato(f'El archivo supera el máximo de {max_filas} filas')
+    else:
+        raise ErrorFormato("formato debe ser 'csv' o 'ndjson'")
+    return filas
+
+
+def _texto(valor):
+    return '' if valor is None else str(valor).strip()
+
+
+def _fecha(valor):
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(valor, formato)
+        except ValueError:
+            pass
+    return None
+
+
+def resolver_referencias(cursor, filas):
+    """Busca de una vez todas las categorías, grupos y usuarios que nombran las
+    filas. Devuelve {'categoria': {clave: id}, 'grupo': ..., 'usuario': {clave: (id, rol)}}
+    con las claves normalizadas (también el id como texto)."""
+    categorias, grupos, usuarios = {}, {}, {}
+    cursor.execute("SELECT id_categoria, nombre_categoria FROM categorias")
+    for id_categoria, nombre in cursor.fetchall():
+        categorias[normalizar(nombre)] = id_categoria
+        categorias[str(id_categoria)] = id_categoria
+    cursor.execute("SELECT id_grupo, nombre_grupo FROM grupos")
+    for id_grupo, nombre in cursor.fetchall():
+        grupos[normalizar(nombre)] = id_grupo
+        grupos[str(id_grupo)] = id_grupo
+
+    # La tabla de usuarios puede ser grande: solo los que aparecen en el archivo
+    nombres = {_texto(datos.get(campo)) for _, datos, _ in filas if datos
+               for campo in ('solicitante', 'tecnico')} - {''}
+    ids = [int(n) for n in nombres if n.isdigit()]
+    textos = [n for n in nombres if not n.isdigit()]
+    condiciones, params = [], []
+    if textos:
+        marcadores = ', '.join(['%s'] * len(textos))
+        condiciones += [f"nombre_usuario IN ({marcadores})", f"correo IN ({marcadores})"]
+        params += textos + textos
+    if ids:
+        condiciones.append(f"id_usuario IN ({', '.join(['%s'] * len(ids))})")
+        params += ids
+    if condiciones:
+        cursor.execute(
+            "SELECT id_usuario, nombre_usuario, correo, rol FROM usuarios WHERE "
+            + " OR ".join(condiciones),
+            params
+        )
+        for id_usuario, nombre_usuario, correo, rol in cursor.fetchall():
+            for clave in (normalizar(nombre_usuario), normalizar(correo), str(id_usuario)):
+                usuarios[clave] = (id_usuario, rol)
+    return {'categoria': categorias, 'grupo': grupos, 'usuario': usuarios}
+
+
+def validar_fila(datos, referencias, ahora):
+    """Devuelve (valores para el INSERT, errores) de una fila ya leída."""
+    errores = []
+    valores = {campo: _texto(datos.get(campo)) for campo in
+               REQUERIDOS + ('estado', 'categoria', 'grupo', 'tecnico', 'fecha_creacion', 'fecha_cierre')}
+    for campo in REQUERIDOS:
+        if not valores[campo]:
+            errores.append(f'{campo} es requerido')
+    for campo, maximo in LONGITUDES.items():
+        if len(valores[campo]) > maximo:
+            errores.append(f'{campo} supera {maximo} caracteres')
+
+    prioridad = valores['prioridad'].lower()
+    if prioridad and prioridad not in PRIORIDADES:
+        errores.append(f"prioridad inválida '{valores['prioridad']}'")
+    tipo = valores['tipo'].lower()
+    if tipo and tipo not in TIPOS:
+        errores.append(f"tipo inválido '{valores['tipo']}'")
+    estado = valores['estado'].lower() or 'nuevo'
+    if estado not in ESTADOS:
+        errores.append(f"estado inválido '{valores['estado']}'")
+
+    def referencia(campo, tabla):
+        if not valores[campo]:
+            return None
+        encontrado = referencias[tabla].get(normalizar(valores[campo]))
+        if encontrado is None:
+            errores.append(f"{campo} '{valores[campo]}' no existe")
+        return encontrado
+
+    id_categoria = referencia('categoria', 'categoria')
+    id_grupo = referencia('grupo', 'grupo')
+    solicitante = referencia('solicitante', 'usuario')
+    tecnico = referencia('tecnico', 'usuario')
+    if tecnico and tecnico[1] == 'usuario':
+        errores.append(f"tecnico '{valores['tecnico']}' no es técnico ni administrador")
+
+    fechas = {}
+    for campo in ('fecha_creacion', 'fecha_cierre'):
+        fechas[campo] = None
+        if valores[campo]:
+            fechas[campo] = _fecha(valores[campo])
+            if fechas[campo] is None:
+                errores.append(f"{campo} inválida '{valores[campo]}' (use AAAA-MM-DD HH:MM:SS)")
+    fecha_creacion = fechas['fecha_creacion'] or ahora
+
+    if errores:
+        return None, errores
+    # fecha_actualizacion es la de la importación aunque fecha_creacion sea
+    # antigua: con la creación quedaría por debajo de la marca de los clientes
+    # de /usuarios/tickets/cambios y nunca les llegaría
+    return (
+        prioridad, tipo, valores['titulo'], valores['descripcion'], valores['ubicacion'],
+        id_categoria, solicitante[0], estado, fecha_creacion, ahora,
+        id_grupo, tecnico[0] if tecnico else None, fechas['fecha_cierre']
+    ), []
+
+
+def _insertar_lote(conn, cursor, lote):
+    """Inserta un lote de tickets válidos en una transacción y devuelve sus ids."""
+    # Un INSERT por fila: el id de cada ticket es su lastrowid. Los ids de un
+    # INSERT de varias filas no son consecutivos con innodb_autoinc_lock_mode 2
+    # (el valor por defecto de MySQL 8) ni con auto_increment_increment > 1
+    # (Galera). El costo está en las idas y vueltas; el commit sigue siendo uno
+    # por lote.
+    ids = []
+    for valores in lote:
+        cursor.execute(
+            """
+            INSERT INTO tickets (
+                prioridad, tipo, titulo, descripcion, ubicacion,
+                id_categoria1, id_usuario_reporta, estado_ticket,
+                fecha_creacion, fecha_actualizacion,
+                id_grupo1, id_tecnico_asignado, contador_reaperturas, fecha_cierre
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 0, %s)
+            """,
+            valores
+        )
+        ids.append(cursor.lastrowid)
+    cursor.executemany(
+        "INSERT INTO usuarios_tickets (id_usuario1, id_ticket3) VALUES (%s, %s)",
+        [(valores[6], id_ticket) for valores, id_ticket in zip(lote, ids)]
+    )
+    conn.commit()
+    return ids
+
+
+def importar(conn, cursor, filas, tamano_lote=None, solo_validar=False, al_confirmar=None):
+    """Valida e inserta las filas leídas con leer_filas. `al_confirmar(ids)` se
+    llama tras el commit de cada lote. Un lote que falla se revierte completo y
+    sus filas se informan con el error; los siguientes lotes continúan."""
+    inicio = time.perf_counter()
+    tamano_lote = tamano_lote or IMPORTACION_CONFIG['lote']
+    referencias = resolver_referencias(cursor, filas)
+    ahora = datetime.now().replace(microsecond=0)
+
+    resultados = []
+    pendientes = []  # (posición en resultados, valores)
+
+    def vaciar():
+        if not pendientes:
+            return
+        lote = [valores for _, valores in pendientes]
+        try:
+            ids = _insertar_lote(conn, cursor, lote)
+        except Exception as e:
+            print(f"Error al importar lote de tickets: {e}")
+            conn.rollback()
+            for posicion, _ in pendientes:
+                resultados[posicion].update(ok=False, errores=['Lote revertido por un error de la base de datos'])
+        else:
+            for (posicion, _), id_ticket in zip(pendientes, ids):
+                resultados[posicion].update(ok=True, id_ticket=id_ticket)
+            if al_confirmar:
+                al_confirmar(ids)
+        pendientes.clear()
+
+    for numero, datos, error in filas:
+        if datos is None:
+            resultados.append({'fila': numero, 'ok': False, 'errores': [error]})
+            continue
+        valores, errores = validar_fila(datos, referencias, ahora)
+        if errores:
+            resultados.append({'fila': numero, 'ok': False, 'errores': errores})
+            continue
+        resultados.append({'fila': numero, 'ok': True})
+        if not solo_validar:
+            pendientes.append((len(resultados) - 1, valores))
+            if len(pendientes) >= tamano_lote:
+                vaciar()
+    if not solo_validar:
+        vaciar()
+
+    segundos = time.perf_counter() - inicio
+    validas = sum(1 for r in resultados if r['ok'])
+    return {
+        'total': len(resultados),
+        'validas' if solo_validar else 'creados': validas,
+        'errores': len(resultados) - validas,
+        'duracion_ms': round(segundos * 1000, 2),
+        'filas_por_segundo': round(len(resultados) / segundos) if segundos else None,
+        'filas': resultados
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('archivo', help='archivo .csv, .ndjson o .jsonl')
+    parser.add_argument('--formato', choices=['csv', 'ndjson'], default=None,
+                        help='formato del archivo si la extensión no lo indica')
+    parser.add_argument('--lote', type=int, default=None,
+                        help='tickets por transacción')
+    parser.add_argument('--validar', action='store_true',
+                        help='solo validar las filas, sin insertar')
+    args = parser.parse_args()
+
+    formato = args.formato or detectar_formato(args.archivo)
+    try:
+        with open(args.archivo, encoding='utf-8-sig') as f:
+            filas = leer_filas(f.read(), formato)
+    except (OSError, ErrorFormato) as e:
+        print(f"No se pudo leer {args.archivo}: {e}")
+        return 1
+
+    conn = get_db_connection()
+    if conn is None:
+        return 1
+    cursor = conn.cursor()
+    try:
+        # Los listados de tickets servidos con el ETag anterior vuelven completos
+        informe = importar(conn, cursor, filas, args.lote, args.validar,
+                           al_confirmar=lambda ids: avanzar_version('tickets'))
+    finally:
+        cursor.close()
+        conn.close()
+
+    for resultado in informe['filas']:
+        if not resultado['ok']:
+            print(f"  fila {resultado['fila']}: {'; '.join(resultado['errores'])}")
+    print(f"{informe['total']} filas, "
+          + (f"{informe['validas']} válidas" if args.validar else f"{informe['creados']} tickets creados")
+          + f", {informe['errores']} con errores en {informe['duracion_ms']} ms")
+    return 1 if informe['errores'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
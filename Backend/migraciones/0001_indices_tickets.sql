@@ -0,0 +1,24 @@
+-- Índices compuestos para los listados y la línea de tiempo de tickets
+-- (consultas de routes/usuarios.py).
+
+-- GET /usuarios/tickets: estado_ticket != 'eliminado'
+-- ORDER BY fecha_creacion DESC, id_ticket DESC (+ keyset por cursor)
+ALTER TABLE `tickets`
+  ADD KEY `idx_tickets_fecha_creacion` (`fecha_creacion`, `id_ticket`);
+
+-- GET /usuarios/estado_tickets?estado=...: estado_ticket = %s ORDER BY fecha_creacion DESC
+ALTER TABLE `tickets`
+  ADD KEY `idx_tickets_estado_fecha` (`estado_ticket`, `fecha_creacion`, `id_ticket`);
+
+-- GET /usuarios/tickets/tecnico/<id>: id_tecnico_asignado = %s ORDER BY fecha_creacion DESC
+ALTER TABLE `tickets`
+  ADD KEY `idx_tickets_tecnico_fecha` (`id_tecnico_asignado`, `fecha_creacion`, `id_ticket`);
+
+-- Seguimientos/soluciones de un ticket:
+-- id_ticket2 = %s AND campo_modificado IN ('seguimiento','solucion') ORDER BY fecha_modificacion
+ALTER TABLE `historial_tickets`
+  ADD KEY `idx_historial_ticket_campo_fecha` (`id_ticket2`, `campo_modificado`, `fecha_modificacion`);
+
+-- Historial completo de un ticket: id_ticket2 = %s ORDER BY fecha_modificacion
+ALTER TABLE `historial_tickets`
+  ADD KEY `idx_historial_ticket_fecha` (`id_ticket2`, `fecha_modificacion`);
@@ -0,0 +1,4 @@
+-- MAX(fecha_actualizacion) para los ETag de los listados y consultas de
+-- tickets modificados desde una fecha.
+ALTER TABLE `tickets`
+  ADD KEY `idx_tickets_fecha_actualizacion` (`fecha_actualizacion`, `id_ticket`);
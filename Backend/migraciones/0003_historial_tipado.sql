@@ -0,0 +1,27 @@
+-- Columnas tipadas para seguimientos, soluciones y encuestas, que antes
+-- solo se guardaban como JSON dentro de historial_tickets.valor_nuevo.
+-- Las filas existentes se completan en 0004 (completar_historial.py).
+
+-- Texto del seguimiento/solución o comentario de la encuesta
+ALTER TABLE `historial_tickets`
+  ADD COLUMN `descripcion` text DEFAULT NULL COMMENT 'Descripción del seguimiento/solución o comentario de la encuesta';
+
+-- Calificación de la encuesta de satisfacción (1-5)
+ALTER TABLE `historial_tickets`
+  ADD COLUMN `calificacion` tinyint(4) DEFAULT NULL COMMENT 'Calificación de la encuesta (1-5)';
+
+-- Reportes de encuestas: campo_modificado = 'encuesta' agrupando/filtrando por calificación
+ALTER TABLE `historial_tickets`
+  ADD KEY `idx_historial_campo_calificacion` (`campo_modificado`, `calificacion`);
+
+-- Archivos adjuntos a un seguimiento o solución, una fila por archivo
+CREATE TABLE `historial_adjuntos` (
+  `id_historial_adjunto` int(11) NOT NULL AUTO_INCREMENT,
+  `id_historial` int(11) NOT NULL,
+  `nombre_archivo` varchar(255) NOT NULL,
+  PRIMARY KEY (`id_historial_adjunto`),
+  KEY `idx_historial_adjuntos_historial` (`id_historial`),
+  KEY `idx_historial_adjuntos_nombre` (`nombre_archivo`),
+  CONSTRAINT `historial_adjuntos_ibfk_1` FOREIGN KEY (`id_historial`)
+    REFERENCES `historial_tickets` (`id_historial`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
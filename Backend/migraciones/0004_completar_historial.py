@@ -0,0 +1,6 @@
+"""Completa las columnas tipadas de 0003 en el historial existente."""
+from completar_historial import completar
+
+
+def aplicar(conn, cursor):
+    completar(conn, cursor)
@@ -0,0 +1,25 @@
+-- Archivo del historial de tickets cerrados (ver archivo_historial.py).
+-- historial_tickets tiene claves foráneas, que MySQL no admite en tablas
+-- particionadas; por eso el historial frío se mueve a una tabla aparte con
+-- las mismas columnas en lugar de particionar por mes.
+CREATE TABLE `historial_tickets_archivo` (
+  `id_historial` int(11) NOT NULL,
+  `id_ticket2` int(11) NOT NULL,
+  `campo_modificado` varchar(50) NOT NULL,
+  `valor_anterior` text DEFAULT NULL,
+  `valor_nuevo` text DEFAULT NULL,
+  `fecha_modificacion` timestamp NOT NULL DEFAULT current_timestamp(),
+  `modificado_por` int(11) DEFAULT NULL,
+  `nombre_modificador` varchar(100) DEFAULT NULL,
+  `rol_modificador` varchar(100) DEFAULT NULL,
+  `comentario_reapertura` text DEFAULT NULL,
+  `descripcion` text DEFAULT NULL,
+  `calificacion` tinyint(4) DEFAULT NULL,
+  `fecha_archivo` timestamp NOT NULL DEFAULT current_timestamp() COMMENT 'Momento en que se archivó la fila',
+  PRIMARY KEY (`id_historial`),
+  KEY `idx_historial_archivo_ticket_fecha` (`id_ticket2`, `fecha_modificacion`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- Búsqueda de tickets cerrados hace más de N días para el archivador
+ALTER TABLE `tickets`
+  ADD KEY `idx_tickets_estado_cierre` (`estado_ticket`, `fecha_cierre`);
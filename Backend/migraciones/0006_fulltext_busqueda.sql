@@ -0,0 +1,10 @@
+-- Índices FULLTEXT para GET /usuarios/buscar (MATCH ... AGAINST con
+-- relevancia en lugar de LIKE '%q%', que no puede usar índices).
+
+-- Tickets: MATCH(t.titulo, t.descripcion)
+ALTER TABLE `tickets`
+  ADD FULLTEXT KEY `ft_tickets_titulo_descripcion` (`titulo`, `descripcion`);
+
+-- Usuarios: MATCH(u.nombre_completo, u.nombre_usuario, u.correo)
+ALTER TABLE `usuarios`
+  ADD FULLTEXT KEY `ft_usuarios_nombre_correo` (`nombre_completo`, `nombre_usuario`, `correo`);
@@ -0,0 +1,10 @@
+-- Directorio de usuarios (GET /usuarios/obtener con filtros y cursor) y
+-- sugerencias por prefijo (GET /usuarios/sugerencias).
+
+-- Filtro por rol/estado recorriendo en orden de id_usuario (cursor)
+ALTER TABLE `usuarios`
+  ADD KEY `idx_usuarios_rol_estado` (`rol`, `estado`, `id_usuario`);
+
+-- nombre_completo LIKE 'abc%'; nombre_usuario ya tiene su índice UNIQUE
+ALTER TABLE `usuarios`
+  ADD KEY `idx_usuarios_nombre_completo` (`nombre_completo`);
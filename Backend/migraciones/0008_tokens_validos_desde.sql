@@ -0,0 +1,10 @@
+-- Revocación de tokens de sesión (ver sesiones.py): los tokens emitidos antes
+-- de tokens_validos_desde se rechazan. Solo lo actualizan los cambios de
+-- contraseña, rol o estado; fecha_actualizacion cambia con cualquier edición
+-- del perfil y no sirve para esto.
+ALTER TABLE `usuarios`
+  ADD COLUMN `tokens_validos_desde` DATETIME NULL DEFAULT NULL;
+
+-- La lista de revocación lee los valores de la última vigencia de un token
+ALTER TABLE `usuarios`
+  ADD KEY `idx_usuarios_tokens_validos` (`tokens_validos_desde`);
@@ -0,0 +1,10 @@
+-- Contadores de versión para el ETag de los listados de tickets (ver
+-- versiones.py): leer uno es una búsqueda por clave primaria en lugar de los
+-- COUNT/MAX/CRC32 sobre tickets, historial, usuarios y catálogos.
+CREATE TABLE `versiones_datos` (
+  `nombre` VARCHAR(50) NOT NULL,
+  `version` BIGINT UNSIGNED NOT NULL DEFAULT 0,
+  PRIMARY KEY (`nombre`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+INSERT IGNORE INTO `versiones_datos` (`nombre`, `version`) VALUES ('tickets', 0);
@@ -0,0 +1,133 @@
+"""Aplica las migraciones de esquema de la carpeta migraciones/.
+
+Uso:
+    python migrar.py            # aplica las migraciones pendientes
+    python migrar.py --estado   # muestra aplicadas y pendientes
+
+Cada migración es un archivo NNNN_descripcion.sql o, para migraciones de
+datos, NNNN_descripcion.py con una función aplicar(conn, cursor). Las
+versiones aplicadas se registran en la tabla migraciones_aplicadas y las
+sentencias que ya estén aplicadas (índice o columna duplicada, tabla
+existente...) se ignoran, así que volver a ejecutar el script es seguro.
+"""
+import argparse
+import importlib.util
+import os
+import re
+import sys
+
+from mysql.connector import Error
+from database import get_db_connection
+
+CARPETA_MIGRACIONES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migraciones')
+
+# Errores que indican que la sentencia ya estaba aplicada
+ERRORES_YA_APLICADO = {
+    1050,  # ER_TABLE_EXISTS_ERROR
+    1060,  # ER_DUP_FIELDNAME
+    1061,  # ER_DUP_KEYNAME
+    1091,  # ER_CANT_DROP_FIELD_OR_KEY
+    1826,  # ER_FK_DUP_NAME
+}
+
+
+def listar_migraciones():
+    migraciones = []
+    for nombre in sorted(os.listdir(CARPETA_MIGRACIONES)):
+        m = re.match(r'^(\d{4})_(.+)\.(sql|py)$', nombre)
+        if m:
+            migraciones.append((m.group(1), nombre))
+    return migraciones
+
+
+def leer_sentencias(ruta):
+    """Separa el archivo en sentencias terminadas en ';' ignorando comentarios."""
+    with open(ruta, encoding='utf-8') as f:
+        lineas = [l for l in f if not l.strip().startswith('--')]
+    return [s.strip() for s in ''.join(lineas).split(';') if s.strip()]
+
+
+def asegurar_tabla_control(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS migraciones_aplicadas (
+            version VARCHAR(10) NOT NULL PRIMARY KEY,
+            nombre VARCHAR(255) NOT NULL,
+            fecha_aplicacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def versiones_aplicadas(cursor):
+    cursor.execute("SELECT version FROM migraciones_aplicadas")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def ejecutar_script(conn, cursor, ruta):
+    """Carga una migración .py y ejecuta su función aplicar(conn, cursor)."""
+    spec = importlib.util.spec_from_file_location(
+        'migracion_' + os.path.splitext(os.path.basename(ruta))[0], ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    modulo.aplicar(conn, cursor)
+
+
+def aplicar_migracion(conn, cursor, version, nombre):
+    ruta = os.path.join(CARPETA_MIGRACIONES, nombre)
+    if nombre.endswith('.py'):
+        ejecutar_script(conn, cursor, ruta)
+        sentencias = []
+    else:
+        sentencias = leer_sentencias(ruta)
+    for sentencia in sentencias:
+        try:
+            cursor.execute(sentencia)
+        except Error as e:
+            if e.errno in ERRORES_YA_APLICADO:
+                print(f"   - ya aplicado, se omite: {e.msg}")
+                continue
+            raise
+    cursor.execute(
+        "INSERT INTO migraciones_aplicadas (version, nombre) VALUES (%s, %s)",
+        (version, nombre)
+    )
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--estado', action='store_true',
+                        help='solo mostrar el estado de las migraciones')
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    if conn is None:
+        return 1
+    cursor = conn.cursor()
+    try:
+        asegurar_tabla_control(cursor)
+        aplicadas = versiones_aplicadas(cursor)
+        pendientes = [(v, n) for v, n in listar_migraciones() if v not in aplicadas]
+
+        if args.estado:
+            for version, nombre in listar_migraciones():
+                marca = 'aplicada ' if version in aplicadas else 'pendiente'
+                print(f"[{marca}] {nombre}")
+            return 0
+
+        if not pendientes:
+            print("No hay migraciones pendientes")
+        for version, nombre in pendientes:
+            print(f"Aplicando {nombre}...")
+            aplicar_migracion(conn, cursor, version, nombre)
+        return 0
+    except Error as e:
+        print(f"Error al aplicar migraciones: {e}")
+        conn.rollback()
+        return 1
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
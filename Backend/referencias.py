@@ -0,0 +1,282 @@
+"""Datos de referencia en memoria: categorías, grupos, entidades y usuarios.
+
+Dos cachés con la misma política de invalidación:
+
+- CacheReferencias (nombre -> id). Las rutas de tickets reciben la
+  categoría, el grupo y el técnico por nombre (y el autor de cada
+  seguimiento por nombre completo); estas tablas se cargan completas al
+  iniciar y se consultan en memoria. Un nombre que no está en memoria se
+  busca en la base antes de darlo por inexistente.
+- CatalogoReferencias (filas completas). Sirve los listados de categorías,
+  grupos, entidades y técnicos que cargan los formularios, con su JSON ya
+  armado, un contador de versión y un ETag fuerte derivado del contenido.
+
+Las rutas que crean, modifican o eliminan estas tablas llaman a
+invalidar_referencias(tabla) después del commit (las de catálogos, a través
+de notificar_cambio_catalogo) y la siguiente lectura la vuelve a cargar. Los cambios hechos por otro proceso se ven al vencer
+REFERENCIAS_CONFIG['ttl'].
+"""
+import hashlib
+import threading
+import time
+
+from flask import Response, current_app
+
+from busqueda import indice_busqueda, normalizar
+from cache import cache_busqueda
+from cache_http import marcar_version, no_modificado
+from config.config import REFERENCIAS_CONFIG
+from database import get_db_connection
+from versiones import avanzar_version
+
+# tabla -> (consulta de carga, consulta de un nombre)
+CONSULTAS = {
+    'categorias': (
+        "SELECT nombre_categoria, id_categoria FROM categorias ORDER BY id_categoria",
+        "SELECT nombre_categoria, id_categoria FROM categorias WHERE nombre_categoria = %s "
+        "ORDER BY id_categoria LIMIT 1",
+    ),
+    'grupos': (
+        "SELECT nombre_grupo, id_grupo FROM grupos ORDER BY id_grupo",
+        "SELECT nombre_grupo, id_grupo FROM grupos WHERE nombre_grupo = %s "
+        "ORDER BY id_grupo LIMIT 1",
+    ),
+    'usuarios': (
+        "SELECT nombre_completo, id_usuario, rol FROM usuarios ORDER BY id_usuario",
+        "SELECT nombre_completo, id_usuario, rol FROM usuarios WHERE nombre_completo = %s "
+        "ORDER BY id_usuario LIMIT 1",
+    ),
+}
+
+
+class CacheReferencias:
+
+    def __init__(self, ttl=300):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._tablas = {tabla: {} for tabla in CONSULTAS}
+        self._vence = {tabla: 0 for tabla in CONSULTAS}
+        self._generacion = {tabla: 0 for tabla in CONSULTAS}
+        self._aciertos = 0
+        self._consultas_base = 0
+
+    def _cargar(self, tabla):
+        with self._lock:
+            generacion = self._generacion[tabla]
+        conn = get_db_connection()
+        if conn is None:
+            return
+        cursor = conn.cursor()
+        try:
+            cursor.execute(CONSULTAS[tabla][0])
+            nombres = {}
+            # Con nombres repetidos gana el id más bajo, como en la consulta puntual
+            for fila in cursor.fetchall():
+                nombres.setdefault(normalizar(fila[0]), fila[1:] if len(fila) > 2 else fila[1])
+        finally:
+            cursor.close()
+            conn.close()
+        with self._lock:
+            # Si se invalidó mientras se cargaba, la carga ya nació vieja
+            if generacion == self._generacion[tabla]:
+                self._tablas[tabla] = nombres
+                self._vence[tabla] = time.monotonic() + self._ttl
+
+    def _buscar(self, tabla, nombre):
+        if not nombre:
+            return None
+        if self._vence[tabla] < time.monotonic():
+            self._cargar(tabla)
+        clave = normalizar(nombre)
+        valor = self._tablas[tabla].get(clave)
+        if valor is not None:
+            self._aciertos += 1
+            return valor
+        # Puede ser un registro creado por otro proceso después de la carga
+        self._consultas_base += 1
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(CONSULTAS[tabla][1], (str(nombre),))
+            fila = cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+        if fila is None:
+            return None
+        valor = fila[1:] if len(fila) > 2 else fila[1]
+        with self._lock:
+            self._tablas[tabla][clave] = valor
+        return valor
+
+    def id_categoria(self, nombre):
+        return self._buscar('categorias', nombre)
+
+    def id_grupo(self, nombre):
+        return self._buscar('grupos', nombre)
+
+    def usuario(self, nombre_completo):
+        """(id_usuario, rol) del usuario con ese nombre completo, o None."""
+        valor = self._buscar('usuarios', nombre_completo)
+        return tuple(valor) if valor is not None else None
+
+    def invalidar(self, tabla):
+        """Descarta una tabla; se vuelve a cargar en la siguiente búsqueda.
+        Se llama después del commit de la ruta que la modificó."""
+        with self._lock:
+            self._generacion[tabla] += 1
+            self._tablas[tabla] = {}
+            self._vence[tabla] = 0
+
+    def precargar(self):
+        """Carga las tres tablas. Un fallo aquí solo retrasa la carga a la
+        primera búsqueda."""
+        for tabla in CONSULTAS:
+            try:
+                self._cargar(tabla)
+            except Exception as e:
+                print(f"Error al precargar referencias de {tabla}: {e}")
+
+    def estadisticas(self):
+        return {
+            "ttl": self._ttl,
+            "entradas": {tabla: len(nombres) for tabla, nombres in self._tablas.items()},
+            "aciertos": self._aciertos,
+            "consultas_base": self._consultas_base
+        }
+
+
+class CatalogoReferencias:
+    """Tablas de referencia completas, con el JSON de la respuesta armado una
+    sola vez por versión."""
+
+    # catálogo -> (consulta, tabla de la que sale)
+    TABLAS = {
+        'categorias': ("SELECT * FROM categorias ORDER BY id_categoria", 'categorias'),
+        'grupos': ("SELECT * FROM grupos ORDER BY id_grupo", 'grupos'),
+        'entidades': ("SELECT * FROM entidades ORDER BY id_entidad", 'entidades'),
+        'tecnicos': (
+            """
+            SELECT id_usuario, nombre_completo, nombre_usuario, correo, rol
+            FROM usuarios
+            WHERE rol IN ('tecnico', 'administrador') AND estado = 'activo'
+            ORDER BY nombre_completo, id_usuario
+            """,
+            'usuarios'
+        ),
+    }
+
+    def __init__(self, ttl=300, cache_control='no-cache'):
+        self._ttl = ttl
+        self.cache_control = cache_control
+        self._lock = threading.Lock()
+        # tabla -> {'filas', 'version', 'vence', 'cuerpo', 'etag'}
+        self._tablas = {}
+        self._versiones = {tabla: 0 for tabla in self.TABLAS}
+        self._etags = {}
+        self._generacion = {tabla: 0 for tabla in self.TABLAS}
+        self._cargas = 0
+        self._lecturas = 0
+
+    def _cargar(self, tabla):
+        with self._lock:
+            generacion = self._generacion[tabla]
+        conn = get_db_connection()
+        if conn is None:
+            raise RuntimeError("sin conexión a la base de datos")
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(self.TABLAS[tabla][0])
+            filas = cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+        cuerpo = current_app.json.dumps(filas)
+        etag = hashlib.sha1(cuerpo.encode('utf-8')).hexdigest()
+        with self._lock:
+            self._cargas += 1
+            # La versión solo avanza si el contenido cambió
+            if self._etags.get(tabla) != etag:
+                self._versiones[tabla] += 1
+                self._etags[tabla] = etag
+            entrada = {
+                'filas': filas,
+                'version': self._versiones[tabla],
+                'vence': time.monotonic() + self._ttl,
+                'cuerpo': cuerpo,
+                'etag': etag,
+            }
+            # Si se invalidó mientras se cargaba, se sirve pero no se guarda
+            if generacion == self._generacion[tabla]:
+                self._tablas[tabla] = entrada
+        return entrada
+
+    def obtener(self, tabla):
+        """Entrada vigente de `tabla` (filas, version, cuerpo, etag); la carga si
+        no está o venció. Requiere contexto de aplicación."""
+        with self._lock:
+            self._lecturas += 1
+            entrada = self._tablas.get(tabla)
+        if entrada is None or entrada['vence'] < time.monotonic():
+            entrada = self._cargar(tabla)
+        return entrada
+
+    def respuesta(self, tabla):
+        """Respuesta JSON de `tabla` con ETag fuerte y Cache-Control; 304 si el
+        cliente ya tiene esa versión."""
+        entrada = self.obtener(tabla)
+        return (no_modificado(entrada['etag'])
+                or marcar_version(Response(entrada['cuerpo'], mimetype='application/json'),
+                                  entrada['etag'], cache_control=self.cache_control))
+
+    def invalidar(self, tabla):
+        with self._lock:
+            self._generacion[tabla] += 1
+            self._tablas.pop(tabla, None)
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "ttl": self._ttl,
+                "versiones": dict(self._versiones),
+                "cargadas": sorted(self._tablas),
+                "cargas": self._cargas,
+                "lecturas": self._lecturas
+            }
+
+
+referencias = CacheReferencias(ttl=REFERENCIAS_CONFIG['ttl'])
+catalogos = CatalogoReferencias(**REFERENCIAS_CONFIG)
+
+
+def invalidar_referencias(tabla):
+    """Descarta `tabla` de las dos cachés. Se llama después del commit."""
+    if tabla in CONSULTAS:
+        referencias.invalidar(tabla)
+    for catalogo, (_, origen) in CatalogoReferencias.TABLAS.items():
+        if origen == tabla:
+            catalogos.invalidar(catalogo)
+
+
+def notificar_cambio_catalogo(tabla):
+    """Después del commit de una ruta que crea, modifica o elimina categorías,
+    grupos o entidades: recarga el catálogo en el índice de búsqueda (las
+    entidades no se indexan), descarta sus resultados de búsqueda guardados y
+    las referencias de `tabla`."""
+    if tabla in ('categorias', 'grupos'):
+        # Los listados de tickets muestran sus nombres
+        avanzar_version('tickets')
+        indice_busqueda.recargar_catalogos()
+        # Después de recargar, para no volver a guardar una respuesta vieja;
+        # solo se invalidan los resultados de ese catálogo
+        cache_busqueda.avanzar(tabla)
+    invalidar_referencias(tabla)
+
+
+def iniciar_referencias():
+    """Precarga las referencias por nombre en un hilo de fondo al iniciar la
+    app. Los catálogos se cargan con la primera solicitud, que tiene el
+    contexto de la app para armar el JSON."""
+    hilo = threading.Thread(target=referencias.precargar, name='referencias', daemon=True)
+    hilo.start()
+    return hilo
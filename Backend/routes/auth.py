@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
+from config.config import SESION_CONFIG
 from database import get_db_connection
+from sesiones import ErrorSesion, emitir_token, token_solicitud, verificar_token
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -16,37 +18,35 @@ def Login():
     cursor = conn.cursor()
 
     try:
-        # Primero verificar el estado del usuario
+        # Estado y credenciales en una sola consulta; se conserva el orden de
+        # las respuestas: usuario inexistente (401), inactivo (403), contraseña (401)
         cursor.execute(
-            "SELECT estado FROM usuarios WHERE nombre_usuario = %s",
-            (user,)
+            """
+            SELECT id_usuario, nombre_completo, nombre_usuario, rol, estado,
+                   contraseña = %s AS valida
+            FROM usuarios WHERE nombre_usuario = %s
+            """,
+            (password, user)
         )
-        estado_result = cursor.fetchone()
-        
-        if not estado_result:
+        usuario = cursor.fetchone()
+
+        if not usuario:
             return jsonify({"error": "Credenciales inválidas"}), 401
-        
-        estado = estado_result[0]
-        if estado != 'activo':
+
+        if usuario[4] != 'activo':
             return jsonify({
                 "error": "Usuario inactivo. Contacte al administrador."
             }), 403
 
-        # Si está activo, verificar credenciales
-        cursor.execute(
-            "SELECT id_usuario, nombre_completo, nombre_usuario, rol FROM usuarios WHERE nombre_usuario = %s AND contraseña = %s",
-            (user, password)
-        )
-
-        usuario = cursor.fetchone()
-
-        if usuario:
+        if usuario[5]:
             return jsonify({
                 "mensaje": "Inicio de sesión exitoso",
                 "id_usuario": usuario[0],
                 "nombre": usuario[1],
                 "usuario": usuario[2],
-                "rol": usuario[3]
+                "rol": usuario[3],
+                "token": emitir_token(usuario[0], usuario[1], usuario[3]),
+                "expira_en": SESION_CONFIG['duracion']
             }), 200
 
         return jsonify({"error": "Credenciales inválidas"}), 401
@@ -57,3 +57,23 @@ def Login():
     finally:
         cursor.close()
         conn.close()
+
+
+@auth_bp.route("/sesion", methods=["GET"])
+def sesion():
+    """Valida el token de la cabecera Authorization sin consultar la base
+    (salvo la recarga periódica de la lista de revocación). Reemplaza el
+    sondeo de /usuarios/verificar-estado para saber si la sesión sigue activa."""
+    token = token_solicitud()
+    if token is None:
+        return jsonify({"error": "Falta el token de sesión"}), 401
+    try:
+        datos = verificar_token(token)
+    except ErrorSesion as e:
+        return jsonify({"error": str(e)}), 401
+    return jsonify({
+        "id_usuario": datos['id'],
+        "nombre": datos['nombre'],
+        "rol": datos['rol'],
+        "expira": datos['expira']
+    }), 200
@@ -1,18 +1,13 @@
 from flask import Blueprint, request, jsonify
 from database import get_db_connection
+from referencias import catalogos, notificar_cambio_catalogo
 
 categorias_bp = Blueprint('categorias', __name__)
 
 @categorias_bp.route('/obtener', methods=['GET'])
 def obtener_categorias():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM categorias")
-        categorias = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return jsonify(categorias)
+        return catalogos.respuesta('categorias')
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -33,6 +28,7 @@ def crear_categoria():
             (nombre, descripcion)
         )
         conn.commit()
+        notificar_cambio_catalogo('categorias')
         cursor.close()
         conn.close()
         return jsonify({'success': True, 'message': 'Categoría creada exitosamente'})
@@ -56,6 +52,7 @@ def actualizar_categoria(id):
             (nombre, descripcion, id)
         )
         conn.commit()
+        notificar_cambio_catalogo('categorias')
         cursor.close()
         conn.close()
         return jsonify({'success': True, 'message': 'Categoría actualizada exitosamente'})
@@ -77,6 +74,7 @@ def eliminar_categoria(id):
             
         cursor.execute("DELETE FROM categorias WHERE id_categoria = %s", (id,))
         conn.commit()
+        notificar_cambio_catalogo('categorias')
         cursor.close()
         conn.close()
         return jsonify({'success': True, 'message': 'Categoría eliminada exitosamente'})
@@ -1,21 +1,15 @@
 from flask import Blueprint, request, jsonify
 from database import get_db_connection
+from referencias import catalogos, notificar_cambio_catalogo
 
 entidades_bp = Blueprint('entidades', __name__)
 
 @entidades_bp.route('/obtener', methods=['GET'])
 def obtener_entidades():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM entidades")
-        entidades = cursor.fetchall()
-        return jsonify(entidades)
+        return catalogos.respuesta('entidades')
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 @entidades_bp.route('/creacion', methods=['POST'])
 def crear_entidad():
@@ -28,6 +22,7 @@ def crear_entidad():
             (data['nombre_entidad'], data['descripcion'])
         )
         conn.commit()
+        notificar_cambio_catalogo('entidades')
         return jsonify({'success': True, 'message': 'Entidad creada correctamente'})
     except Exception as e:
         conn.rollback()
@@ -47,6 +42,7 @@ def actualizar_entidad(id_entidad):
             (data['nombre_entidad'], data['descripcion'], id_entidad)
         )
         conn.commit()
+        notificar_cambio_catalogo('entidades')
         return jsonify({'success': True, 'message': 'Entidad actualizada correctamente'})
     except Exception as e:
         conn.rollback()
@@ -70,6 +66,7 @@ def eliminar_entidad(id_entidad):
         
         cursor.execute("DELETE FROM entidades WHERE id_entidad = %s", (id_entidad,))
         conn.commit()
+        notificar_cambio_catalogo('entidades')
         return jsonify({'success': True, 'message': 'Entidad eliminada correctamente'})
     except Exception as e:
         conn.rollback()
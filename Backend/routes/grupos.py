@@ -1,18 +1,13 @@
 from flask import Blueprint, request, jsonify
 from database import get_db_connection
+from referencias import catalogos, notificar_cambio_catalogo
 
 grupos_bp = Blueprint('grupos', __name__)
 
 @grupos_bp.route('/obtener', methods=['GET'])
 def obtener_grupos():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM grupos")
-        grupos = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return jsonify(grupos)
+        return catalogos.respuesta('grupos')
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -33,6 +28,7 @@ def crear_grupo():
             (nombre_grupo, descripcion)
         )
         conn.commit()
+        notificar_cambio_catalogo('grupos')
         cursor.close()
         conn.close()
         return jsonify({'success': True, 'message': 'Grupo creado correctamente'})
@@ -56,6 +52,7 @@ def actualizar_grupo(id_grupo):
             (nombre_grupo, descripcion, id_grupo)
         )
         conn.commit()
+        notificar_cambio_catalogo('grupos')
         cursor.close()
         conn.close()
         return jsonify({'success': True, 'message': 'Grupo actualizado correctamente'})
@@ -82,6 +79,7 @@ def eliminar_grupo(id_grupo):
         
         cursor.execute("DELETE FROM grupos WHERE id_grupo = %s", (id_grupo,))
         conn.commit()
+        notificar_cambio_catalogo('grupos')
         cursor.close()
         conn.close()
         return jsonify({'success': True, 'message': 'Grupo eliminado correctamente'})
@@ -1,7 +1,25 @@
 from flask import Blueprint, jsonify
+from database import estadisticas_pool
+from cache import cache_tickets, cache_busqueda
+from busqueda import indice_busqueda
+from referencias import referencias, catalogos
+from sesiones import revocaciones
 
 panel_bp = Blueprint("dashboard", __name__)
 
 @panel_bp.route("/", methods=["GET"])
 def dashboard():
     return jsonify({"mensaje": "Bienvenido al Dashboard"}), 200
+
+@panel_bp.route("/metricas", methods=["GET"])
+def metricas():
+    """Estado del pool de conexiones, las cachés y el índice de búsqueda para monitoreo."""
+    return jsonify({
+        "pool": estadisticas_pool(),
+        "cache_tickets": cache_tickets.estadisticas(),
+        "cache_busqueda": cache_busqueda.estadisticas(),
+        "indice_busqueda": indice_busqueda.estadisticas(),
+        "referencias": referencias.estadisticas(),
+        "catalogos": catalogos.estadisticas(),
+        "sesiones": revocaciones.estadisticas()
+    }), 200
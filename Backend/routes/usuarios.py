@@ -1,11 +1,25 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, current_app, stream_with_context
 from database import get_db_connection
+from cache_http import calcular_etag, marcar_version, no_modificado
+from eventos import CanalLleno, canal_tickets
+from cache import cache_tickets, cache_busqueda
+from busqueda import indice_busqueda, normalizar
+from referencias import referencias, catalogos, invalidar_referencias
+from config.config import LOTES_CONFIG, BUSQUEDA_CONFIG, IMPORTACION_CONFIG
+from sesiones import identidad_solicitud, revocaciones, sesion_requerida
+from importacion import ErrorFormato, detectar_formato, leer_filas, importar
+from versiones import avanzar_version, leer_version
+from dominio import ESTADOS, PRIORIDADES
 import os
 import uuid
 from werkzeug.utils import secure_filename
 from datetime import datetime
+import base64
 import json
+import re
+import threading
 from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturoTimeout
 
 usuarios_bp = Blueprint("usuarios", __name__)
 
@@ -15,11 +29,406 @@ ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png',
                       'jpg', 'jpeg', 'xlsx', 'doc', 'docx'}
 
 
+# Paginación keyset de listados de tickets
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S'
+LIMITE_PAGINA_DEFECTO = 50
+LIMITE_PAGINA_MAXIMO = 500
+
+# Filas leídas por lote en las respuestas en streaming
+TAMANO_LOTE_STREAMING = 500
+
+# Grupos de la búsqueda global y los ámbitos de datos de los que depende cada
+# uno en cache_busqueda (los tickets muestran nombres de usuarios)
+AMBITOS_BUSQUEDA = {
+    'tickets': ('tickets', 'usuarios'),
+    'usuarios': ('usuarios',),
+    'categorias': ('categorias',),
+    'grupos': ('grupos',),
+}
+# Búsqueda global: términos más cortos que innodb_ft_min_token_size no están
+# en el índice FULLTEXT; si no queda ninguno se busca con LIKE
+LONGITUD_MINIMA_FULLTEXT = 3
+MODOS_BUSQUEDA = {'booleano': 'BOOLEAN', 'natural': 'NATURAL LANGUAGE'}
+_ejecutor_busqueda = ThreadPoolExecutor(max_workers=BUSQUEDA_CONFIG['hilos'],
+                                        thread_name_prefix='busqueda')
+# Búsquedas en base en curso; una vez lleno se responde 503 en lugar de
+# encolar subconsultas que ocupan conexiones del pool
+_cupos_busqueda = threading.BoundedSemaphore(BUSQUEDA_CONFIG['max_simultaneas'])
+
+# Segundos que se restan a la marca de /tickets/cambios para no perder cambios
+# de transacciones que confirmaron después de leer NOW()
+MARGEN_SINCRONIZACION_SEGUNDOS = 5
+
+
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def _codificar_cursor(fecha_creacion, id_ticket):
+    crudo = json.dumps([fecha_creacion.strftime(FORMATO_FECHA), id_ticket])
+    return base64.urlsafe_b64encode(crudo.encode()).decode()
+
+
+def _decodificar_cursor(valor):
+    try:
+        fecha, id_ticket = json.loads(base64.urlsafe_b64decode(valor.encode()))
+        return datetime.strptime(fecha, FORMATO_FECHA), int(id_ticket)
+    except Exception:
+        raise ValueError("cursor inválido")
+
+
+def _codificar_cursor_id(id_registro):
+    return base64.urlsafe_b64encode(json.dumps([id_registro]).encode()).decode()
+
+
+def _decodificar_cursor_id(valor):
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(valor.encode()))[0])
+    except Exception:
+        raise ValueError("cursor inválido")
+
+
+def _parametros_paginacion(decodificar=_decodificar_cursor):
+    """Lee limit/cursor/incluir_total de la query string. Devuelve None si la
+    solicitud no pide paginación (clientes antiguos reciben la lista completa)."""
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+    if limit is None and cursor is None:
+        return None
+    try:
+        limit = int(limit) if limit else LIMITE_PAGINA_DEFECTO
+    except ValueError:
+        raise ValueError("limit debe ser numérico")
+    return {
+        'limit': max(1, min(limit, LIMITE_PAGINA_MAXIMO)),
+        'posicion': decodificar(cursor) if cursor else None,
+        'incluir_total': request.args.get('incluir_total', '1') != '0'
+    }
+
+
+# Campos seleccionables en los listados de tickets (?fields=):
+# nombre en la respuesta -> (expresión SQL, joins que necesita)
+CAMPOS_TICKETS = {
+    'id': ('t.id_ticket', ()),
+    'titulo': ('t.titulo', ()),
+    'descripcion': ('t.descripcion', ()),
+    'prioridad': ('t.prioridad', ()),
+    'estado': ('t.estado_ticket', ()),
+    'tipo': ('t.tipo', ()),
+    'ubicacion': ('t.ubicacion', ()),
+    'fecha_creacion': ('t.fecha_creacion', ()),
+    'ultimaActualizacion': ('t.fecha_actualizacion', ()),
+    'categoria': ('c.nombre_categoria', ('c',)),
+    'solicitante': ('u.nombre_completo', ('ut', 'u')),
+    'solicitanteId': ('ut.id_usuario1', ('ut',)),
+    'tecnicoId': ('t.id_tecnico_asignado', ()),
+    'tecnico': ('tec.nombre_completo', ('tec',)),
+    'grupo': ('g.nombre_grupo', ('g',)),
+}
+
+# En orden: 'u' depende de 'ut'
+JOINS_TICKETS = {
+    'c': "LEFT JOIN categorias c ON t.id_categoria1 = c.id_categoria",
+    'ut': "LEFT JOIN usuarios_tickets ut ON t.id_ticket = ut.id_ticket3",
+    'u': "LEFT JOIN usuarios u ON ut.id_usuario1 = u.id_usuario",
+    'tec': "LEFT JOIN usuarios tec ON t.id_tecnico_asignado = tec.id_usuario",
+    'g': "LEFT JOIN grupos g ON t.id_grupo1 = g.id_grupo",
+}
+
+# Perfiles con nombre para ?fields=. 'lista' es lo que muestran las vistas de listado.
+PERFILES_CAMPOS_TICKETS = {
+    'lista': ['id', 'titulo', 'estado', 'prioridad', 'fecha_creacion',
+              'ultimaActualizacion', 'solicitante', 'tecnico'],
+}
+
+
+def _campos_solicitados(por_defecto, validos=CAMPOS_TICKETS, perfiles=PERFILES_CAMPOS_TICKETS,
+                        obligatorios=('fecha_creacion', 'id')):
+    """Lista de campos pedidos en ?fields= (lista separada por comas o un
+    perfil). Siempre incluye los obligatorios (en tickets id y
+    fecha_creacion, necesarios para el orden y el cursor de paginación)."""
+    valor = (request.args.get('fields') or '').strip()
+    if not valor:
+        return list(por_defecto)
+    if valor in perfiles:
+        campos = list(perfiles[valor])
+    else:
+        campos = [c.strip() for c in valor.split(',') if c.strip()]
+    desconocidos = [c for c in campos if c not in validos]
+    if desconocidos:
+        raise ValueError(f"Campos no válidos: {', '.join(desconocidos)}")
+    for obligatorio in obligatorios:
+        if obligatorio not in campos:
+            campos.insert(0, obligatorio)
+    return campos
+
+
+def _select_tickets(campos, joins=()):
+    """Arma SELECT ... FROM tickets t con solo los joins que usan los campos
+    pedidos y los filtros (`joins`)."""
+    necesarios = set(joins)
+    for campo in campos:
+        necesarios.update(CAMPOS_TICKETS[campo][1])
+    columnas = ",\n                ".join(
+        f"{CAMPOS_TICKETS[campo][0]} AS {campo}" for campo in campos)
+    uniones = "\n            ".join(
+        sql for alias, sql in JOINS_TICKETS.items() if alias in necesarios)
+    return f"""
+            SELECT
+                {columnas}
+            FROM tickets t
+            {uniones}
+        """
+
+
+def _formatear_fechas_ticket(ticket):
+    ticket['fecha_creacion'] = ticket['fecha_creacion'].strftime(FORMATO_FECHA)
+    if ticket.get('ultimaActualizacion'):
+        ticket['ultimaActualizacion'] = ticket['ultimaActualizacion'].strftime(FORMATO_FECHA)
+
+
+def _formato_streaming():
+    """Lee ?formato=. 'stream' envía un arreglo JSON y 'ndjson' un objeto por
+    línea, ambos de forma incremental. Sin formato (o 'json') devuelve None."""
+    formato = request.args.get('formato')
+    if not formato or formato == 'json':
+        return None
+    if formato not in ('stream', 'ndjson'):
+        raise ValueError("formato debe ser json, stream o ndjson")
+    if request.args.get('limit') or request.args.get('cursor'):
+        raise ValueError("formato stream/ndjson no admite paginación")
+    return formato
+
+
+def _respuesta_streaming(conn, query, params, formato, formatear=None):
+    """Ejecuta la consulta con un cursor sin buffer y envía las filas en lotes
+    de TAMANO_LOTE_STREAMING, de modo que la memoria no depende del tamaño de
+    la tabla y el primer byte sale sin esperar al resultado completo."""
+    cursor = conn.cursor(dictionary=True, buffered=False)
+    cursor.execute(query, params)
+
+    def generar():
+        try:
+            primero = True
+            if formato == 'stream':
+                yield '['
+            while True:
+                filas = cursor.fetchmany(TAMANO_LOTE_STREAMING)
+                if not filas:
+                    break
+                partes = []
+                for fila in filas:
+                    if formatear:
+                        formatear(fila)
+                    texto = current_app.json.dumps(fila)
+                    if formato == 'ndjson':
+                        partes.append(texto + '\n')
+                    else:
+                        partes.append(texto if primero else ',' + texto)
+                    primero = False
+                yield ''.join(partes)
+            if formato == 'stream':
+                yield ']'
+        finally:
+            cursor.close()
+
+    mimetype = 'application/x-ndjson' if formato == 'ndjson' else 'application/json'
+    return Response(stream_with_context(generar()), mimetype=mimetype)
+
+
+def _consulta_listado(base_query, conditions, params, posicion=None, limit=None):
+    """Arma la consulta de listado ordenada por (fecha_creacion, id_ticket) DESC."""
+    conditions = list(conditions)
+    params = list(params)
+    if posicion:
+        fecha, id_ticket = posicion
+        conditions.append(
+            "(t.fecha_creacion < %s OR (t.fecha_creacion = %s AND t.id_ticket < %s))")
+        params.extend([fecha, fecha, id_ticket])
+
+    query = base_query
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY t.fecha_creacion DESC, t.id_ticket DESC"
+    if limit:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, params
+
+
+def _version_ticket(cursor, id_ticket):
+    """Versión de un ticket: su fecha_actualizacion más el último registro de
+    historial y de adjuntos (los seguimientos no siempre tocan el ticket) y
+    los nombres de su categoría y grupo (renombrarlos no toca el ticket)."""
+    return _versiones_tickets(cursor, [id_ticket]).get(id_ticket)
+
+
+def _versiones_tickets(cursor, ids):
+    """Versión de varios tickets en una consulta: {id_ticket: version}."""
+    marcadores = ', '.join(['%s'] * len(ids))
+    cursor.execute(f"""
+        SELECT
+            t.id_ticket,
+            t.fecha_actualizacion AS ultima,
+            (SELECT MAX(id_historial) FROM historial_tickets
+             WHERE id_ticket2 = t.id_ticket) AS ultimo_historial,
+            (SELECT MAX(id_adjunto) FROM adjuntos_tickets
+             WHERE id_ticket1 = t.id_ticket) AS ultimo_adjunto,
+            (SELECT MAX(fecha_actualizacion) FROM usuarios
+             WHERE id_usuario IN (t.id_tecnico_asignado, t.id_usuario_reporta)) AS ultima_usuarios,
+            c.nombre_categoria AS categoria,
+            g.nombre_grupo AS grupo
+        FROM tickets t
+        LEFT JOIN categorias c ON t.id_categoria1 = c.id_categoria
+        LEFT JOIN grupos g ON t.id_grupo1 = g.id_grupo
+        WHERE t.id_ticket IN ({marcadores}) AND t.estado_ticket != 'eliminado'
+    """, tuple(ids))
+    return {fila.pop('id_ticket'): fila for fila in cursor.fetchall()}
+
+
+def _lista_json(valor):
+    """Convierte el resultado de un JSON_ARRAYAGG en lista (NULL si no hubo filas)."""
+    if valor is None:
+        return []
+    if isinstance(valor, (bytes, bytearray)):
+        valor = valor.decode('utf-8')
+    return json.loads(valor) if isinstance(valor, str) else list(valor)
+
+
+def _detalle_ticket(cursor, id_ticket):
+    return _detalles_tickets(cursor, [id_ticket]).get(id_ticket)
+
+
+def _detalles_tickets(cursor, ids):
+    """Arma el detalle de varios tickets (datos, adjuntos y seguimientos) en
+    una sola consulta: adjuntos y seguimientos (con sus archivos de
+    historial_adjuntos) llegan como arreglos JSON.
+    Devuelve {id_ticket: ticket}; los inexistentes o eliminados no aparecen."""
+    marcadores = ', '.join(['%s'] * len(ids))
+    cursor.execute(f"""
+        SELECT 
+            t.id_ticket as id,
+            t.titulo,
+            t.descripcion,
+            t.prioridad,
+            t.estado_ticket as estado,
+            t.tipo,
+            t.ubicacion,
+            t.fecha_creacion as fechaApertura,
+            t.fecha_actualizacion as ultimaActualizacion,
+            c.nombre_categoria AS categoria,
+            c.id_categoria AS categoriaId,
+            u.nombre_completo AS solicitante,
+            u.id_usuario AS solicitanteId,
+            tec.nombre_completo AS asignadoA,
+            tec.id_usuario AS asignadoAId,
+            g.nombre_grupo AS grupoAsignado,
+            g.id_grupo AS grupoAsignadoId,
+            (SELECT JSON_ARRAYAGG(JSON_OBJECT(
+                        'id_adjunto', a.id_adjunto,
+                        'id_ticket1', a.id_ticket1,
+                        'nombre_archivo', a.nombre_archivo,
+                        'ruta_archivo', a.ruta_archivo,
+                        'tipo_archivo', a.tipo_archivo,
+                        'tamano', a.tamano,
+                        'fecha_subida', DATE_FORMAT(a.fecha_subida, '%%Y-%%m-%%d %%H:%%i:%%s')))
+             FROM adjuntos_tickets a
+             WHERE a.id_ticket1 = t.id_ticket) AS adjuntos,
+            (SELECT JSON_ARRAYAGG(JSON_OBJECT(
+                        'id', h.id_historial,
+                        'tipo', h.campo_modificado,
+                        'usuario', COALESCE(h.nombre_modificador, 'Sistema'),
+                        'fecha', DATE_FORMAT(h.fecha_modificacion, '%%Y-%%m-%%d %%H:%%i:%%s'),
+                        'descripcion', COALESCE(h.descripcion, ''),
+                        'archivos', (SELECT JSON_ARRAYAGG(ha.nombre_archivo)
+                                     FROM historial_adjuntos ha
+                                     WHERE ha.id_historial = h.id_historial)))
+             FROM historial_tickets h
+             WHERE h.id_ticket2 = t.id_ticket
+               AND h.campo_modificado IN ('seguimiento','solucion')) AS seguimientos
+        FROM tickets t
+        LEFT JOIN categorias c ON t.id_categoria1 = c.id_categoria
+        LEFT JOIN usuarios_tickets ut ON t.id_ticket = ut.id_ticket3
+        LEFT JOIN usuarios u ON ut.id_usuario1 = u.id_usuario
+        LEFT JOIN usuarios tec ON t.id_tecnico_asignado = tec.id_usuario
+        LEFT JOIN grupos g ON t.id_grupo1 = g.id_grupo
+        WHERE t.id_ticket IN ({marcadores}) AND t.estado_ticket != 'eliminado'
+    """, tuple(ids))
+    tickets = {}
+    for ticket in cursor.fetchall():
+        # Con más de un solicitante en usuarios_tickets se queda la primera fila
+        if ticket['id'] not in tickets:
+            tickets[ticket['id']] = _armar_detalle(ticket)
+    return tickets
+
+
+def _armar_detalle(ticket):
+    ticket['fechaApertura'] = ticket['fechaApertura'].strftime(FORMATO_FECHA)
+    if ticket['ultimaActualizacion']:
+        ticket['ultimaActualizacion'] = ticket['ultimaActualizacion'].strftime(FORMATO_FECHA)
+    ticket['adjuntos'] = sorted(_lista_json(ticket['adjuntos']),
+                                key=lambda a: a['id_adjunto'])
+    seguimientos = _lista_json(ticket['seguimientos'])
+    for seguimiento in seguimientos:
+        # El JSON_ARRAYAGG anidado puede llegar como texto (MariaDB)
+        seguimiento['archivos'] = _lista_json(seguimiento.get('archivos'))
+    # JSON_ARRAYAGG no garantiza orden; mismo orden que el historial
+    seguimientos.sort(key=lambda s: (s['fecha'], s['id']))
+    ticket['seguimientos'] = seguimientos
+    return ticket
+
+
+def _listar_tickets(cursor, base_query, conditions, params, pagina, joins=()):
+    """Ejecuta un listado de tickets ordenado por fecha_creacion DESC.
+
+    Sin paginación devuelve la lista completa. Con paginación aplica keyset
+    sobre (fecha_creacion, id_ticket), lee limit + 1 filas para saber si hay
+    otra página y devuelve {'tickets', 'next_cursor', 'limit'[, 'total']}.
+    `joins` son los alias de JOINS_TICKETS que usan las condiciones: el
+    total solo hace esos joins.
+    """
+    total = None
+    if pagina and pagina['incluir_total']:
+        uniones = " ".join(sql for alias, sql in JOINS_TICKETS.items() if alias in joins)
+        # Con joins un ticket con varias filas en usuarios_tickets se cuenta una vez
+        contar = "COUNT(DISTINCT t.id_ticket)" if uniones else "COUNT(*)"
+        count_query = f"SELECT {contar} AS total FROM tickets t {uniones}"
+        if conditions:
+            count_query += " WHERE " + " AND ".join(conditions)
+        cursor.execute(count_query, params)
+        total = cursor.fetchone()['total']
+
+    if pagina:
+        query, params = _consulta_listado(
+            base_query, conditions, params, pagina['posicion'], pagina['limit'] + 1)
+    else:
+        query, params = _consulta_listado(base_query, conditions, params)
+
+    cursor.execute(query, params)
+    tickets = cursor.fetchall()
+
+    next_cursor = None
+    if pagina and len(tickets) > pagina['limit']:
+        tickets = tickets[:pagina['limit']]
+        ultimo = tickets[-1]
+        next_cursor = _codificar_cursor(ultimo['fecha_creacion'], ultimo['id'])
+
+    for ticket in tickets:
+        _formatear_fechas_ticket(ticket)
+
+    if pagina is None:
+        return tickets
+    resultado = {
+        'tickets': tickets,
+        'next_cursor': next_cursor,
+        'limit': pagina['limit']
+    }
+    if total is not None:
+        resultado['total'] = total
+    return resultado
+
+
 @usuarios_bp.route("/creacion", methods=["POST"])
 def crear_usuario():
     try:
@@ -126,6 +535,7 @@ def crear_usuario():
         conn.commit()
 
         nuevo_id = cursor.lastrowid
+        _notificar_cambio_usuario(nuevo_id)
 
         cursor.close()
         conn.close()
@@ -144,6 +554,157 @@ def crear_usuario():
         }), 500
 
 
+COLUMNAS_ALTA_USUARIO = ('nombre_usuario', 'nombre_completo', 'correo', 'telefono',
+                         'contraseña', 'rol', 'estado', 'id_entidad1')
+
+ER_DUP_ENTRY = 1062
+
+
+def _insertar_usuarios(conn, cursor, filas, con_grupo):
+    """Inserta un bloque de usuarios ya validados con un solo executemany y
+    devuelve sus ids, en el orden de `filas`. Todas las filas llevan id_grupo
+    o ninguna."""
+    columnas = COLUMNAS_ALTA_USUARIO + (('id_grupo',) if con_grupo else ())
+    cursor.executemany(
+        f"INSERT INTO usuarios ({', '.join(columnas)}) VALUES ({', '.join(['%s'] * len(columnas))})",
+        filas
+    )
+    # Los ids de un INSERT de varias filas no son necesariamente consecutivos
+    # (innodb_autoinc_lock_mode 2, auto_increment_increment > 1): se leen por
+    # nombre_usuario, que es UNIQUE, dentro de la misma transacción
+    nombres = [fila[0] for fila in filas]
+    cursor.execute(
+        f"SELECT nombre_usuario, id_usuario FROM usuarios "
+        f"WHERE nombre_usuario IN ({', '.join(['%s'] * len(nombres))})",
+        nombres
+    )
+    ids = {normalizar(nombre): id_usuario for nombre, id_usuario in cursor.fetchall()}
+    conn.commit()
+    return [ids[normalizar(nombre)] for nombre in nombres]
+
+
+@usuarios_bp.route("/creacion/lote", methods=["POST"])
+def crear_usuarios_lote():
+    """Alta de varios usuarios en una solicitud. Recibe {"usuarios": [...]}
+    con los mismos campos que /creacion. Los nombres de usuario y correos se
+    comprueban con una consulta IN cada uno y las filas válidas se insertan
+    con executemany; cada fila con conflicto se informa sin detener el resto."""
+    data = request.get_json(silent=True) or {}
+    usuarios = data.get('usuarios') if isinstance(data, dict) else data
+    if not isinstance(usuarios, list) or not usuarios:
+        return jsonify({'success': False, 'message': 'usuarios debe ser una lista no vacía'}), 400
+    if len(usuarios) > LOTES_CONFIG['max_usuarios_creacion']:
+        return jsonify({
+            'success': False,
+            'message': f"Máximo {LOTES_CONFIG['max_usuarios_creacion']} usuarios por solicitud"
+        }), 400
+
+    resultados = [{'indice': i, 'ok': True} for i in range(len(usuarios))]
+
+    def rechazar(i, mensaje):
+        resultados[i]['ok'] = False
+        resultados[i].setdefault('errores', []).append(mensaje)
+
+    # Los nombres y correos se comparan como lo hace la base (utf8mb4_general_ci)
+    vistos_nombre, vistos_correo = {}, {}
+    for i, usuario in enumerate(usuarios):
+        if not isinstance(usuario, dict):
+            rechazar(i, 'Cada usuario debe ser un objeto')
+            continue
+        faltantes = [c for c in ('nombre_usuario', 'nombre_completo', 'telefono', 'correo', 'rol', 'contrasena')
+                     if not str(usuario.get(c) or '').strip()]
+        if faltantes:
+            rechazar(i, 'Faltan campos requeridos: ' + ', '.join(faltantes))
+            continue
+        for campo, vistos, mensaje in (('nombre_usuario', vistos_nombre, 'El nombre de usuario'),
+                                       ('correo', vistos_correo, 'El correo')):
+            clave = normalizar(usuario[campo])
+            if clave in vistos:
+                rechazar(i, f"{mensaje} se repite en el índice {vistos[clave]}")
+            else:
+                vistos[clave] = i
+
+    conn = None
+    cursor = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        validos = [i for i, r in enumerate(resultados) if r['ok']]
+        for campo, mensaje in (('nombre_usuario', 'El nombre de usuario ya existe'),
+                               ('correo', 'El correo ya está registrado')):
+            valores = [str(usuarios[i][campo]).strip() for i in validos]
+            if not valores:
+                break
+            cursor.execute(
+                f"SELECT {campo} FROM usuarios WHERE {campo} IN ({', '.join(['%s'] * len(valores))})",
+                valores
+            )
+            existentes = {normalizar(fila[0]) for fila in cursor.fetchall()}
+            for i in validos:
+                if normalizar(usuarios[i][campo]) in existentes:
+                    rechazar(i, mensaje)
+            validos = [i for i in validos if resultados[i]['ok']]
+
+        def fila(i):
+            u = usuarios[i]
+            valores = (str(u['nombre_usuario']).strip(), u['nombre_completo'], str(u['correo']).strip(),
+                       u['telefono'], u['contrasena'], u['rol'], u.get('estado') or 'activo',
+                       u.get('id_entidad'))
+            return valores + ((u['id_grupo'],) if u.get('id_grupo') not in (None, '') else ())
+
+        creados = []
+        tamano = LOTES_CONFIG['usuarios_por_insercion']
+        for inicio in range(0, len(validos), tamano):
+            bloque = validos[inicio:inicio + tamano]
+            for con_grupo in (False, True):
+                indices = [i for i in bloque if (len(fila(i)) > len(COLUMNAS_ALTA_USUARIO)) == con_grupo]
+                if not indices:
+                    continue
+                try:
+                    ids = _insertar_usuarios(conn, cursor, [fila(i) for i in indices], con_grupo)
+                except Exception as e:
+                    # Otro proceso pudo registrar el mismo usuario entre la
+                    # comprobación y el INSERT: se reintenta fila por fila
+                    print("Error al crear lote de usuarios, se reintenta por fila:", e)
+                    conn.rollback()
+                    ids = []
+                    for i in indices:
+                        try:
+                            ids.append(_insertar_usuarios(conn, cursor, [fila(i)], con_grupo)[0])
+                        except Exception as e_fila:
+                            conn.rollback()
+                            if getattr(e_fila, 'errno', None) == ER_DUP_ENTRY:
+                                rechazar(i, 'El nombre de usuario o el correo ya existe')
+                            else:
+                                print(f"Error al crear el usuario del índice {i}:", e_fila)
+                                rechazar(i, 'No se pudo crear el usuario')
+                            ids.append(None)
+                for i, nuevo_id in zip(indices, ids):
+                    if nuevo_id is not None:
+                        resultados[i]['id_usuario'] = nuevo_id
+                        creados.append(nuevo_id)
+
+        if creados:
+            _notificar_cambio_usuarios(creados)
+        conflictos = sum(1 for r in resultados if not r['ok'])
+        return jsonify({
+            'success': conflictos == 0,
+            'creados': len(creados),
+            'conflictos': conflictos,
+            'resultados': resultados
+        }), 201 if creados else 200
+    except Exception as e:
+        print("Error al crear usuarios por lote:", e)
+        if conn:
+            conn.rollback()
+        return jsonify({'success': False, 'message': 'Error interno del servidor'}), 500
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
 @usuarios_bp.route("/actualizacion/<int:usuario_id>", methods=["PUT"])
 def actualizar_usuario(usuario_id):
     try:
@@ -211,10 +772,15 @@ def actualizar_usuario(usuario_id):
         # Normalizar id_grupo vacío a None
         if id_grupo == "":
             id_grupo = None
+        # tokens_validos_desde revoca las sesiones abiertas (ver sesiones.py):
+        # siempre al cambiar la contraseña y, si no, solo si cambia el rol o el
+        # estado. Va primero porque MySQL evalúa el SET de izquierda a derecha
+        # y compara con los valores anteriores
         if contrasena:
             query = """
                 UPDATE usuarios
-                SET nombre_usuario = %s, 
+                SET tokens_validos_desde = NOW(),
+                    nombre_usuario = %s, 
                     nombre_completo = %s, 
                     correo = %s, 
                     telefono = %s, 
@@ -241,7 +807,9 @@ def actualizar_usuario(usuario_id):
         else:
             query = """
                 UPDATE usuarios
-                SET nombre_usuario = %s, 
+                SET tokens_validos_desde = IF(rol <=> %s AND estado <=> %s,
+                                              tokens_validos_desde, NOW()),
+                    nombre_usuario = %s, 
                     nombre_completo = %s, 
                     correo = %s, 
                     telefono = %s, 
@@ -253,6 +821,8 @@ def actualizar_usuario(usuario_id):
                 WHERE id_usuario = %s
             """
             params = (
+                rol,
+                estado,
                 nombre_usuario,
                 nombre_completo,
                 correo,
@@ -272,6 +842,7 @@ def actualizar_usuario(usuario_id):
                 "success": False,
                 "message": "No se realizaron cambios"
             }), 400
+        _notificar_cambio_usuario(usuario_id)
 
         cursor.close()
         conn.close()
@@ -289,38 +860,124 @@ def actualizar_usuario(usuario_id):
         }), 500
 
 
+# Campos del directorio de usuarios (?fields=): nombre -> (expresión SQL, joins)
+CAMPOS_USUARIOS = {
+    'id_usuario': ('u.id_usuario', ()),
+    'nombre_usuario': ('u.nombre_usuario', ()),
+    'nombre_completo': ('u.nombre_completo', ()),
+    'correo': ('u.correo', ()),
+    'telefono': ('u.telefono', ()),
+    'rol': ('u.rol', ()),
+    'estado': ('u.estado', ()),
+    'fecha_registro': ('u.fecha_registro', ()),
+    'fecha_actualizacion': ('u.fecha_actualizacion', ()),
+    'entidad': ('e.nombre_entidad', ('e',)),
+    'id_entidad1': ('u.id_entidad1', ()),
+    'id_grupo': ('u.id_grupo', ()),
+    'grupo': ('g.nombre_grupo', ('g',)),
+}
+
+JOINS_USUARIOS = {
+    'e': "LEFT JOIN entidades e ON u.id_entidad1 = e.id_entidad",
+    'g': "LEFT JOIN grupos g ON u.id_grupo = g.id_grupo",
+}
+
+# 'lista' alcanza para los desplegables y las tablas del directorio
+PERFILES_CAMPOS_USUARIOS = {
+    'lista': ['id_usuario', 'nombre_completo', 'nombre_usuario', 'rol', 'estado'],
+}
+
+# Filtros del directorio: parámetro -> columna. rol y estado aceptan varios
+# valores separados por comas.
+FILTROS_USUARIOS = {
+    'rol': 'u.rol',
+    'estado': 'u.estado',
+    'id_grupo': 'u.id_grupo',
+    'id_entidad1': 'u.id_entidad1',
+    'id_entidad': 'u.id_entidad1',
+}
+
+LIMITE_SUGERENCIAS = 10
+LIMITE_SUGERENCIAS_MAXIMO = 50
+
+
+def _filtros_usuarios():
+    """Condiciones y parámetros de los filtros de ?rol=&estado=&id_grupo=&id_entidad1=."""
+    condiciones, params = [], []
+    for parametro, columna in FILTROS_USUARIOS.items():
+        valor = (request.args.get(parametro) or '').strip()
+        if not valor:
+            continue
+        valores = [v.strip() for v in valor.split(',') if v.strip()]
+        if parametro.startswith('id_') and not all(v.isdigit() for v in valores):
+            raise ValueError(f"{parametro} debe ser numérico")
+        condiciones.append(f"{columna} IN ({', '.join(['%s'] * len(valores))})")
+        params.extend(valores)
+    return condiciones, params
+
+
 @usuarios_bp.route("/obtener", methods=["GET"])
 def obtener_usuarios():
+    """Directorio de usuarios. Sin parámetros devuelve la lista completa como
+    siempre. Acepta filtros (rol, estado, id_grupo, id_entidad1), ?fields=
+    (por ejemplo fields=lista) y paginación por cursor sobre id_usuario
+    (?limit=&cursor=), que responde {'usuarios', 'next_cursor', 'limit', 'total'}."""
     try:
+        formato = _formato_streaming()
+        pagina = _parametros_paginacion(_decodificar_cursor_id)
+        campos = _campos_solicitados(list(CAMPOS_USUARIOS), CAMPOS_USUARIOS,
+                                     PERFILES_CAMPOS_USUARIOS, obligatorios=('id_usuario',))
+        condiciones, params = _filtros_usuarios()
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
-        # Obtener usuarios con información de entidad
-        query = """
+        # Obtener usuarios con información de entidad (solo los joins necesarios)
+        necesarios = {alias for campo in campos for alias in CAMPOS_USUARIOS[campo][1]}
+        columnas = ",\n                ".join(f"{CAMPOS_USUARIOS[c][0]} AS {c}" for c in campos)
+        uniones = "\n            ".join(sql for alias, sql in JOINS_USUARIOS.items() if alias in necesarios)
+        base_query = f"""
             SELECT 
-                u.id_usuario,
-                u.nombre_usuario,
-                u.nombre_completo,
-                u.correo,
-                u.telefono,
-                u.rol,
-                u.estado,
-                u.fecha_registro,
-                u.fecha_actualizacion,
-                e.nombre_entidad AS entidad,
-                u.id_entidad1,
-                u.id_grupo,
-                g.nombre_grupo AS grupo
+                {columnas}
             FROM usuarios u
-            LEFT JOIN entidades e ON u.id_entidad1 = e.id_entidad
-            LEFT JOIN grupos g ON u.id_grupo = g.id_grupo
+            {uniones}
         """
-        cursor.execute(query)
+        total = None
+        if pagina and pagina['incluir_total']:
+            cursor.execute(
+                "SELECT COUNT(*) AS total FROM usuarios u"
+                + (" WHERE " + " AND ".join(condiciones) if condiciones else ""),
+                params
+            )
+            total = cursor.fetchone()['total']
+        if pagina and pagina['posicion'] is not None:
+            condiciones = condiciones + ["u.id_usuario > %s"]
+            params = params + [pagina['posicion']]
+        query = base_query
+        if condiciones:
+            query += " WHERE " + " AND ".join(condiciones)
+        if pagina:
+            query += " ORDER BY u.id_usuario LIMIT %s"
+            params = params + [pagina['limit'] + 1]
+        if formato:
+            return _respuesta_streaming(conn, query, params, formato)
+
+        cursor.execute(query, params)
         usuarios = cursor.fetchall()
 
         cursor.close()
         conn.close()
-        return jsonify(usuarios)
+        if pagina is None:
+            return jsonify(usuarios)
+        next_cursor = None
+        if len(usuarios) > pagina['limit']:
+            usuarios = usuarios[:pagina['limit']]
+            next_cursor = _codificar_cursor_id(usuarios[-1]['id_usuario'])
+        resultado = {'usuarios': usuarios, 'next_cursor': next_cursor, 'limit': pagina['limit']}
+        if total is not None:
+            resultado['total'] = total
+        return jsonify(resultado)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
         print("Error al obtener usuarios:", e)
         return jsonify({
@@ -329,6 +986,59 @@ def obtener_usuarios():
         }), 500
 
 
+@usuarios_bp.route("/sugerencias", methods=["GET"])
+def sugerencias_usuarios():
+    """Autocompletado de usuarios por prefijo de nombre completo o nombre de
+    usuario (?q=). Devuelve solo [{id, nombre}] ordenado por nombre. Filtra
+    por rol (p. ej. rol=tecnico,administrador para asignadoA) y por defecto
+    solo usuarios activos. Cada rama del UNION usa su índice por prefijo."""
+    q = (request.args.get('q') or '').strip()
+    try:
+        limite = int(request.args.get('limite') or LIMITE_SUGERENCIAS)
+    except ValueError:
+        return jsonify({"success": False, "message": "limite debe ser numérico"}), 400
+    limite = max(1, min(limite, LIMITE_SUGERENCIAS_MAXIMO))
+    if not q:
+        return jsonify([])
+
+    condiciones, params = ["u.estado = %s"], [request.args.get('estado') or 'activo']
+    roles = [r.strip() for r in (request.args.get('rol') or '').split(',') if r.strip()]
+    if roles:
+        condiciones.append(f"u.rol IN ({', '.join(['%s'] * len(roles))})")
+        params.extend(roles)
+    filtro = " AND ".join(condiciones)
+    # Escapar comodines para que el texto se busque literal
+    prefijo = re.sub(r'([\\%_])', r'\\\1', q) + '%'
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(
+            f"""
+            SELECT id, nombre FROM (
+                (SELECT u.id_usuario AS id, u.nombre_completo AS nombre
+                 FROM usuarios u
+                 WHERE u.nombre_completo LIKE %s AND {filtro}
+                 ORDER BY u.nombre_completo LIMIT %s)
+                UNION
+                (SELECT u.id_usuario AS id, u.nombre_completo AS nombre
+                 FROM usuarios u
+                 WHERE u.nombre_usuario LIKE %s AND {filtro}
+                 ORDER BY u.nombre_usuario LIMIT %s)
+            ) s
+            ORDER BY nombre, id
+            LIMIT %s
+            """,
+            [prefijo] + params + [limite, prefijo] + params + [limite, limite]
+        )
+        sugerencias = cursor.fetchall()
+        cursor.close()
+        conn.close()
+        return jsonify(sugerencias)
+    except Exception as e:
+        print("Error al obtener sugerencias de usuarios:", e)
+        return jsonify({"success": False, "message": "Error al obtener sugerencias"}), 500
+
+
 @usuarios_bp.route("/eliminar/<int:usuario_id>", methods=["DELETE"])
 def eliminar_usuario(usuario_id):
     conn = get_db_connection()
@@ -355,6 +1065,7 @@ def eliminar_usuario(usuario_id):
                 "success": False,
                 "message": "No se pudo eliminar el usuario"
             }), 400
+        _notificar_cambio_usuario(usuario_id)
 
         return jsonify({
             "success": True,
@@ -377,13 +1088,7 @@ def eliminar_usuario(usuario_id):
 @usuarios_bp.route("/obtenerEntidades", methods=["GET"])
 def obtener_entidades():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM entidades")
-        entidades = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return jsonify(entidades)
+        return catalogos.respuesta('entidades')
     except Exception as e:
         print("Error al obtener entidades:", e)
         return jsonify({
@@ -421,13 +1126,7 @@ def verificar_estado_usuario(nombre_usuario):
 @usuarios_bp.route("/obtenerGrupos", methods=["GET"])
 def obtener_grupos():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM grupos")
-        grupos = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return jsonify(grupos)
+        return catalogos.respuesta('grupos')
     except Exception as e:
         print("Error al obtener grupos:", e)
         return jsonify({
@@ -439,13 +1138,7 @@ def obtener_grupos():
 @usuarios_bp.route("/obtenerCategorias", methods=["GET"])
 def obtener_categorias():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM categorias")
-        categorias = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return jsonify(categorias)
+        return catalogos.respuesta('categorias')
     except Exception as e:
         print("Error al obtener categorías:", e)
         return jsonify({
@@ -454,29 +1147,31 @@ def obtener_categorias():
         }), 500
 
 
+def _perfil_usuario(cursor, usuario_id):
+    cursor.execute("""
+        SELECT 
+            u.id_usuario,
+            u.nombre_completo,
+            u.nombre_usuario,
+            u.correo,
+            u.telefono,
+            u.rol,
+            u.estado,
+            e.nombre_entidad AS entidad,
+            e.id_entidad
+        FROM usuarios u
+        LEFT JOIN entidades e ON u.id_entidad1 = e.id_entidad
+        WHERE u.id_usuario = %s
+    """, (usuario_id,))
+    return cursor.fetchone()
+
+
 @usuarios_bp.route("/obtenerUsuario/<int:usuario_id>", methods=["GET"])
 def obtener_usuario(usuario_id):
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
-
-        cursor.execute("""
-            SELECT 
-                u.id_usuario,
-                u.nombre_completo,
-                u.nombre_usuario,
-                u.correo,
-                u.telefono,
-                u.rol,
-                u.estado,
-                e.nombre_entidad AS entidad,
-                e.id_entidad
-            FROM usuarios u
-            LEFT JOIN entidades e ON u.id_entidad1 = e.id_entidad
-            WHERE u.id_usuario = %s
-        """, (usuario_id,))
-
-        usuario = cursor.fetchone()
+        usuario = _perfil_usuario(cursor, usuario_id)
         cursor.close()
         conn.close()
 
@@ -490,6 +1185,62 @@ def obtener_usuario(usuario_id):
         return jsonify({"success": False, "message": "Error al obtener usuario"}), 500
 
 
+# Catálogos de referencias.py que devuelve /bootstrap
+SECCIONES_BOOTSTRAP = ('categorias', 'grupos', 'entidades', 'tecnicos')
+
+
+@usuarios_bp.route("/bootstrap", methods=["GET"])
+def bootstrap():
+    """Datos de arranque de los formularios en una sola solicitud: categorías,
+    grupos, entidades, técnicos y el perfil del usuario de la sesión.
+
+    Los catálogos salen de la memoria (ver referencias.py). Cada sección trae
+    su 'version' (el ETag del catálogo); el cliente envía las que ya tiene
+    en ?versiones=categorias:<version>,grupos:<version> y esas secciones
+    vuelven solo con la versión, sin 'datos'. La respuesta completa lleva
+    ETag y responde 304 si nada cambió. Sin sesión no trae perfil."""
+    _, usuario_id = identidad_solicitud()
+    if usuario_id is not None and not usuario_id.isdigit():
+        return jsonify({"success": False, "message": "usuario_id debe ser numérico"}), 400
+    conocidas = {}
+    for par in (request.args.get('versiones') or '').split(','):
+        seccion, _, version = par.partition(':')
+        if seccion.strip() and version.strip():
+            conocidas[seccion.strip()] = version.strip()
+
+    try:
+        secciones = {}
+        for seccion in SECCIONES_BOOTSTRAP:
+            entrada = catalogos.obtener(seccion)
+            secciones[seccion] = {'version': entrada['etag']}
+            if conocidas.get(seccion) != entrada['etag']:
+                secciones[seccion]['datos'] = entrada['filas']
+
+        usuario = None
+        if usuario_id:
+            conn = get_db_connection()
+            cursor = conn.cursor(dictionary=True)
+            usuario = _perfil_usuario(cursor, int(usuario_id))
+            cursor.close()
+            conn.close()
+            if not usuario:
+                return jsonify({"success": False, "message": "Usuario no encontrado"}), 404
+
+        etag = calcular_etag('bootstrap', sorted(conocidas.items()),
+                             [(s, secciones[s]['version']) for s in SECCIONES_BOOTSTRAP],
+                             sorted((usuario or {}).items()))
+        respuesta = no_modificado(etag)
+        if respuesta is not None:
+            return respuesta
+        return marcar_version(
+            jsonify({"success": True, "secciones": secciones, "usuario": usuario}),
+            etag, cache_control=catalogos.cache_control
+        )
+    except Exception as e:
+        print("Error al armar el bootstrap:", e)
+        return jsonify({"success": False, "message": "Error al obtener los datos iniciales"}), 500
+
+
 @usuarios_bp.route("/tickets", methods=["POST"])
 def crear_ticket():
     conn = None
@@ -582,6 +1333,7 @@ def crear_ticket():
                     ))
 
         conn.commit()
+        _notificar_cambio_ticket(ticket_id, 'creado')
         cursor.close()
         return jsonify({
             "success": True,
@@ -603,68 +1355,106 @@ def crear_ticket():
             conn.close()
 
 
+@usuarios_bp.route("/tickets/importar", methods=["POST"])
+def importar_tickets():
+    """Importación masiva de tickets desde CSV o NDJSON (ver importacion.py).
+    El archivo llega en el campo multipart 'archivo' o como cuerpo de la
+    solicitud (Content-Type text/csv o application/x-ndjson); ?formato=csv|ndjson
+    lo fuerza y ?validar=1 solo valida. Responde el informe por fila."""
+    archivo = request.files.get('archivo')
+    if archivo:
+        contenido = archivo.read()
+        formato = detectar_formato(archivo.filename, archivo.content_type)
+    else:
+        contenido = request.get_data()
+        formato = detectar_formato(tipo_contenido=request.content_type)
+    formato = (request.args.get('formato') or formato or '').strip().lower()
+    solo_validar = request.args.get('validar') in ('1', 'true')
+    if not contenido:
+        return jsonify({'success': False, 'message': 'No se recibió ningún archivo'}), 400
+    try:
+        filas = leer_filas(contenido.decode('utf-8-sig'), formato, IMPORTACION_CONFIG['max_filas'])
+    except UnicodeDecodeError:
+        return jsonify({'success': False, 'message': 'El archivo debe estar en UTF-8'}), 400
+    except ErrorFormato as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    conn = None
+    cursor = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        informe = importar(
+            conn, cursor, filas, solo_validar=solo_validar,
+            al_confirmar=lambda ids: _notificar_cambio_tickets(ids, 'creado')
+        )
+        return jsonify(dict(informe, success=informe['errores'] == 0)), 200
+    except Exception as e:
+        print("Error al importar tickets:", e)
+        if conn:
+            conn.rollback()
+        return jsonify({'success': False, 'message': 'Error al importar tickets'}), 500
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
 
 
 
 @usuarios_bp.route("/tickets", methods=["GET"])
+@sesion_requerida
 def obtener_tickets():
     try:
-        usuario_id = request.args.get("usuario_id")
-        rol = request.args.get("rol")
+        rol, usuario_id = identidad_solicitud()
+        pagina = _parametros_paginacion()
+        formato = _formato_streaming()
+        campos = _campos_solicitados([
+            'id', 'titulo', 'descripcion', 'prioridad', 'estado', 'tipo', 'ubicacion',
+            'fecha_creacion', 'ultimaActualizacion', 'categoria', 'solicitante',
+            'solicitanteId', 'tecnico', 'grupo'
+        ])
 
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
-        base_query = """
-            SELECT 
-                t.id_ticket as id,
-                t.titulo,
-                t.descripcion,
-                t.prioridad,
-                t.estado_ticket as estado,
-                t.tipo,
-                t.ubicacion,
-                t.fecha_creacion,
-                t.fecha_actualizacion as ultimaActualizacion,
-                c.nombre_categoria AS categoria,
-                u.nombre_completo AS solicitante,
-                u.id_usuario AS solicitanteId,
-                tec.nombre_completo AS tecnico,
-                g.nombre_grupo AS grupo
-            FROM tickets t
-            LEFT JOIN categorias c ON t.id_categoria1 = c.id_categoria
-            LEFT JOIN usuarios_tickets ut ON t.id_ticket = ut.id_ticket3
-            LEFT JOIN usuarios u ON ut.id_usuario1 = u.id_usuario
-            LEFT JOIN usuarios tec ON t.id_tecnico_asignado = tec.id_usuario
-            LEFT JOIN grupos g ON t.id_grupo1 = g.id_grupo
-        """
-
         conditions = ["t.estado_ticket != 'eliminado'"]
         params = []
+        joins = []
         if rol and rol.lower() not in ['administrador', 'tecnico'] and usuario_id:
             conditions.append("ut.id_usuario1 = %s")
             params.append(usuario_id)
+            joins.append('ut')
 
-        query = base_query
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-        query += " ORDER BY t.fecha_creacion DESC"
+        base_query = _select_tickets(campos, joins)
 
-        cursor.execute(query, params)
-        tickets = cursor.fetchall()
+        # Si nada cambió desde la versión que tiene el cliente, 304 sin
+        # ejecutar el listado. El contador lo avanzan las escrituras (ver
+        # versiones.py) y se lee antes que los tickets, así que un ETag
+        # nuevo nunca acompaña datos viejos
+        version = leer_version(cursor, 'tickets')
+        # La identidad sale del token, no de la URL: forma parte de la versión
+        etag = calcular_etag('tickets', request.query_string, rol, usuario_id, version)
+        respuesta = no_modificado(etag, debil=True)
+        if respuesta:
+            return respuesta
+
+        if formato:
+            query, params = _consulta_listado(base_query, conditions, params)
+            respuesta = _respuesta_streaming(conn, query, params, formato, _formatear_fechas_ticket)
+            return marcar_version(respuesta, etag, debil=True)
 
-        for ticket in tickets:
-            ticket['fecha_creacion'] = ticket['fecha_creacion'].strftime(
-                '%Y-%m-%d %H:%M:%S')
-            if ticket['ultimaActualizacion']:
-                ticket['ultimaActualizacion'] = ticket['ultimaActualizacion'].strftime(
-                    '%Y-%m-%d %H:%M:%S')
+        tickets = _listar_tickets(cursor, base_query, conditions, params, pagina, joins)
 
         cursor.close()
         conn.close()
 
-        return jsonify(tickets)
+        return marcar_version(jsonify(tickets), etag, debil=True)
 
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
         print("Error al obtener tickets:", e)
         return jsonify({
@@ -673,85 +1463,128 @@ def obtener_tickets():
         }), 500
 
 
+@usuarios_bp.route("/tickets/cambios", methods=["GET"])
+@sesion_requerida
+def obtener_tickets_cambiados():
+    """Tickets creados, modificados o eliminados (soft delete) desde una marca.
+    Parámetros: desde (marca de la llamada anterior; sin ella se devuelven
+    todos los tickets vigentes), limit, fields. Rol y usuario salen de la sesión.
+    Respuesta: { tickets: [...], eliminados: [ids], marca, hay_mas }.
+    Un ticket puede llegar más de una vez: el cliente debe reemplazar por id
+    y volver a llamar con la nueva marca (de inmediato si hay_mas)."""
+    try:
+        rol, usuario_id = identidad_solicitud()
+        desde = request.args.get("desde")
+        posicion = _decodificar_cursor(desde) if desde else None
+        try:
+            limit = int(request.args.get("limit") or LIMITE_PAGINA_MAXIMO)
+        except ValueError:
+            raise ValueError("limit debe ser numérico")
+        limit = max(1, min(limit, LIMITE_PAGINA_MAXIMO))
+        campos = _campos_solicitados([
+            'id', 'titulo', 'descripcion', 'prioridad', 'estado', 'tipo', 'ubicacion',
+            'fecha_creacion', 'ultimaActualizacion', 'categoria', 'solicitante',
+            'solicitanteId', 'tecnico', 'grupo'
+        ])
+        for campo in ('estado', 'ultimaActualizacion'):
+            if campo not in campos:
+                campos.append(campo)
+
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+
+        cursor.execute(
+            "SELECT NOW() - INTERVAL %s SECOND AS corte", (MARGEN_SINCRONIZACION_SEGUNDOS,))
+        corte = cursor.fetchone()['corte']
+
+        conditions = []
+        params = []
+        joins = []
+        if posicion:
+            fecha, id_ticket = posicion
+            conditions.append(
+                "(t.fecha_actualizacion > %s OR (t.fecha_actualizacion = %s AND t.id_ticket > %s))")
+            params.extend([fecha, fecha, id_ticket])
+        else:
+            # Sincronización completa: no hace falta informar eliminados
+            conditions.append("t.estado_ticket != 'eliminado'")
+        if rol and rol.lower() not in ['administrador', 'tecnico'] and usuario_id:
+            conditions.append("ut.id_usuario1 = %s")
+            params.append(usuario_id)
+            joins.append('ut')
+
+        query = _select_tickets(campos, joins)
+        query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY t.fecha_actualizacion ASC, t.id_ticket ASC LIMIT %s"
+        params.append(limit + 1)
+        cursor.execute(query, params)
+        filas = cursor.fetchall()
+
+        hay_mas = len(filas) > limit
+        filas = filas[:limit]
+        if hay_mas:
+            ultimo = filas[-1]
+            marca = _codificar_cursor(ultimo['ultimaActualizacion'], ultimo['id'])
+        else:
+            marca = _codificar_cursor(corte, 0)
+
+        tickets = []
+        eliminados = []
+        for fila in filas:
+            if fila['estado'] == 'eliminado':
+                eliminados.append(fila['id'])
+            else:
+                _formatear_fechas_ticket(fila)
+                tickets.append(fila)
+
+        cursor.close()
+        conn.close()
+
+        return jsonify({
+            "success": True,
+            "tickets": tickets,
+            "eliminados": eliminados,
+            "marca": marca,
+            "hay_mas": hay_mas
+        })
+
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        print("Error al obtener tickets modificados:", e)
+        return jsonify({
+            "success": False,
+            "message": "Error al obtener tickets modificados"
+        }), 500
+
+
 @usuarios_bp.route("/tickets/<int:id_ticket>", methods=["GET"])
 def obtener_ticket_por_id(id_ticket):
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
-        cursor.execute("""
-            SELECT 
-                t.id_ticket as id,
-                t.titulo,
-                t.descripcion,
-                t.prioridad,
-                t.estado_ticket as estado,
-                t.tipo,
-                t.ubicacion,
-                t.fecha_creacion as fechaApertura,
-                t.fecha_actualizacion as ultimaActualizacion,
-                c.nombre_categoria AS categoria,
-                c.id_categoria AS categoriaId,
-                u.nombre_completo AS solicitante,
-                u.id_usuario AS solicitanteId,
-                tec.nombre_completo AS asignadoA,
-                tec.id_usuario AS asignadoAId,
-                g.nombre_grupo AS grupoAsignado,
-                g.id_grupo AS grupoAsignadoId
-            FROM tickets t
-            LEFT JOIN categorias c ON t.id_categoria1 = c.id_categoria
-            LEFT JOIN usuarios_tickets ut ON t.id_ticket = ut.id_ticket3
-            LEFT JOIN usuarios u ON ut.id_usuario1 = u.id_usuario
-            LEFT JOIN usuarios tec ON t.id_tecnico_asignado = tec.id_usuario
-            LEFT JOIN grupos g ON t.id_grupo1 = g.id_grupo
-            WHERE t.id_ticket = %s AND t.estado_ticket != 'eliminado'
-        """, (id_ticket,))
-
-        ticket = cursor.fetchone()
+        version = _version_ticket(cursor, id_ticket)
+        if not version:
+            cursor.close()
+            conn.close()
+            return jsonify({
+                "success": False,
+                "message": "Ticket no encontrado"
+            }), 404
 
-        if ticket:
-            # Formatear fechas
-            ticket['fechaApertura'] = ticket['fechaApertura'].strftime(
-                '%Y-%m-%d %H:%M:%S')
-            if ticket['ultimaActualizacion']:
-                ticket['ultimaActualizacion'] = ticket['ultimaActualizacion'].strftime(
-                    '%Y-%m-%d %H:%M:%S')
+        etag = calcular_etag('ticket', id_ticket, *version.values())
+        respuesta = no_modificado(etag, debil=True)
+        if respuesta:
+            return respuesta
 
-            # Obtener adjuntos si existen
-            cursor.execute("""
-                SELECT * FROM adjuntos_tickets 
-                WHERE id_ticket1 = %s
-            """, (id_ticket,))
-            adjuntos = cursor.fetchall()
-            ticket['adjuntos'] = adjuntos
-            
-            # Obtener seguimientos/soluciones del historial
-            cursor.execute(
-                """
-                SELECT id_historial, campo_modificado, valor_nuevo, fecha_modificacion,
-                       nombre_modificador
-                FROM historial_tickets
-                WHERE id_ticket2 = %s AND campo_modificado IN ('seguimiento','solucion')
-                ORDER BY fecha_modificacion ASC
-                """,
-                (id_ticket,)
-            )
-            hist = cursor.fetchall()
-            items = []
-            for r in hist:
-                try:
-                    payload = json.loads(r['valor_nuevo']) if r['valor_nuevo'] else {}
-                except Exception:
-                    payload = {'descripcion': r['valor_nuevo']}
-                items.append({
-                    'id': r['id_historial'],
-                    'tipo': r['campo_modificado'],
-                    'usuario': r.get('nombre_modificador') or 'Sistema',
-                    'fecha': r['fecha_modificacion'].strftime('%Y-%m-%d %H:%M:%S'),
-                    'descripcion': payload.get('descripcion', ''),
-                    'archivos': payload.get('archivos', []) or []
-                })
-            ticket['seguimientos'] = items
+        # El detalle armado se guarda por id y versión: mientras el ticket no
+        # cambie, las aperturas repetidas no vuelven a consultar la base
+        ticket = cache_tickets.obtener(id_ticket, etag)
+        if ticket is None:
+            ticket = _detalle_ticket(cursor, id_ticket)
+            if ticket:
+                cache_tickets.guardar(id_ticket, ticket, etag)
 
         cursor.close()
         conn.close()
@@ -761,8 +1594,9 @@ def obtener_ticket_por_id(id_ticket):
                 "success": False,
                 "message": "Ticket no encontrado"
             }), 404
-        print(ticket)    
-        return jsonify(ticket)
+        respuesta = jsonify(ticket)
+        marcar_version(respuesta, etag, version['ultima'], debil=True)
+        return respuesta
 
     except Exception as e:
         print("Error al obtener el ticket:", e)
@@ -771,6 +1605,293 @@ def obtener_ticket_por_id(id_ticket):
             "message": "Error al obtener el ticket"
         }), 500
 
+@usuarios_bp.route("/tickets/lote", methods=["GET", "POST"])
+def obtener_tickets_lote():
+    """Detalle de varios tickets en una sola solicitud, por ?ids=1,2,3 o por
+    un cuerpo JSON {"ids": [1, 2, 3]}. Devuelve los tickets indexados por id
+    y la lista de los que no existen o están eliminados."""
+    try:
+        if request.method == "POST":
+            ids = (request.get_json(silent=True) or {}).get('ids')
+            if not isinstance(ids, list):
+                raise ValueError("Se requiere una lista 'ids'")
+        else:
+            ids = [i.strip() for i in (request.args.get('ids') or '').split(',') if i.strip()]
+        try:
+            ids = list(dict.fromkeys(int(i) for i in ids))
+        except (TypeError, ValueError):
+            raise ValueError("Los ids deben ser numéricos")
+        if not ids:
+            raise ValueError("Se requiere al menos un id")
+        maximo = LOTES_CONFIG['max_tickets_consulta']
+        if len(ids) > maximo:
+            raise ValueError(f"Se permiten como máximo {maximo} ids por solicitud")
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+
+        # Los tickets sin cambios salen de la misma caché que el detalle
+        # individual; el resto se arma con una sola consulta IN (...)
+        versiones = _versiones_tickets(cursor, ids)
+        tickets = {}
+        pendientes = {}
+        for id_ticket, version in versiones.items():
+            etag = calcular_etag('ticket', id_ticket, *version.values())
+            ticket = cache_tickets.obtener(id_ticket, etag)
+            if ticket is None:
+                pendientes[id_ticket] = etag
+            else:
+                tickets[id_ticket] = ticket
+        if pendientes:
+            for id_ticket, ticket in _detalles_tickets(cursor, list(pendientes)).items():
+                cache_tickets.guardar(id_ticket, ticket, pendientes[id_ticket])
+                tickets[id_ticket] = ticket
+
+        cursor.close()
+        conn.close()
+
+        return jsonify({
+            "success": True,
+            "tickets": {str(i): tickets[i] for i in ids if i in tickets},
+            "no_encontrados": [i for i in ids if i not in tickets]
+        })
+
+    except Exception as e:
+        print("Error al obtener tickets por lote:", e)
+        return jsonify({
+            "success": False,
+            "message": "Error al obtener los tickets"
+        }), 500
+
+
+# Cambios aceptados por PUT /tickets/lote: clave del cuerpo -> columna
+CAMBIOS_LOTE = {
+    'estado': 'estado_ticket',
+    'prioridad': 'prioridad',
+    'categoria': 'id_categoria1',
+    'grupoAsignado': 'id_grupo1',
+    'asignadoA': 'id_tecnico_asignado',
+}
+# Roles a los que se puede asignar un ticket
+ROLES_ASIGNABLES = ('tecnico', 'administrador')
+# Filtros aceptados por PUT /tickets/lote: clave -> columna (ids, estado o prioridad)
+FILTROS_LOTE = {
+    'estado': 'estado_ticket',
+    'prioridad': 'prioridad',
+    'tecnico': 'id_tecnico_asignado',
+    'grupo': 'id_grupo1',
+    'categoria': 'id_categoria1',
+    'solicitante': 'id_usuario_reporta',
+}
+
+
+def _resolver_nombres_lote(cambios, usuario_nombre):
+    """Resuelve desde la caché de referencias los nombres de categoría, grupo,
+    técnico y del usuario que hace el cambio. Devuelve un dict con los ids
+    (None si el nombre no existe), el rol del técnico y el del modificador."""
+    tecnico = referencias.usuario(cambios.get('asignadoA'))
+    modificador, rol = _resolver_usuario_por_nombre(usuario_nombre)
+    return {
+        'categoria': referencias.id_categoria(cambios.get('categoria')),
+        'grupoAsignado': referencias.id_grupo(cambios.get('grupoAsignado')),
+        'asignadoA': tecnico[0] if tecnico else None,
+        'rol_asignado': str(tecnico[1] or '').lower() if tecnico else None,
+        'modificador': modificador,
+        'rol_modificador': rol,
+    }
+
+
+@usuarios_bp.route("/tickets/lote", methods=["PUT"])
+def actualizar_tickets_lote():
+    """Aplica un mismo conjunto de cambios a varios tickets: reasignar
+    técnico o grupo, cambiar estado, prioridad o categoría, o cerrarlos.
+    Cuerpo JSON:
+      {
+        "ids": [1, 2, 3]  o  "filtro": {"tecnico": 7, "estado": "en-curso"},
+        "cambios": {"asignadoA": "Nombre", "grupoAsignado": "Grupo", "estado": "cerrado",
+                    "prioridad": "alta", "categoria": "Categoría"},
+        "usuario": "Nombre de quien hace el cambio", "comentario": "opcional"
+      }
+    Los nombres salen de la caché de referencias, los tickets se actualizan
+    con un solo UPDATE y el historial con un solo INSERT ... SELECT. Un
+    nombre vacío en asignadoA o grupoAsignado deja el ticket sin técnico o
+    sin grupo. Responde 400 si asignadoA no es técnico ni administrador o si
+    un estado o prioridad, en los cambios o en el filtro, no es válido."""
+    data = request.get_json(silent=True) or {}
+    cambios = data.get('cambios')
+    ids = data.get('ids')
+    filtro = data.get('filtro')
+    usuario_nombre = data.get('usuario')
+    comentario = str(data.get('comentario') or '').strip()
+    maximo = LOTES_CONFIG['max_tickets_actualizacion']
+    try:
+        if not isinstance(cambios, dict) or not any(c in cambios for c in CAMBIOS_LOTE):
+            raise ValueError("Se requiere 'cambios' con alguno de: " + ", ".join(CAMBIOS_LOTE))
+        desconocidos = set(cambios) - set(CAMBIOS_LOTE)
+        if desconocidos:
+            raise ValueError("Cambios no soportados: " + ", ".join(sorted(desconocidos)))
+        if 'estado' in cambios:
+            cambios['estado'] = str(cambios['estado'] or '').strip().lower()
+            if cambios['estado'] not in ESTADOS:
+                raise ValueError("estado debe ser uno de: " + ", ".join(sorted(ESTADOS)))
+        if 'prioridad' in cambios:
+            cambios['prioridad'] = str(cambios['prioridad'] or '').strip().lower()
+            if cambios['prioridad'] not in PRIORIDADES:
+                raise ValueError("prioridad debe ser una de: " + ", ".join(sorted(PRIORIDADES)))
+        if 'categoria' in cambios and not cambios['categoria']:
+            raise ValueError("categoria no puede estar vacía")
+        if (ids is None) == (filtro is None):
+            raise ValueError("Indique 'ids' o 'filtro', no ambos")
+        if ids is not None:
+            if not isinstance(ids, list) or not ids:
+                raise ValueError("'ids' debe ser una lista no vacía")
+            try:
+                ids = list(dict.fromkeys(int(i) for i in ids))
+            except (TypeError, ValueError):
+                raise ValueError("Los ids deben ser numéricos")
+            if len(ids) > maximo:
+                raise ValueError(f"Se permiten como máximo {maximo} tickets por solicitud")
+        else:
+            if not isinstance(filtro, dict) or not filtro or set(filtro) - set(FILTROS_LOTE):
+                raise ValueError("'filtro' admite: " + ", ".join(FILTROS_LOTE))
+            for clave, valor in filtro.items():
+                if clave in ('estado', 'prioridad'):
+                    filtro[clave] = str(valor or '').strip().lower()
+                    validos = ESTADOS if clave == 'estado' else PRIORIDADES
+                    if filtro[clave] not in validos:
+                        raise ValueError(f"filtro.{clave} debe ser uno de: " + ", ".join(sorted(validos)))
+                elif not str(valor).isdigit():
+                    raise ValueError(f"filtro.{clave} debe ser un id numérico")
+                else:
+                    filtro[clave] = int(valor)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    conn = None
+    cursor = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+
+        resueltos = _resolver_nombres_lote(cambios, usuario_nombre)
+        for clave in ('categoria', 'grupoAsignado', 'asignadoA'):
+            if cambios.get(clave) and resueltos.get(clave) is None:
+                return jsonify({
+                    "success": False,
+                    "message": f"{clave} '{cambios[clave]}' no existe"
+                }), 400
+        if cambios.get('asignadoA') and resueltos['rol_asignado'] not in ROLES_ASIGNABLES:
+            return jsonify({
+                "success": False,
+                "message": f"asignadoA '{cambios['asignadoA']}' no es técnico ni administrador"
+            }), 400
+
+        # Tickets afectados, bloqueados hasta el commit
+        if ids is not None:
+            marcadores = ', '.join(['%s'] * len(ids))
+            cursor.execute(
+                f"""
+                SELECT id_ticket, id_tecnico_asignado, id_grupo1 FROM tickets
+                WHERE id_ticket IN ({marcadores}) AND estado_ticket != 'eliminado'
+                FOR UPDATE
+                """,
+                ids
+            )
+        else:
+            condiciones = ["estado_ticket != 'eliminado'"]
+            params = []
+            for clave, valor in filtro.items():
+                condiciones.append(f"{FILTROS_LOTE[clave]} = %s")
+                params.append(valor)
+            cursor.execute(
+                f"""
+                SELECT id_ticket, id_tecnico_asignado, id_grupo1 FROM tickets
+                WHERE {' AND '.join(condiciones)}
+                ORDER BY id_ticket
+                LIMIT %s
+                FOR UPDATE
+                """,
+                params + [maximo + 1]
+            )
+        # Técnico y grupo anteriores: el evento también llega a quien los tenía
+        anteriores = {fila['id_ticket']: fila for fila in cursor.fetchall()}
+        afectados = list(anteriores)
+        if len(afectados) > maximo:
+            conn.rollback()
+            return jsonify({
+                "success": False,
+                "message": f"El filtro abarca más de {maximo} tickets; acótelo o use 'ids'"
+            }), 400
+
+        actualizados = 0
+        if afectados:
+            asignaciones, params = [], []
+            for clave, columna in CAMBIOS_LOTE.items():
+                if clave not in cambios:
+                    continue
+                asignaciones.append(f"{columna} = %s")
+                params.append(resueltos.get(clave) if clave in ('categoria', 'grupoAsignado', 'asignadoA')
+                              else cambios[clave])
+            if cambios.get('estado') in ('resuelto', 'cerrado'):
+                asignaciones.append("fecha_cierre = COALESCE(fecha_cierre, NOW())")
+            marcadores = ', '.join(['%s'] * len(afectados))
+            cursor.execute(
+                f"""
+                UPDATE tickets
+                SET {', '.join(asignaciones)}, fecha_actualizacion = NOW()
+                WHERE id_ticket IN ({marcadores})
+                """,
+                params + afectados
+            )
+            actualizados = cursor.rowcount
+
+            # Los triggers registran cada campo; además queda una entrada por
+            # ticket con la operación completa y quién la hizo
+            resumen = "; ".join(f"{clave}: {cambios[clave] or 'ninguno'}"
+                                for clave in CAMBIOS_LOTE if clave in cambios)
+            cursor.execute(
+                f"""
+                INSERT INTO historial_tickets
+                (id_ticket2, campo_modificado, valor_nuevo, descripcion,
+                 modificado_por, nombre_modificador, rol_modificador)
+                SELECT id_ticket, 'actualizacion_lote', %s, %s, %s, %s, %s
+                FROM tickets WHERE id_ticket IN ({marcadores})
+                """,
+                [resumen, comentario, resueltos.get('modificador'), usuario_nombre,
+                 resueltos.get('rol_modificador')] + afectados
+            )
+        conn.commit()
+        _notificar_cambio_tickets(afectados, 'actualizado', anteriores)
+
+        respuesta = {
+            "success": True,
+            "seleccionados": len(afectados),
+            "actualizados": actualizados,
+            "ids": afectados
+        }
+        if ids is not None:
+            encontrados = set(afectados)
+            respuesta["no_encontrados"] = [i for i in ids if i not in encontrados]
+        return jsonify(respuesta), 200
+
+    except Exception as e:
+        print("Error al actualizar tickets por lote:", e)
+        if conn:
+            conn.rollback()
+        return jsonify({
+            "success": False,
+            "message": f"Error al actualizar tickets: {str(e)}"
+        }), 500
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
 @usuarios_bp.route("/tickets/<int:id_ticket>/eliminar", methods=["PUT"])
 def eliminar_ticket_soft(id_ticket):
     """Soft delete: marca el ticket como eliminado sin borrar registros relacionados."""
@@ -802,6 +1923,7 @@ def eliminar_ticket_soft(id_ticket):
             (id_ticket, 'estado_ticket', row['estado_ticket'], 'eliminado', 'Sistema', 'sistema')
         )
         conn.commit()
+        _notificar_cambio_ticket(id_ticket, 'eliminado')
         return jsonify({"success": True, "message": "Ticket marcado como eliminado"}), 200
     except Exception as e:
         if conn:
@@ -842,7 +1964,7 @@ def actualizar_ticket(id_ticket):
 
         # Verificar existencia del ticket
         cursor.execute("""
-            SELECT id_usuario_reporta FROM tickets 
+            SELECT id_usuario_reporta, id_tecnico_asignado, id_grupo1 FROM tickets 
             WHERE id_ticket = %s
         """, (id_ticket,))
         ticket = cursor.fetchone()
@@ -888,14 +2010,10 @@ def actualizar_ticket(id_ticket):
 
         # Mapear nombre de categoría a id
         if 'categoria' in data and data.get('categoria'):
-            cursor.execute(
-                "SELECT id_categoria FROM categorias WHERE nombre_categoria = %s",
-                (str(data['categoria']),)
-            )
-            cat = cursor.fetchone()
-            if cat:
+            id_categoria = referencias.id_categoria(str(data['categoria']))
+            if id_categoria:
                 updates.append("id_categoria1 = %s")
-                params.append(cat['id_categoria'])
+                params.append(id_categoria)
 
         # Mapear estado a formato esperado en BD (minúsculas)
         if 'estado' in data and data.get('estado'):
@@ -907,14 +2025,10 @@ def actualizar_ticket(id_ticket):
         if 'grupoAsignado' in data:
             nombre_grupo = data.get('grupoAsignado')
             if nombre_grupo:
-                cursor.execute(
-                    "SELECT id_grupo FROM grupos WHERE nombre_grupo = %s",
-                    (str(nombre_grupo),)
-                )
-                g = cursor.fetchone()
-                if g:
+                id_grupo = referencias.id_grupo(str(nombre_grupo))
+                if id_grupo:
                     updates.append("id_grupo1 = %s")
-                    params.append(g['id_grupo'])
+                    params.append(id_grupo)
             else:
                 # limpiar grupo si llega vacío
                 updates.append("id_grupo1 = %s")
@@ -924,14 +2038,10 @@ def actualizar_ticket(id_ticket):
         if 'asignadoA' in data:
             nombre_tecnico = data.get('asignadoA')
             if nombre_tecnico:
-                cursor.execute(
-                    "SELECT id_usuario FROM usuarios WHERE nombre_completo = %s",
-                    (str(nombre_tecnico),)
-                )
-                t = cursor.fetchone()
-                if t:
+                tecnico = referencias.usuario(str(nombre_tecnico))
+                if tecnico:
                     updates.append("id_tecnico_asignado = %s")
-                    params.append(t['id_usuario'])
+                    params.append(tecnico[0])
             else:
                 updates.append("id_tecnico_asignado = %s")
                 params.append(None)
@@ -989,6 +2099,7 @@ def actualizar_ticket(id_ticket):
             ))
 
         conn.commit()
+        _notificar_cambio_ticket(id_ticket, 'actualizado', anterior=ticket)
         return jsonify({
             "success": True,
             "message": "Ticket actualizado correctamente"
@@ -1013,6 +2124,9 @@ def actualizar_ticket(id_ticket):
 def historial_ticket(id_ticket):
     """Devuelve el historial completo del ticket ordenado cronológicamente (ASC).
     Incluye: creación, cambios de campos clave, seguimientos, soluciones, encuestas.
+    Los cambios de campos de tickets cerrados hace tiempo se mueven a
+    historial_tickets_archivo (ver archivo_historial.py); solo se leen con
+    ?incluir_archivo=1.
     Estructura de cada item:
       {
         id: <int|None>,
@@ -1053,18 +2167,18 @@ def historial_ticket(id_ticket):
                 'fecha': tk['fecha_creacion'].strftime('%Y-%m-%d %H:%M:%S') if hasattr(tk['fecha_creacion'], 'strftime') else str(tk['fecha_creacion'])
             })
 
-        # Historial desde historial_tickets
-        cursor.execute(
-            """
-            SELECT id_historial, campo_modificado, valor_anterior, valor_nuevo, fecha_modificacion,
-                   nombre_modificador
-            FROM historial_tickets
-            WHERE id_ticket2 = %s
-            ORDER BY fecha_modificacion ASC
-            """,
-            (id_ticket,)
-        )
+        # Historial desde historial_tickets (y el archivo si se pide)
+        columnas = """id_historial, campo_modificado, valor_anterior, valor_nuevo, fecha_modificacion,
+                   nombre_modificador, descripcion, calificacion"""
+        query = f"SELECT {columnas} FROM historial_tickets WHERE id_ticket2 = %s"
+        params = [id_ticket]
+        incluir_archivo = request.args.get('incluir_archivo') == '1'
+        if incluir_archivo:
+            query += f" UNION ALL SELECT {columnas} FROM historial_tickets_archivo WHERE id_ticket2 = %s"
+            params.append(id_ticket)
+        cursor.execute(query + " ORDER BY fecha_modificacion ASC", params)
         rows = cursor.fetchall()
+        archivos_por_historial = _archivos_historial(cursor, id_ticket)
 
         for r in rows:
             campo = r['campo_modificado']
@@ -1076,18 +2190,13 @@ def historial_ticket(id_ticket):
 
             if campo in ('seguimiento', 'solucion', 'encuesta'):
                 tipo = campo  # usar el propio nombre como tipo
-                # Parsear JSON si aplica
-                try:
-                    payload = json.loads(valor_nuevo) if valor_nuevo else {}
-                except Exception:
-                    payload = {'descripcion': valor_nuevo}
-                descripcion = payload.get('descripcion') or payload.get('comentario')
+                descripcion = r.get('descripcion')
                 if campo in ('seguimiento', 'solucion'):
-                    archivos = payload.get('archivos', []) or []
+                    archivos = archivos_por_historial.get(r['id_historial'], [])
                 # Para encuesta, mantener valor_nuevo legible
                 if campo == 'encuesta':
                     # Mostrar calificación
-                    cal = payload.get('calificacion')
+                    cal = r.get('calificacion')
                     if cal is not None:
                         descripcion = f"Encuesta: calificación {cal}/5 - {descripcion or ''}".strip()
                 valor_anterior = None
@@ -1110,7 +2219,8 @@ def historial_ticket(id_ticket):
         # Ya vienen ordenados ASC por la query; si queremos reforzar:
         eventos.sort(key=lambda x: x['fecha'])
 
-        return jsonify({'success': True, 'ticket_id': id_ticket, 'eventos': eventos})
+        return jsonify({'success': True, 'ticket_id': id_ticket, 'eventos': eventos,
+                        'incluye_archivo': incluir_archivo})
     except Exception as e:
         if conn:
             conn.rollback()
@@ -1132,7 +2242,7 @@ def listar_seguimientos(id_ticket):
 
         cursor.execute(
             """
-            SELECT id_historial, campo_modificado, valor_nuevo, fecha_modificacion,
+            SELECT id_historial, campo_modificado, descripcion, fecha_modificacion,
                    nombre_modificador
             FROM historial_tickets
             WHERE id_ticket2 = %s AND campo_modificado IN ('seguimiento','solucion')
@@ -1141,27 +2251,19 @@ def listar_seguimientos(id_ticket):
             (id_ticket,)
         )
         rows = cursor.fetchall()
+        archivos_por_historial = _archivos_historial(cursor, id_ticket)
         cursor.close()
         conn.close()
 
         items = []
         for r in rows:
-            desc = ""
-            archivos = []
-            try:
-                payload = json.loads(r['valor_nuevo']) if r['valor_nuevo'] else {}
-                desc = payload.get('descripcion', '')
-                archivos = payload.get('archivos', []) or []
-            except Exception:
-                desc = r['valor_nuevo'] or ''
-
             items.append({
                 'id': r['id_historial'],
                 'tipo': r['campo_modificado'],
                 'usuario': r.get('nombre_modificador') or 'Sistema',
                 'fecha': r['fecha_modificacion'].strftime('%Y-%m-%d %H:%M:%S'),
-                'descripcion': desc,
-                'archivos': archivos
+                'descripcion': r['descripcion'] or '',
+                'archivos': archivos_por_historial.get(r['id_historial'], [])
             })
 
         return jsonify(items)
@@ -1172,6 +2274,148 @@ def listar_seguimientos(id_ticket):
         }), 500
 
 
+def _notificar_cambio_ticket(id_ticket, tipo, anterior=None):
+    """Publica el cambio de un ticket a los suscriptores de /tickets/eventos.
+    Se llama después del commit; un fallo aquí no afecta la respuesta.
+    También descarta el detalle del ticket guardado en caché y lo vuelve a
+    indexar para la búsqueda, cuyos resultados de tickets guardados se
+    descartan.
+    `anterior` es la fila leída antes del UPDATE (id_tecnico_asignado,
+    id_grupo1) cuando el cambio puede reasignar el ticket."""
+    _notificar_cambio_tickets([id_ticket], tipo,
+                              {int(id_ticket): anterior} if anterior else None)
+
+
+def _notificar_cambio_tickets(ids, tipo, anteriores=None):
+    """Igual que _notificar_cambio_ticket para varios tickets, con una consulta
+    para reindexar y otra para armar los eventos. `anteriores` es
+    {id_ticket: fila anterior al UPDATE}."""
+    ids = [int(i) for i in ids]
+    if not ids:
+        return
+    for id_ticket in ids:
+        cache_tickets.invalidar(id_ticket)
+    # Los listados revalidados con el ETag anterior vuelven completos
+    avanzar_version('tickets')
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        if indice_busqueda.listo:
+            indice_busqueda.refrescar_tickets(cursor, ids)
+        # Después de reindexar, para no volver a guardar una respuesta vieja;
+        # solo se descartan los resultados de tickets
+        cache_busqueda.avanzar('tickets')
+        marcadores = ', '.join(['%s'] * len(ids))
+        cursor.execute(
+            f"""
+            SELECT id_ticket, estado_ticket, id_tecnico_asignado, id_grupo1, id_usuario_reporta
+            FROM tickets WHERE id_ticket IN ({marcadores})
+            """,
+            ids
+        )
+        filas = cursor.fetchall()
+        cursor.close()
+        fecha = datetime.now().strftime(FORMATO_FECHA)
+        for fila in filas:
+            evento = {
+                'tipo': tipo,
+                'id_ticket': int(fila['id_ticket']),
+                'estado': fila['estado_ticket'],
+                'id_tecnico': fila['id_tecnico_asignado'],
+                'id_grupo': fila['id_grupo1'],
+                'id_solicitante': fila['id_usuario_reporta'],
+                'fecha': fecha
+            }
+            anterior = (anteriores or {}).get(int(fila['id_ticket']))
+            if anterior:
+                # Quien tenía el ticket asignado también recibe el evento
+                evento['id_tecnico_anterior'] = anterior['id_tecnico_asignado']
+                evento['id_grupo_anterior'] = anterior['id_grupo1']
+            canal_tickets.publicar(evento)
+    except Exception as e:
+        cache_busqueda.avanzar('tickets')
+        print("Error al notificar cambio de ticket:", e)
+
+
+def _notificar_cambio_usuario(id_usuario):
+    """Actualiza el índice de búsqueda y descarta los resultados de búsqueda
+    guardados que muestran usuarios tras crearlo, modificarlo o eliminarlo. Se llama después del commit; un
+    fallo aquí no afecta la respuesta."""
+    _notificar_cambio_usuarios([id_usuario])
+
+
+def _notificar_cambio_usuarios(ids):
+    """Igual que _notificar_cambio_usuario para varios usuarios, con una consulta."""
+    invalidar_referencias('usuarios')
+    # Los listados de tickets muestran nombres de usuarios
+    avanzar_version('tickets')
+    # Un cambio de estado, rol o contraseña revoca los tokens ya emitidos: el
+    # hilo de la lista de revocación recarga sin esperar a su intervalo
+    revocaciones.invalidar()
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        if indice_busqueda.listo:
+            indice_busqueda.refrescar_usuarios(cursor, ids)
+        # Después de reindexar, para no volver a guardar una respuesta vieja;
+        # invalida los usuarios y los tickets (muestran sus nombres)
+        cache_busqueda.avanzar('usuarios')
+        cursor.close()
+    except Exception as e:
+        cache_busqueda.avanzar('usuarios')
+        print("Error al notificar cambio de usuario:", e)
+
+
+@usuarios_bp.route("/tickets/eventos", methods=["GET"])
+@sesion_requerida
+def eventos_tickets():
+    """Canal Server-Sent Events con los cambios de tickets (creación,
+    actualización, seguimientos, soluciones, encuestas y eliminación).
+    Filtros opcionales: tecnico, grupo, solicitante (ids). EventSource no
+    envía cabeceras, así que el token de sesión puede ir en ?token=. Cada
+    evento trae tipo, id_ticket y estado (y, si el cambio reasignó el
+    ticket, id_tecnico_anterior e id_grupo_anterior: los filtros tecnico y
+    grupo coinciden con el valor nuevo o con el anterior); el cliente
+    vuelve a pedir el ticket si le interesa. No usa conexión a la base de
+    datos mientras está abierto.
+    Permisos: el rol usuario solo recibe los eventos de sus propios tickets
+    (el filtro solicitante se fija a su id) y solo el administrador puede
+    suscribirse sin filtros. Con EVENTOS_CONFIG['max_conexiones'] clientes
+    abiertos responde 503."""
+    rol, usuario_id = identidad_solicitud()
+    rol = rol.strip().lower()
+
+    filtros = {}
+    for parametro, clave in (('tecnico', 'id_tecnico'), ('grupo', 'id_grupo'),
+                             ('solicitante', 'id_solicitante')):
+        valor = request.args.get(parametro)
+        if valor:
+            if not valor.isdigit():
+                return jsonify({'success': False, 'message': f'{parametro} debe ser numérico'}), 400
+            filtros[clave] = int(valor)
+
+    if rol == 'usuario':
+        if not str(usuario_id).isdigit():
+            return jsonify({'success': False, 'message': 'usuario_id debe ser numérico'}), 400
+        filtros['id_solicitante'] = int(usuario_id)
+    elif rol != 'administrador' and not filtros:
+        return jsonify({'success': False,
+                        'message': 'Indique tecnico, grupo o solicitante para suscribirse'}), 403
+
+    # Se suscribe antes de responder para poder devolver 503 con el canal lleno
+    try:
+        token, cola = canal_tickets.suscribir(filtros)
+    except CanalLleno as e:
+        return jsonify({'success': False, 'message': str(e)}), 503
+    respuesta = Response(
+        canal_tickets.stream(token, cola),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    respuesta.call_on_close(lambda: canal_tickets.desuscribir(token))
+    return respuesta
+
+
 def _guardar_archivos_adjuntos(files):
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
     guardados = []
@@ -1184,21 +2428,52 @@ def _guardar_archivos_adjuntos(files):
     return guardados
 
 
-def _resolver_usuario_por_nombre(nombre_completo):
-    if not nombre_completo:
-        return None, None
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+def _registrar_historial(cursor, id_ticket, campo, modificado_por, nombre, rol,
+                         descripcion='', archivos=(), calificacion=None):
+    """Inserta un seguimiento, solución o encuesta en las columnas tipadas
+    del historial y sus archivos en historial_adjuntos."""
     cursor.execute(
-        "SELECT id_usuario, nombre_completo, rol FROM usuarios WHERE nombre_completo = %s",
-        (nombre_completo,)
+        """
+        INSERT INTO historial_tickets
+        (id_ticket2, campo_modificado, descripcion, calificacion,
+         modificado_por, nombre_modificador, rol_modificador)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """,
+        (id_ticket, campo, descripcion, calificacion, modificado_por, nombre, rol)
     )
-    row = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    if not row:
+    id_historial = cursor.lastrowid
+    if archivos:
+        cursor.executemany(
+            "INSERT INTO historial_adjuntos (id_historial, nombre_archivo) VALUES (%s, %s)",
+            [(id_historial, nombre_archivo) for nombre_archivo in archivos]
+        )
+    return id_historial
+
+
+def _archivos_historial(cursor, id_ticket):
+    """Archivos de los seguimientos/soluciones de un ticket: {id_historial: [nombres]}."""
+    cursor.execute(
+        """
+        SELECT ha.id_historial, ha.nombre_archivo
+        FROM historial_adjuntos ha
+        JOIN historial_tickets h ON h.id_historial = ha.id_historial
+        WHERE h.id_ticket2 = %s
+        ORDER BY ha.id_historial_adjunto
+        """,
+        (id_ticket,)
+    )
+    archivos = {}
+    for fila in cursor.fetchall():
+        archivos.setdefault(fila['id_historial'], []).append(fila['nombre_archivo'])
+    return archivos
+
+
+def _resolver_usuario_por_nombre(nombre_completo):
+    """Resuelve (id_usuario, rol) por nombre completo desde la caché de
+    referencias (ver referencias.py)."""
+    if not nombre_completo:
         return None, None
-    return row['id_usuario'], row['rol']
+    return referencias.usuario(nombre_completo) or (None, None)
 
 
 @usuarios_bp.route("/tickets/<int:id_ticket>/seguimientos", methods=["POST"])
@@ -1231,18 +2506,8 @@ def agregar_seguimiento(id_ticket):
         modificado_por, rol_mod = _resolver_usuario_por_nombre(usuario_nombre)
 
         # Insertar en historial
-        payload = {
-            'descripcion': descripcion,
-            'archivos': nombres_archivos
-        }
-        cursor.execute(
-            """
-            INSERT INTO historial_tickets
-            (id_ticket2, campo_modificado, valor_nuevo, modificado_por, nombre_modificador, rol_modificador)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """,
-            (id_ticket, tipo, json.dumps(payload, ensure_ascii=False), modificado_por, usuario_nombre, rol_mod)
-        )
+        _registrar_historial(cursor, id_ticket, tipo, modificado_por, usuario_nombre, rol_mod,
+                             descripcion=descripcion, archivos=nombres_archivos)
 
         # Si es solución, actualizar estado del ticket y fecha_cierre
         if tipo == 'solucion':
@@ -1252,6 +2517,7 @@ def agregar_seguimiento(id_ticket):
             )
 
         conn.commit()
+        _notificar_cambio_ticket(id_ticket, tipo)
         return jsonify({'success': True, 'message': 'Registro guardado correctamente'}), 201
     except Exception as e:
         if conn:
@@ -1294,20 +2560,14 @@ def solucionar_ticket(id_ticket):
 
             nombres_archivos = _guardar_archivos_adjuntos(archivos)
             modificado_por, rol_mod = _resolver_usuario_por_nombre(usuario_nombre)
-            payload = {'descripcion': descripcion, 'archivos': nombres_archivos}
-            cursor.execute(
-                """
-                INSERT INTO historial_tickets
-                (id_ticket2, campo_modificado, valor_nuevo, modificado_por, nombre_modificador, rol_modificador)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                """,
-                (id_ticket, 'solucion', json.dumps(payload, ensure_ascii=False), modificado_por, usuario_nombre, rol_mod)
-            )
+            _registrar_historial(cursor, id_ticket, 'solucion', modificado_por, usuario_nombre, rol_mod,
+                                 descripcion=descripcion, archivos=nombres_archivos)
             cursor.execute(
                 "UPDATE tickets SET estado_ticket = %s, fecha_cierre = NOW(), fecha_actualizacion = NOW() WHERE id_ticket = %s",
                 ('resuelto', id_ticket)
             )
             conn.commit()
+            _notificar_cambio_ticket(id_ticket, 'solucion')
             return jsonify({'success': True, 'message': 'Solución guardada y ticket resuelto'}), 201
         except Exception as e:
             if conn:
@@ -1338,20 +2598,14 @@ def solucionar_ticket(id_ticket):
                 if not cursor.fetchone():
                     return jsonify({'success': False, 'message': 'Ticket no encontrado'}), 404
                 modificado_por, rol_mod = _resolver_usuario_por_nombre(usuario_nombre)
-                payload = {'descripcion': descripcion, 'archivos': []}
-                cursor.execute(
-                    """
-                    INSERT INTO historial_tickets
-                    (id_ticket2, campo_modificado, valor_nuevo, modificado_por, nombre_modificador, rol_modificador)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    """,
-                    (id_ticket, 'solucion', json.dumps(payload, ensure_ascii=False), modificado_por, usuario_nombre, rol_mod)
-                )
+                _registrar_historial(cursor, id_ticket, 'solucion', modificado_por, usuario_nombre, rol_mod,
+                                     descripcion=descripcion)
                 cursor.execute(
                     "UPDATE tickets SET estado_ticket = %s, fecha_cierre = NOW(), fecha_actualizacion = NOW() WHERE id_ticket = %s",
                     ('resuelto', id_ticket)
                 )
                 conn.commit()
+                _notificar_cambio_ticket(id_ticket, 'solucion')
                 return jsonify({'success': True, 'message': 'Solución guardada y ticket resuelto'}), 201
             except Exception as e:
                 if conn:
@@ -1374,7 +2628,6 @@ def encuesta_satisfaccion():
         calificacion = data.get('calificacion')
         comentario = str(data.get('comentario') or '').strip()
         usuario_nombre = data.get('usuario')
-        fecha = data.get('fecha')  # opcional, informativo
 
         # Validaciones básicas
         if not ticket_id:
@@ -1393,19 +2646,8 @@ def encuesta_satisfaccion():
             return jsonify({'success': False, 'message': 'Ticket no encontrado'}), 404
 
         modificado_por, rol_mod = _resolver_usuario_por_nombre(usuario_nombre)
-        payload = {
-            'calificacion': calificacion,
-            'comentario': comentario,
-            'fecha': fecha
-        }
-        cursor.execute(
-            """
-            INSERT INTO historial_tickets
-            (id_ticket2, campo_modificado, valor_nuevo, modificado_por, nombre_modificador, rol_modificador)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """,
-            (ticket_id, 'encuesta', json.dumps(payload, ensure_ascii=False), modificado_por, usuario_nombre, rol_mod)
-        )
+        _registrar_historial(cursor, ticket_id, 'encuesta', modificado_por, usuario_nombre, rol_mod,
+                             descripcion=comentario, calificacion=calificacion)
 
         # Al registrar la encuesta, cerrar el ticket
         cursor.execute(
@@ -1420,6 +2662,7 @@ def encuesta_satisfaccion():
         )
 
         conn.commit()
+        _notificar_cambio_ticket(ticket_id, 'encuesta')
         return jsonify({'success': True, 'message': 'Encuesta registrada correctamente', 'nuevo_estado': 'cerrado'}), 201
     except Exception as e:
         if conn:
@@ -1431,39 +2674,23 @@ def encuesta_satisfaccion():
         if conn:
             conn.close()
 @usuarios_bp.route("/estado_tickets", methods=["GET"])
+@sesion_requerida
 def obtener_estado_tickets():
     estado = request.args.get("estado")
-    usuario_id = request.args.get("usuario_id")
-    rol = request.args.get("rol")
+    rol, usuario_id = identidad_solicitud()
     incluir_eliminados = request.args.get("incluir_eliminados")  # '1' para incluir eliminados aunque no se pida un estado específico
 
     try:
+        pagina = _parametros_paginacion()
+        formato = _formato_streaming()
+        campos = _campos_solicitados([
+            'id', 'titulo', 'descripcion', 'prioridad', 'estado', 'tipo', 'ubicacion',
+            'fecha_creacion', 'ultimaActualizacion', 'categoria', 'solicitante',
+            'solicitanteId', 'tecnicoId', 'tecnico'
+        ])
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
-        query = """
-            SELECT 
-                t.id_ticket as id,
-                t.titulo,
-                t.descripcion,
-                t.prioridad,
-                t.estado_ticket as estado,
-                t.tipo,
-                t.ubicacion,
-                t.fecha_creacion,
-                t.fecha_actualizacion as ultimaActualizacion,
-                c.nombre_categoria AS categoria,
-                u.nombre_completo AS solicitante,
-                u.id_usuario AS solicitanteId,
-                t.id_tecnico_asignado AS tecnicoId,
-                tech.nombre_completo AS tecnico
-            FROM tickets t
-            LEFT JOIN categorias c ON t.id_categoria1 = c.id_categoria
-            LEFT JOIN usuarios_tickets ut ON t.id_ticket = ut.id_ticket3
-            LEFT JOIN usuarios u ON ut.id_usuario1 = u.id_usuario
-            LEFT JOIN usuarios tech ON t.id_tecnico_asignado = tech.id_usuario
-        """
-
         conditions = []
         params = []
 
@@ -1478,32 +2705,28 @@ def obtener_estado_tickets():
             if incluir_eliminados != '1':
                 conditions.append("t.estado_ticket != 'eliminado'")
 
+        joins = []
         if rol and rol.lower() not in ['administrador', 'tecnico'] and usuario_id:
             conditions.append("ut.id_usuario1 = %s")
             params.append(usuario_id)
+            joins.append('ut')
 
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-
-        # Ordenar por fecha de creación descendente (más reciente primero)
-        query += " ORDER BY t.fecha_creacion DESC"
+        query = _select_tickets(campos, joins)
 
-        cursor.execute(query, params)
-        tickets = cursor.fetchall()
+        # Ordenado por fecha de creación descendente (más reciente primero)
+        if formato:
+            query, params = _consulta_listado(query, conditions, params)
+            return _respuesta_streaming(conn, query, params, formato, _formatear_fechas_ticket)
 
-        # Formatear fechas
-        for ticket in tickets:
-            ticket['fecha_creacion'] = ticket['fecha_creacion'].strftime(
-                '%Y-%m-%d %H:%M:%S')
-            if ticket['ultimaActualizacion']:
-                ticket['ultimaActualizacion'] = ticket['ultimaActualizacion'].strftime(
-                    '%Y-%m-%d %H:%M:%S')
+        tickets = _listar_tickets(cursor, query, conditions, params, pagina, joins)
 
         cursor.close()
         conn.close()
 
         return jsonify(tickets)
 
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
         print("Error al obtener tickets:", e)
         return jsonify({
@@ -1515,6 +2738,7 @@ def obtener_estado_tickets():
 @usuarios_bp.route("/tickets/tecnico/<int:id_tecnico>", methods=["GET"])
 def obtener_tickets_por_tecnico(id_tecnico):
     try:
+        pagina = _parametros_paginacion()
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
@@ -1539,26 +2763,17 @@ def obtener_tickets_por_tecnico(id_tecnico):
     LEFT JOIN usuarios_tickets ut ON t.id_ticket = ut.id_ticket3
     LEFT JOIN usuarios u ON ut.id_usuario1 = u.id_usuario
     LEFT JOIN usuarios tech ON t.id_tecnico_asignado = tech.id_usuario
-    WHERE t.id_tecnico_asignado = %s AND t.estado_ticket != 'eliminado'
-    ORDER BY t.fecha_creacion DESC
 """
-
-        cursor.execute(query, (id_tecnico,))
-        tickets = cursor.fetchall()
-        print(tickets)
-        # Formatear fechas
-        for ticket in tickets:
-            ticket['fecha_creacion'] = ticket['fecha_creacion'].strftime(
-                '%Y-%m-%d %H:%M:%S')
-            if ticket['ultimaActualizacion']:
-                ticket['ultimaActualizacion'] = ticket['ultimaActualizacion'].strftime(
-                    '%Y-%m-%d %H:%M:%S')
+        conditions = ["t.id_tecnico_asignado = %s", "t.estado_ticket != 'eliminado'"]
+        tickets = _listar_tickets(cursor, query, conditions, [id_tecnico], pagina)
 
         cursor.close()
         conn.close()
 
         return jsonify(tickets)
 
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
         print("Error al obtener tickets por técnico:", e)
         return jsonify({
@@ -1567,28 +2782,210 @@ def obtener_tickets_por_tecnico(id_tecnico):
         }), 500
 
 
+def _expresion_fulltext(q, modo):
+    """Texto para AGAINST a partir de la consulta, o None si ningún término
+    alcanza la longitud indexada. En modo booleano cada término es
+    obligatorio y admite prefijo (+term*)."""
+    terminos = [t for t in re.split(r'[^\w]+', q) if len(t) >= LONGITUD_MINIMA_FULLTEXT]
+    if not terminos:
+        return None
+    if modo == 'natural':
+        return ' '.join(terminos)
+    return ' '.join(f'+{t}*' for t in terminos)
+
+
+def _filtro_texto(columnas, expresion, modo, patron):
+    """Condición y orden por relevancia sobre `columnas`: MATCH ... AGAINST
+    si hay expresión FULLTEXT, LIKE %q% si no.
+    Devuelve (condicion, params_condicion, orden, params_orden)."""
+    if expresion is None:
+        condicion = "(" + " OR ".join(f"{c} LIKE %s" for c in columnas) + ")"
+        return condicion, [patron] * len(columnas), None, []
+    match = f"MATCH({', '.join(columnas)}) AGAINST (%s IN {MODOS_BUSQUEDA[modo]} MODE)"
+    return match, [expresion], f"{match} DESC", [expresion]
+
+
+def _limitar_tiempo_sentencias(conn, cursor, segundos):
+    """Limita en el servidor la duración de cada sentencia de la sesión
+    (0 quita el límite). MariaDB usa max_statement_time en segundos y MySQL
+    max_execution_time en milisegundos (solo afecta a los SELECT)."""
+    if 'mariadb' in (conn.get_server_info() or '').lower():
+        cursor.execute("SET SESSION max_statement_time = %s", (float(segundos),))
+    else:
+        cursor.execute("SET SESSION max_execution_time = %s", (int(segundos * 1000),))
+
+
+def _subconsulta_busqueda(funcion, *args):
+    """Ejecuta una subconsulta de la búsqueda global en un hilo del ejecutor,
+    con su propia conexión del pool. Devuelve (filas, milisegundos).
+
+    El servidor corta la sentencia al llegar a timeout_subconsulta, así que
+    una subconsulta omitida por tiempo no sigue ocupando la conexión."""
+    inicio = perf_counter()
+    conn = get_db_connection()
+    if conn is None:
+        raise RuntimeError("sin conexión a la base de datos")
+    cursor = conn.cursor(dictionary=True)
+    try:
+        _limitar_tiempo_sentencias(conn, cursor, BUSQUEDA_CONFIG['timeout_subconsulta'])
+        try:
+            filas = funcion(cursor, *args)
+        finally:
+            try:
+                _limitar_tiempo_sentencias(conn, cursor, 0)
+            except Exception as e:
+                # Una conexión que no responde al SET no pasa el ping al
+                # volver a prestarse y el pool la reemplaza
+                print("Búsqueda: no se pudo quitar el límite de tiempo:", e)
+    finally:
+        cursor.close()
+        conn.close()
+    return filas, round((perf_counter() - inicio) * 1000, 2)
+
+
+def _liberar_cupo_al_terminar(futuros):
+    """Devuelve el cupo de _cupos_busqueda cuando terminan (o se cancelan)
+    todas las subconsultas de una búsqueda, aunque la respuesta ya se haya
+    enviado sin las que superaron el tiempo."""
+    pendientes = [len(futuros)]
+    lock = threading.Lock()
+
+    def terminado(_futuro):
+        with lock:
+            pendientes[0] -= 1
+            if pendientes[0]:
+                return
+        _cupos_busqueda.release()
+
+    for futuro in futuros:
+        futuro.add_done_callback(terminado)
+
+
+def _buscar_tickets_db(cursor, q, patron, expresion, modo, rol, usuario_id):
+    # Aplicar restricción si rol usuario: sólo sus tickets
+    es_num = q.isdigit()
+    condicion, params_t, orden, params_orden = _filtro_texto(
+        ['t.titulo', 't.descripcion'], expresion, modo, patron)
+    base_where = [condicion]
+    if es_num:
+        base_where.append("t.id_ticket = %s")
+        params_t.append(int(q))
+    where_ticket = "(" + " OR ".join(base_where) + ")"
+    if rol == 'usuario' and usuario_id:
+        where_ticket += " AND ut.id_usuario1 = %s"
+        params_t.append(usuario_id)
+    if es_num:
+        # El ticket con ese número va primero aunque su texto no coincida
+        orden = ", ".join(filter(None, ["t.id_ticket = %s DESC", orden]))
+        params_orden = [int(q)] + params_orden
+    orden_ticket = ", ".join(filter(None, [orden, "t.fecha_creacion DESC"]))
+    cursor.execute(f"""
+        SELECT 
+            t.id_ticket AS id,
+            t.titulo,
+            LEFT(t.descripcion, 180) AS descripcion,
+            t.estado_ticket AS estado,
+            t.prioridad,
+            sol.nombre_completo AS solicitante,
+            tec.nombre_completo AS tecnico
+        FROM tickets t
+        LEFT JOIN usuarios_tickets ut ON t.id_ticket = ut.id_ticket3
+        LEFT JOIN usuarios sol ON ut.id_usuario1 = sol.id_usuario
+        LEFT JOIN usuarios tec ON t.id_tecnico_asignado = tec.id_usuario
+        WHERE {where_ticket} AND t.estado_ticket != 'eliminado'
+        ORDER BY {orden_ticket}
+        LIMIT 10
+    """, params_t + params_orden)
+    return cursor.fetchall()
+
+
+def _buscar_usuarios_db(cursor, patron, expresion, modo):
+    condicion, params_u, orden, params_orden = _filtro_texto(
+        ['u.nombre_completo', 'u.nombre_usuario', 'u.correo'], expresion, modo, patron)
+    orden_usuario = ", ".join(filter(None, [orden, "u.fecha_registro DESC"]))
+    cursor.execute(
+        f"""
+        SELECT 
+            u.id_usuario AS id,
+            u.nombre_completo,
+            u.nombre_usuario,
+            u.correo,
+            u.rol,
+            u.estado
+        FROM usuarios u
+        WHERE {condicion}
+        ORDER BY {orden_usuario}
+        LIMIT 10
+        """,
+        params_u + params_orden
+    )
+    return cursor.fetchall()
+
+
+def _buscar_categorias_db(cursor, patron):
+    cursor.execute(
+        """
+        SELECT c.id_categoria AS id, c.nombre_categoria AS nombre
+        FROM categorias c
+        WHERE c.nombre_categoria LIKE %s
+        ORDER BY c.nombre_categoria ASC
+        LIMIT 10
+        """,
+        (patron,)
+    )
+    return cursor.fetchall()
+
+
+def _buscar_grupos_db(cursor, patron):
+    cursor.execute(
+        """
+        SELECT g.id_grupo AS id, g.nombre_grupo AS nombre
+        FROM grupos g
+        WHERE g.nombre_grupo LIKE %s
+        ORDER BY g.nombre_grupo ASC
+        LIMIT 10
+        """,
+        (patron,)
+    )
+    return cursor.fetchall()
+
+
 @usuarios_bp.route("/buscar", methods=["GET"])
+@sesion_requerida
 def buscar_global():
     """Búsqueda global simple sobre tickets, usuarios, categorías y grupos.
     Parámetro: q (string)
+    Parámetro opcional: modo ('booleano' | 'natural'). Sin modo, si el
+    índice en memoria está cargado (busqueda.py: título y extracto de la
+    descripción) se responde desde él sin consultar la base (modo
+    'memoria'); si no, se usa 'booleano'.
     Reglas:
       - Mínimo 2 caracteres
       - Limita 10 resultados por grupo
-      - Coincidencia LIKE %q%
+      - Tickets y usuarios: FULLTEXT ordenado por relevancia; si ningún
+        término llega a LONGITUD_MINIMA_FULLTEXT se usa LIKE %q%
+      - Categorías y grupos: LIKE %q% (tablas pequeñas)
       - Tickets: también permite búsqueda por ID numérico exacto
+      - Rol usuario: solo sus propios tickets
+      - En la base, con BUSQUEDA_CONFIG['max_simultaneas'] búsquedas en
+        curso responde 503
     Respuesta:
       {
         'query': q,
         'results': { tickets: [...], usuarios: [...], categorias: [...], grupos: [...] },
         'counts': { ... },
         'took_ms': <float>,
+        'tiempos_ms': { grupo consultado: <float|None>, ... },  # solo en la base
+        'incompletos': [grupos sin respuesta a tiempo],        # solo en la base
+        'modo': 'memoria' | 'booleano' | 'natural' | 'like',
+        'cache': [grupos que salieron de la caché de búsquedas],
         'success': True
       }
     """
     inicio = perf_counter()
     q = (request.args.get('q') or '').strip()
-    rol = (request.args.get('rol') or '').strip().lower()
-    usuario_id = request.args.get('usuario_id')  # puede ser None
+    rol, usuario_id = identidad_solicitud()
+    rol = rol.strip().lower()
     if len(q) < 2:
         return jsonify({
             'success': True,
@@ -1598,113 +2995,89 @@ def buscar_global():
             'message': 'Ingrese al menos 2 caracteres'
         })
 
+    modo = (request.args.get('modo') or '').strip().lower()
+    if not modo and BUSQUEDA_CONFIG['indice_memoria'] and indice_busqueda.listo:
+        modo = 'memoria'
+    modo = modo or 'booleano'
+    if modo != 'memoria' and modo not in MODOS_BUSQUEDA:
+        return jsonify({'success': False, 'message': "modo debe ser 'booleano' o 'natural'"}), 400
     patron = f"%{q}%"
-    es_num = q.isdigit()
-    conn = None
-    cursor = None
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        # Tickets (aplicar restricción si rol usuario: sólo sus tickets)
-        params_t = [patron, patron]
-        base_where = ["(t.titulo LIKE %s OR t.descripcion LIKE %s)"]
-        if es_num:
-            base_where.append("t.id_ticket = %s")
-            params_t.append(int(q))
-        if rol == 'usuario' and usuario_id:
-            base_where.append("ut.id_usuario1 = %s")
-            params_t.append(usuario_id)
-        where_ticket = "(" + " OR ".join(base_where) + ")"
-        cursor.execute(f"""
-            SELECT 
-                t.id_ticket AS id,
-                t.titulo,
-                LEFT(t.descripcion, 180) AS descripcion,
-                t.estado_ticket AS estado,
-                t.prioridad,
-                sol.nombre_completo AS solicitante,
-                tec.nombre_completo AS tecnico
-            FROM tickets t
-            LEFT JOIN usuarios_tickets ut ON t.id_ticket = ut.id_ticket3
-            LEFT JOIN usuarios sol ON ut.id_usuario1 = sol.id_usuario
-            LEFT JOIN usuarios tec ON t.id_tecnico_asignado = tec.id_usuario
-            WHERE {where_ticket} AND t.estado_ticket != 'eliminado'
-            ORDER BY t.fecha_creacion DESC
-            LIMIT 10
-        """, params_t)
-        tickets = cursor.fetchall()
-
-        # Usuarios
-        cursor.execute(
-            """
-            SELECT 
-                u.id_usuario AS id,
-                u.nombre_completo,
-                u.nombre_usuario,
-                u.correo,
-                u.rol,
-                u.estado
-            FROM usuarios u
-            WHERE u.nombre_completo LIKE %s OR u.nombre_usuario LIKE %s OR u.correo LIKE %s
-            ORDER BY u.fecha_registro DESC
-            LIMIT 10
-            """,
-            (patron, patron, patron)
-        )
-        usuarios = cursor.fetchall()
-
-        # Categorías
-        cursor.execute(
-            """
-            SELECT c.id_categoria AS id, c.nombre_categoria AS nombre
-            FROM categorias c
-            WHERE c.nombre_categoria LIKE %s
-            ORDER BY c.nombre_categoria ASC
-            LIMIT 10
-            """,
-            (patron,)
-        )
-        categorias = cursor.fetchall()
+    expresion = _expresion_fulltext(q, modo) if modo != 'memoria' else None
+
+    # Cada grupo se guarda por separado, por consulta normalizada y modo (el
+    # de tickets también por usuario si el rol restringe los tickets), con la
+    # versión de los ámbitos de los que depende: un cambio de tickets no
+    # descarta los resultados de usuarios ni de catálogos
+    consulta = normalizar(q)
+    propios = usuario_id if rol == 'usuario' else None
+    claves = {grupo: (grupo, consulta, modo, propios if grupo == 'tickets' else None)
+              for grupo in AMBITOS_BUSQUEDA}
+    versiones = {grupo: cache_busqueda.generacion_de(*ambitos)
+                 for grupo, ambitos in AMBITOS_BUSQUEDA.items()}
+    resultados = {}
+    for grupo, clave in claves.items():
+        guardado = cache_busqueda.obtener(clave, versiones[grupo])
+        if guardado is not None:
+            resultados[grupo] = guardado
+    en_cache = list(resultados)
+    faltan = [grupo for grupo in AMBITOS_BUSQUEDA if grupo not in resultados]
+    tiempos_ms = {}
+    incompletos = []
+
+    if faltan and modo == 'memoria':
+        # El índice responde todos los grupos de una vez; se guardan los que faltaban
+        desde_indice = indice_busqueda.buscar(q, rol=rol, usuario_id=usuario_id)
+        for grupo in faltan:
+            resultados[grupo] = desde_indice[grupo]
+            cache_busqueda.guardar(claves[grupo], resultados[grupo], versiones[grupo])
+    elif faltan:
+        # Las subconsultas de los grupos que no estaban guardados corren en
+        # paralelo, cada una con su conexión del pool; la que no termine a
+        # tiempo (o falle) queda vacía y se informa en 'incompletos'
+        subconsultas = {
+            'tickets': (_buscar_tickets_db, q, patron, expresion, modo, rol, usuario_id),
+            'usuarios': (_buscar_usuarios_db, patron, expresion, modo),
+            'categorias': (_buscar_categorias_db, patron),
+            'grupos': (_buscar_grupos_db, patron),
+        }
+        if not _cupos_busqueda.acquire(blocking=False):
+            return jsonify({'success': False,
+                            'message': 'Hay demasiadas búsquedas en curso, intente de nuevo'}), 503
+        futuros = {grupo: _ejecutor_busqueda.submit(_subconsulta_busqueda, *subconsultas[grupo])
+                   for grupo in faltan}
+        _liberar_cupo_al_terminar(futuros.values())
+        limite = perf_counter() + BUSQUEDA_CONFIG['timeout_subconsulta']
+        for grupo, futuro in futuros.items():
+            try:
+                resultados[grupo], tiempos_ms[grupo] = futuro.result(
+                    timeout=max(0, limite - perf_counter()))
+                cache_busqueda.guardar(claves[grupo], resultados[grupo], versiones[grupo])
+            except FuturoTimeout:
+                print(f"Búsqueda: la subconsulta de {grupo} superó el tiempo límite")
+                # Si todavía está en cola no llega a ejecutarse ni a tomar una
+                # conexión del pool; una que ya corre la corta el servidor
+                futuro.cancel()
+                resultados[grupo], tiempos_ms[grupo] = [], None
+                incompletos.append(grupo)
+            except Exception as e:
+                print(f"Búsqueda: error en la subconsulta de {grupo}:", e)
+                resultados[grupo], tiempos_ms[grupo] = [], None
+                incompletos.append(grupo)
 
-        # Grupos
-        cursor.execute(
-            """
-            SELECT g.id_grupo AS id, g.nombre_grupo AS nombre
-            FROM grupos g
-            WHERE g.nombre_grupo LIKE %s
-            ORDER BY g.nombre_grupo ASC
-            LIMIT 10
-            """,
-            (patron,)
-        )
-        grupos = cursor.fetchall()
+        if len(incompletos) == len(AMBITOS_BUSQUEDA):
+            return jsonify({'success': False, 'message': 'Error en búsqueda: ninguna subconsulta respondió'}), 500
 
-        fin = perf_counter()
-        took_ms = round((fin - inicio) * 1000, 2)
-        return jsonify({
-            'success': True,
-            'query': q,
-            'results': {
-                'tickets': tickets,
-                'usuarios': usuarios,
-                'categorias': categorias,
-                'grupos': grupos
-            },
-            'counts': {
-                'tickets': len(tickets),
-                'usuarios': len(usuarios),
-                'categorias': len(categorias),
-                'grupos': len(grupos)
-            },
-            'took_ms': took_ms
-        })
-    except Exception as e:
-        if conn:
-            conn.rollback()
-        return jsonify({'success': False, 'message': f'Error en búsqueda: {str(e)}'}), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+    resultados = {grupo: resultados[grupo] for grupo in AMBITOS_BUSQUEDA}
+    respuesta = {
+        'success': True,
+        'query': q,
+        'results': resultados,
+        'counts': {grupo: len(items) for grupo, items in resultados.items()},
+        'modo': modo if modo == 'memoria' or expresion is not None else 'like',
+        'cache': en_cache,
+        'took_ms': round((perf_counter() - inicio) * 1000, 2)
+    }
+    if modo != 'memoria':
+        respuesta['tiempos_ms'] = tiempos_ms
+        respuesta['incompletos'] = incompletos
+    return jsonify(respuesta)
@@ -0,0 +1,229 @@
+"""Tokens de sesión firmados y lista de revocación.
+
+/auth/login emite un token firmado (itsdangerous) con el id, el nombre y el
+rol del usuario y su fecha de emisión. Las rutas lo reciben en
+`Authorization: Bearer <token>` y lo verifican en memoria, sin consultar la
+base: la firma garantiza que nadie cambió el rol ni el id y la fecha limita
+su vigencia a SESION_CONFIG['duracion'].
+
+Para que desactivar un usuario surta efecto antes de que venza su token,
+la lista de revocación guarda los usuarios inactivos y los que tienen
+usuarios.tokens_validos_desde dentro de la vigencia de un token. Esa
+columna solo se actualiza al cambiar la contraseña, el rol o el estado
+(editar el nombre o el teléfono no cierra la sesión). Un token se rechaza
+si su usuario está inactivo o si se emitió antes de tokens_validos_desde.
+
+La lista la recarga un hilo de fondo cada
+SESION_CONFIG['intervalo_revocacion'] segundos con una sola consulta; la
+verificación de un token nunca consulta la base. Las rutas de usuarios
+llaman a invalidar() después del commit para que el hilo recargue en el
+momento en lugar de esperar al siguiente intervalo.
+
+Las rutas cuyo resultado depende del rol (listados de tickets, búsqueda,
+canal de eventos) llevan @sesion_requerida y sin identidad responden 401;
+SESION_CONFIG['exigir'] extiende el 401 a todas las rutas no públicas.
+
+Transición: SESION_CONFIG['identidad_query'] (desactivado por defecto)
+permite que una solicitud sin token tome rol y usuario_id de la query
+string, como hacían los clientes anteriores al token. Cualquiera puede
+escribir esos parámetros, así que solo se activa mientras quede un cliente
+viejo desplegado y nunca junto con 'exigir'.
+"""
+import functools
+import threading
+import time
+
+from flask import g, jsonify, request
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+from config.config import SESION_CONFIG
+from database import get_db_connection
+
+# Rutas que no requieren token aunque SESION_CONFIG['exigir'] esté activo. En
+# ellas no se verifica el token que llegue: un token vencido o revocado no
+# debe impedir volver a iniciar sesión (/auth/sesion lo verifica por su cuenta)
+RUTAS_PUBLICAS = {'auth.Login', 'auth.sesion', 'uploaded_file', 'static'}
+
+# Rutas que aceptan el token en ?token=: EventSource no puede enviar cabeceras
+RUTAS_TOKEN_QUERY = {'usuarios.eventos_tickets'}
+
+
+class ErrorSesion(Exception):
+    """Token ausente, inválido, vencido o revocado."""
+
+
+class ListaRevocacion:
+
+    def __init__(self, duracion, intervalo):
+        self._duracion = duracion
+        self._intervalo = intervalo
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._inactivos = set()
+        self._validos_desde = {}  # id_usuario -> tokens_validos_desde (epoch)
+        self._ultima_recarga = None
+        self._recargas = 0
+        self._rechazos = 0
+
+    def recargar(self):
+        conn = get_db_connection()
+        if conn is None:
+            return False
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                """
+                SELECT id_usuario, estado, UNIX_TIMESTAMP(tokens_validos_desde)
+                FROM usuarios
+                WHERE estado != 'activo' OR tokens_validos_desde > NOW() - INTERVAL %s SECOND
+                """,
+                (self._duracion,)
+            )
+            inactivos, validos_desde = set(), {}
+            for id_usuario, estado, desde in cursor.fetchall():
+                if estado != 'activo':
+                    inactivos.add(id_usuario)
+                else:
+                    validos_desde[id_usuario] = int(desde or 0)
+        finally:
+            cursor.close()
+            conn.close()
+        with self._lock:
+            self._inactivos = inactivos
+            self._validos_desde = validos_desde
+            self._ultima_recarga = time.monotonic()
+            self._recargas += 1
+        return True
+
+    def invalidar(self):
+        """Pide al hilo de fondo que recargue ya. Se llama después del commit
+        de las rutas que modifican usuarios."""
+        self._despertar.set()
+
+    def esperar(self):
+        """Espera hasta el próximo intervalo o hasta que se llame a invalidar()."""
+        self._despertar.wait(self._intervalo)
+        self._despertar.clear()
+
+    def revocado(self, id_usuario, emitido):
+        # Solo lee la última lista cargada por el hilo de fondo
+        with self._lock:
+            revocado = (id_usuario in self._inactivos
+                        or self._validos_desde.get(id_usuario, 0) > emitido)
+            if revocado:
+                self._rechazos += 1
+            return revocado
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "inactivos": len(self._inactivos),
+                "revocados_por_cambio": len(self._validos_desde),
+                "intervalo": self._intervalo,
+                "segundos_desde_recarga": round(time.monotonic() - self._ultima_recarga, 1)
+                if self._ultima_recarga is not None else None,
+                "recargas": self._recargas,
+                "rechazos": self._rechazos
+            }
+
+
+# Todos los procesos deben firmar con la misma clave; uno aleatorio por
+# proceso rechazaría los tokens emitidos por otro worker
+if not SESION_CONFIG.get('secreto'):
+    raise RuntimeError("Falta la clave de firma de sesiones: defina la variable "
+                       "de entorno HELPDESK_SECRETO (SESION_CONFIG['secreto'])")
+_serializador = URLSafeTimedSerializer(SESION_CONFIG['secreto'], salt='sesion')
+revocaciones = ListaRevocacion(SESION_CONFIG['duracion'], SESION_CONFIG['intervalo_revocacion'])
+
+
+def emitir_token(id_usuario, nombre, rol):
+    return _serializador.dumps({'id': id_usuario, 'nombre': nombre, 'rol': rol})
+
+
+def verificar_token(token):
+    """Devuelve {'id', 'nombre', 'rol', 'emitido', 'expira'} o lanza ErrorSesion."""
+    try:
+        datos, emitido = _serializador.loads(token, max_age=SESION_CONFIG['duracion'],
+                                             return_timestamp=True)
+    except SignatureExpired:
+        raise ErrorSesion("La sesión expiró")
+    except BadSignature:
+        raise ErrorSesion("Token de sesión inválido")
+    emitido = int(emitido.timestamp())
+    if revocaciones.revocado(datos['id'], emitido):
+        raise ErrorSesion("La sesión fue revocada")
+    return dict(datos, emitido=emitido, expira=emitido + SESION_CONFIG['duracion'])
+
+
+def token_solicitud():
+    cabecera = request.headers.get('Authorization') or ''
+    tipo, _, token = cabecera.partition(' ')
+    if tipo.lower() == 'bearer' and token.strip():
+        return token.strip()
+    if request.endpoint in RUTAS_TOKEN_QUERY:
+        return (request.args.get('token') or '').strip() or None
+    return None
+
+
+def identidad_solicitud():
+    """(rol, usuario_id) de la solicitud: los del token o (None, None). Solo
+    con 'identidad_query' activo y 'exigir' desactivado se leen de la query
+    string (ver la nota de transición al inicio del módulo)."""
+    sesion = g.get('sesion')
+    if sesion:
+        return sesion['rol'], str(sesion['id'])
+    if SESION_CONFIG['identidad_query'] and not SESION_CONFIG['exigir']:
+        return request.args.get('rol'), request.args.get('usuario_id')
+    return None, None
+
+
+def sesion_requerida(vista):
+    """Responde 401 si la solicitud no trae rol y usuario: sin identidad las
+    rutas que restringen por rol devolverían los datos de todos."""
+
+    @functools.wraps(vista)
+    def envoltura(*args, **kwargs):
+        rol, usuario_id = identidad_solicitud()
+        if not rol or not usuario_id:
+            return jsonify({"success": False, "message": "Se requiere iniciar sesión"}), 401
+        return vista(*args, **kwargs)
+
+    return envoltura
+
+
+def _ciclo_revocacion():
+    while True:
+        try:
+            revocaciones.recargar()
+        except Exception as e:
+            # Con la base caída se sigue con la última lista cargada
+            print(f"Error al recargar la lista de revocación: {e}")
+        revocaciones.esperar()
+
+
+def iniciar_revocacion():
+    hilo = threading.Thread(target=_ciclo_revocacion, name='revocacion-sesiones',
+                            daemon=True)
+    hilo.start()
+    return hilo
+
+
+def init_app(app):
+    """Verifica el token de cada solicitud que lo trae y deja la sesión en
+    g.sesion. Con SESION_CONFIG['exigir'] las rutas no públicas sin token
+    responden 401."""
+
+    @app.before_request
+    def _verificar_sesion():
+        if request.method == 'OPTIONS' or request.endpoint in RUTAS_PUBLICAS:
+            return None
+        token = token_solicitud()
+        if token is None:
+            if SESION_CONFIG['exigir']:
+                return jsonify({"success": False, "message": "Se requiere iniciar sesión"}), 401
+            return None
+        try:
+            g.sesion = verificar_token(token)
+        except ErrorSesion as e:
+            return jsonify({"success": False, "message": str(e)}), 401
+        return None
@@ -0,0 +1,132 @@
+"""Pruebas unitarias del backend: lo que se puede comprobar sin una base de
+datos real. Se ejecutan desde Backend/ con `python -m pytest`."""
+import os
+import sys
+
+import pytest
+from flask import Flask, g, request
+
+# sesiones.py exige la clave de firma al importarse
+os.environ.setdefault('HELPDESK_SECRETO', 'clave-de-pruebas')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class CursorFalso:
+    """Cursor que responde con las filas de la regla de BaseFalsa cuyo
+    fragmento aparece en la sentencia."""
+
+    def __init__(self, base):
+        self._base = base
+        self._filas = []
+        self.rowcount = 0
+        self.lastrowid = None
+
+    def execute(self, sql, params=()):
+        self._filas, self.rowcount = self._base.responder(sql, params)
+        if sql.lstrip().startswith('INSERT'):
+            self._base.ultimo_id += 1
+            self.lastrowid = self._base.ultimo_id
+
+    def executemany(self, sql, filas):
+        self.execute(sql, filas)
+
+    def fetchone(self):
+        return self._filas.pop(0) if self._filas else None
+
+    def fetchmany(self, tamano=1):
+        lote, self._filas = self._filas[:tamano], self._filas[tamano:]
+        return lote
+
+    def fetchall(self):
+        filas, self._filas = self._filas, []
+        return filas
+
+    def close(self):
+        pass
+
+
+class ConexionFalsa:
+
+    def __init__(self, base):
+        self._base = base
+        self.in_transaction = False
+
+    def cursor(self, **kwargs):
+        return CursorFalso(self._base)
+
+    def commit(self):
+        self._base.confirmaciones += 1
+
+    def rollback(self):
+        self._base.reversiones += 1
+
+    def close(self):
+        pass
+
+
+class BaseFalsa:
+    """Base de datos de mentira para probar rutas: `cuando(fragmento, filas)`
+    define qué devuelve cada consulta (si varias reglas coinciden gana la
+    última; con `error` la consulta lo lanza) y `sentencias` registra las ejecutadas (con los espacios
+    normalizados) y sus parámetros."""
+
+    def __init__(self):
+        self._reglas = []
+        self.sentencias = []
+        self.confirmaciones = 0
+        self.reversiones = 0
+        self.ultimo_id = 100
+
+    def cuando(self, fragmento, filas=(), rowcount=None, error=None):
+        self._reglas.insert(0, (fragmento, list(filas), rowcount, error))
+
+    def responder(self, sql, params):
+        sql = ' '.join(sql.split())
+        self.sentencias.append((sql, params))
+        for fragmento, filas, rowcount, error in self._reglas:
+            if fragmento in sql:
+                if error:
+                    raise error
+                return [dict(f) if isinstance(f, dict) else f for f in filas], (
+                    len(filas) if rowcount is None else rowcount)
+        return [], 0
+
+    def ejecutadas(self, fragmento):
+        return [(sql, params) for sql, params in self.sentencias if fragmento in sql]
+
+    def conexion(self):
+        return ConexionFalsa(self)
+
+
+@pytest.fixture
+def base(monkeypatch):
+    """BaseFalsa conectada a las rutas de usuarios, al contador de versiones
+    y a una caché de referencias nueva."""
+    import referencias
+    import versiones
+    from routes import usuarios
+
+    base = BaseFalsa()
+    monkeypatch.setattr(usuarios, 'get_db_connection', base.conexion)
+    monkeypatch.setattr(referencias, 'get_db_connection', base.conexion)
+    monkeypatch.setattr(versiones, 'get_db_connection', base.conexion)
+    monkeypatch.setattr(usuarios, 'referencias', referencias.CacheReferencias())
+    return base
+
+
+@pytest.fixture
+def cliente_usuarios():
+    """Cliente de una app con el blueprint de usuarios. La sesión se indica
+    con ?sesion=<rol>:<id> en lugar de un token."""
+    from routes import usuarios
+
+    app = Flask(__name__)
+    app.register_blueprint(usuarios.usuarios_bp, url_prefix='/usuarios')
+
+    @app.before_request
+    def _sesion():
+        rol, _, id_usuario = (request.args.get('sesion') or '').partition(':')
+        if rol:
+            g.sesion = {'id': int(id_usuario), 'rol': rol, 'nombre': f'{rol} {id_usuario}'}
+
+    return app.test_client()
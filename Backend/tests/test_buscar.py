@@ -0,0 +1,153 @@
+import threading
+import time
+
+import pytest
+from flask import Flask, g
+from mysql.connector import errors
+
+import database
+from busqueda import IndiceBusqueda
+from cache import CacheLRU
+from config.config import BUSQUEDA_CONFIG
+from database import PoolConexiones
+from routes import usuarios
+
+
+class CursorLento:
+    """Cursor que imita al servidor: la consulta de tickets tarda más que
+    el límite de la sesión y el servidor la corta al llegar a él."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def execute(self, sql, params=()):
+        self._conn.sentencias.append(sql.strip().split('\n')[0])
+        if sql.startswith('SET SESSION max_execution_time'):
+            self._conn.limite = params[0] / 1000
+        elif 'FROM tickets' in sql and self._conn.limite:
+            time.sleep(self._conn.limite)
+            raise errors.DatabaseError(errno=3024, msg='maximum statement execution time exceeded')
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class ConexionFalsa:
+
+    def __init__(self):
+        self.in_transaction = False
+        self.limite = 0
+        self.sentencias = []
+
+    def get_server_info(self):
+        return '8.0.36'
+
+    def cursor(self, **kwargs):
+        return CursorLento(self)
+
+    def rollback(self):
+        pass
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    cache = CacheLRU()
+    monkeypatch.setattr(usuarios, 'cache_busqueda', cache)
+    return cache
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    conexiones = []
+
+    def conectar(**config):
+        conn = ConexionFalsa()
+        conexiones.append(conn)
+        return conn
+
+    monkeypatch.setattr(database.mysql.connector, 'connect', conectar)
+    pool = PoolConexiones({}, tamano=4, max_desborde=0, timeout=1)
+    monkeypatch.setattr(database, '_pool', pool)
+    monkeypatch.setitem(BUSQUEDA_CONFIG, 'timeout_subconsulta', 0.05)
+    monkeypatch.setattr(usuarios, '_cupos_busqueda', threading.BoundedSemaphore(1))
+    pool.conexiones = conexiones
+    return pool
+
+
+@pytest.fixture
+def cliente():
+    app = Flask(__name__)
+    app.register_blueprint(usuarios.usuarios_bp, url_prefix='/usuarios')
+
+    @app.before_request
+    def _sesion():
+        g.sesion = {'id': 1, 'rol': 'administrador'}
+
+    return app.test_client()
+
+
+def _esperar(condicion, segundos=2):
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite:
+        if condicion():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_subconsulta_vencida_devuelve_la_conexion_al_pool(pool, cliente):
+    respuesta = cliente.get('/usuarios/buscar?q=impresora&modo=booleano')
+    datos = respuesta.get_json()
+    assert respuesta.status_code == 200
+    assert datos['incompletos'] == ['tickets']
+    # El servidor corta la sentencia y la conexión vuelve sin el límite
+    assert _esperar(lambda: pool.estadisticas()['en_uso'] == 0)
+    for conn in pool.conexiones:
+        assert conn.sentencias[0] == 'SET SESSION max_execution_time = %s'
+        assert conn.sentencias[-1] == 'SET SESSION max_execution_time = %s'
+        assert conn.limite == 0
+    # Y con todas las subconsultas terminadas se libera el cupo
+    assert _esperar(lambda: usuarios._cupos_busqueda.acquire(blocking=False))
+
+
+def test_sin_cupo_responde_503_sin_tomar_conexiones(pool, cliente):
+    usuarios._cupos_busqueda.acquire()
+    respuesta = cliente.get('/usuarios/buscar?q=impresora&modo=booleano')
+    assert respuesta.status_code == 503
+    assert pool.estadisticas()['prestamos'] == 0
+
+
+@pytest.fixture
+def indice(monkeypatch):
+    indice = IndiceBusqueda()
+    IndiceBusqueda._poner_ticket(indice._colecciones['tickets'], {
+        'id': 1, 'titulo': 'Red caída', 'descripcion': '', 'estado': 'nuevo', 'prioridad': 'alta',
+        'fecha_creacion': None, 'solicitanteId': 7, 'tecnicoId': None})
+    indice._colecciones['grupos'].poner(2, {'id': 2, 'nombre': 'Redes'}, 'Redes')
+    indice.listo = True
+    monkeypatch.setattr(usuarios, 'indice_busqueda', indice)
+    return indice
+
+
+def test_una_escritura_solo_invalida_los_grupos_que_dependen(indice, cache, cliente):
+    def buscar():
+        return cliente.get('/usuarios/buscar?q=red').get_json()
+
+    assert buscar()['cache'] == []
+    assert buscar()['cache'] == ['tickets', 'usuarios', 'categorias', 'grupos']
+    cache.avanzar('tickets')
+    assert buscar()['cache'] == ['usuarios', 'categorias', 'grupos']
+    # Los tickets muestran nombres de usuarios
+    cache.avanzar('usuarios')
+    datos = buscar()
+    assert datos['cache'] == ['categorias', 'grupos']
+    assert ([t['id'] for t in datos['results']['tickets']], datos['modo']) == ([1], 'memoria')
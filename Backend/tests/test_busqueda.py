@@ -0,0 +1,139 @@
+from datetime import datetime
+
+import pytest
+
+import busqueda
+from busqueda import IndiceBusqueda, _Coleccion, _ColeccionTickets, normalizar, trigramas
+from conftest import BaseFalsa
+
+
+def ticket(id_ticket, titulo, dia=1, solicitante=1, descripcion=''):
+    # descripcion es el extracto que devuelve SQL_TICKETS
+    return {'id': id_ticket, 'titulo': titulo, 'descripcion': descripcion, 'estado': 'nuevo',
+            'prioridad': 'media', 'fecha_creacion': datetime(2024, 1, dia),
+            'solicitanteId': solicitante, 'tecnicoId': None}
+
+
+def coleccion_tickets(titulos):
+    coleccion = _ColeccionTickets()
+    for i, titulo in enumerate(titulos, start=1):
+        IndiceBusqueda._poner_ticket(coleccion, ticket(i, titulo, dia=1 + i % 28))
+    return coleccion
+
+
+def test_normalizar():
+    assert normalizar('  Impresión   DAÑADA ') == 'impresion danada'
+    assert normalizar(None) == ''
+
+
+def test_trigramas():
+    assert trigramas(' ab ') == {' ab', 'ab '}
+
+
+def test_buscar_equivale_a_subcadena():
+    coleccion = _Coleccion()
+    for i, texto in enumerate(['Impresora del piso 3', 'Red caída', 'Impresión de facturas']):
+        coleccion.poner(i, {'id': i}, texto)
+    assert sorted(coleccion.buscar('impres')) == [0, 2]
+    assert coleccion.buscar('presor') == [0]
+    assert coleccion.buscar('scanner') == []
+
+
+def test_quitar_limpia_el_indice():
+    coleccion = _Coleccion()
+    coleccion.poner(1, {'id': 1}, 'Monitor')
+    coleccion.quitar(1)
+    assert coleccion.buscar('monitor') == []
+    assert not coleccion.indice
+
+
+def test_poner_de_nuevo_reemplaza_el_texto():
+    coleccion = _Coleccion()
+    coleccion.poner(1, {'id': 1}, 'Monitor')
+    coleccion.poner(1, {'id': 1}, 'Teclado')
+    assert coleccion.buscar('monitor') == []
+    assert coleccion.buscar('teclado') == [1]
+
+
+@pytest.mark.parametrize('relleno', [0, 200], ids=['consulta comun', 'pocos candidatos'])
+def test_dos_caracteres_solo_al_inicio_de_palabra(relleno):
+    # Con relleno 0 los candidatos son muchos frente al total y se recorre
+    # self.orden; con 200 títulos ajenos se confirman solo los candidatos
+    titulos = ['xaby', 'abc uno', 'cab ab'] * 10 + ['zz'] * relleno
+    coleccion = coleccion_tickets(titulos)
+    encontrados = {coleccion.textos[d['id']].strip() for d in coleccion.recientes('ab', 100)}
+    assert encontrados == {'abc uno', 'cab ab'}
+
+
+def test_recientes_ordena_por_fecha_y_corta_en_el_limite():
+    coleccion = coleccion_tickets(['impresora %d' % i for i in range(20)])
+    resultado = coleccion.recientes('impresora', 5)
+    fechas = [(d['fecha_creacion'], d['id']) for d in resultado]
+    assert len(resultado) == 5
+    assert fechas == sorted(fechas, reverse=True)
+
+
+def test_recientes_de_un_solicitante():
+    coleccion = _ColeccionTickets()
+    IndiceBusqueda._poner_ticket(coleccion, ticket(1, 'Impresora', solicitante=7))
+    IndiceBusqueda._poner_ticket(coleccion, ticket(2, 'Impresora', solicitante=8))
+    assert [d['id'] for d in coleccion.recientes('impresora', 10, solicitante=7)] == [1]
+
+
+def test_se_indexan_titulo_y_extracto():
+    coleccion = _ColeccionTickets()
+    IndiceBusqueda._poner_ticket(coleccion, ticket(1, 'Impresora', descripcion='Sin toner'))
+    assert [d['id'] for d in coleccion.recientes('toner', 10)] == [1]
+    assert 'LEFT(t.descripcion, 180)' in busqueda.SQL_TICKETS
+    assert 't.descripcion AS' not in busqueda.SQL_TICKETS
+
+
+def test_refrescar_cambios_reindexa_lo_modificado(monkeypatch):
+    base = BaseFalsa()
+    monkeypatch.setattr(busqueda, 'get_db_connection', base.conexion)
+    indice = IndiceBusqueda()
+    IndiceBusqueda._poner_ticket(indice._colecciones['tickets'], ticket(1, 'Impresora'))
+    IndiceBusqueda._poner_ticket(indice._colecciones['tickets'], ticket(2, 'Red caída'))
+    indice.listo, indice._marca = True, datetime(2024, 1, 1)
+    base.cuando('AS marca', [{'marca': datetime(2024, 1, 2)}])
+    base.cuando('SELECT id_ticket FROM tickets WHERE fecha_actualizacion', [{'id_ticket': 1}, {'id_ticket': 2}])
+    # El 2 ya no sale de SQL_TICKETS: se eliminó
+    base.cuando('AND t.id_ticket IN', [ticket(1, 'Impresora láser')])
+    assert indice.refrescar_cambios() == {'tickets'}
+    assert [t['id'] for t in indice.buscar('laser')['tickets']] == [1]
+    assert indice.buscar('red')['tickets'] == []
+    [(_, params)] = base.ejecutadas('FROM tickets WHERE fecha_actualizacion')
+    assert params == (datetime(2024, 1, 1),)
+    assert indice._marca == datetime(2024, 1, 2)
+    # Sin cambios no hay búsquedas guardadas que descartar
+    base.cuando('SELECT id_ticket FROM tickets WHERE fecha_actualizacion', [])
+    assert indice.refrescar_cambios() == set()
+
+
+def test_estadisticas_estima_la_memoria():
+    indice = IndiceBusqueda()
+    for i in range(1, 1000):
+        IndiceBusqueda._poner_ticket(indice._colecciones['tickets'], ticket(i, f'Caso {i}', dia=1 + i % 28))
+    assert indice.estadisticas()['memoria_bytes_estimada'] > 0
+
+
+def test_indice_buscar_respeta_el_rol_usuario():
+    indice = IndiceBusqueda()
+    IndiceBusqueda._poner_ticket(indice._colecciones['tickets'], ticket(1, 'Impresora', solicitante=7))
+    IndiceBusqueda._poner_ticket(indice._colecciones['tickets'], ticket(2, 'Impresora', solicitante=8))
+    IndiceBusqueda._poner_usuario(indice._colecciones['usuarios'], {
+        'id': 7, 'nombre_completo': 'Ana Ruiz', 'nombre_usuario': 'ana', 'correo': 'ana@x.com',
+        'rol': 'usuario', 'estado': 'activo', 'fecha_registro': None})
+    propios = indice.buscar('impresora', rol='usuario', usuario_id='7')
+    assert [t['id'] for t in propios['tickets']] == [1]
+    assert propios['tickets'][0]['solicitante'] == 'Ana Ruiz'
+    todos = indice.buscar('impresora', rol='administrador')
+    assert sorted(t['id'] for t in todos['tickets']) == [1, 2]
+    assert [u['id'] for u in indice.buscar('ruiz')['usuarios']] == [7]
+
+
+def test_indice_buscar_pone_primero_el_numero_exacto():
+    indice = IndiceBusqueda()
+    for i in range(1, 15):
+        IndiceBusqueda._poner_ticket(indice._colecciones['tickets'], ticket(i, f'Caso 12 {i}', dia=i))
+    assert indice.buscar('12')['tickets'][0]['id'] == 12
@@ -0,0 +1,64 @@
+from cache import CacheLRU
+
+
+def test_devuelve_solo_con_la_misma_version():
+    cache = CacheLRU(max_entradas=10, ttl=60)
+    cache.guardar(1, 'detalle', version='v1')
+    assert cache.obtener(1, 'v1') == 'detalle'
+    assert cache.obtener(1, 'v2') is None
+    # Una lectura con otra versión descarta la entrada
+    assert cache.obtener(1, 'v1') is None
+
+
+def test_expira_con_el_ttl():
+    cache = CacheLRU(max_entradas=10, ttl=-1)
+    cache.guardar(1, 'detalle')
+    assert cache.obtener(1) is None
+
+
+def test_descarta_la_menos_usada():
+    cache = CacheLRU(max_entradas=2, ttl=60)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    cache.obtener('a')
+    cache.guardar('c', 3)
+    assert cache.obtener('b') is None
+    assert cache.obtener('a') == 1
+    assert cache.obtener('c') == 3
+
+
+def test_limpiar_avanza_la_generacion():
+    cache = CacheLRU()
+    generacion = cache.generacion
+    cache.limpiar()
+    assert cache.generacion == generacion + 1
+
+
+def test_resultado_armado_antes_de_limpiar_no_se_sirve():
+    cache = CacheLRU()
+    # Una búsqueda toma la generación, una escritura limpia y la búsqueda
+    # guarda su resultado ya viejo
+    generacion = cache.generacion
+    cache.limpiar()
+    cache.guardar('q', 'viejo', generacion)
+    assert cache.obtener('q', cache.generacion) is None
+
+
+def test_avanzar_solo_invalida_los_ambitos_que_dependen():
+    cache = CacheLRU()
+    cache.guardar('tickets', 't', cache.generacion_de('tickets', 'usuarios'))
+    cache.guardar('grupos', 'g', cache.generacion_de('grupos'))
+    cache.avanzar('usuarios')
+    assert cache.obtener('tickets', cache.generacion_de('tickets', 'usuarios')) is None
+    assert cache.obtener('grupos', cache.generacion_de('grupos')) == 'g'
+    cache.limpiar()
+    assert cache.obtener('grupos', cache.generacion_de('grupos')) is None
+
+
+def test_estadisticas():
+    cache = CacheLRU(max_entradas=10, ttl=60)
+    cache.guardar(1, 'x')
+    cache.obtener(1)
+    cache.obtener(2)
+    datos = cache.estadisticas()
+    assert (datos['aciertos'], datos['fallos'], datos['tasa_aciertos']) == (1, 1, 0.5)
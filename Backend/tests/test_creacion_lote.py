@@ -0,0 +1,33 @@
+import pytest
+from mysql.connector import errors
+
+USUARIO = {'nombre_usuario': 'aruiz', 'nombre_completo': 'Ana Ruiz', 'telefono': '555',
+           'correo': 'ana@ejemplo.com', 'rol': 'usuario', 'contrasena': 'secreta'}
+
+
+def _crear(cliente, usuarios):
+    return cliente.post('/usuarios/creacion/lote', json={'usuarios': usuarios})
+
+
+def test_inserta_el_bloque_y_devuelve_los_ids(base, cliente_usuarios):
+    base.cuando('SELECT nombre_usuario, id_usuario FROM usuarios', [('aruiz', 10), ('lmora', 12)])
+    otro = dict(USUARIO, nombre_usuario='lmora', correo='luis@ejemplo.com')
+    respuesta = _crear(cliente_usuarios, [USUARIO, otro, dict(USUARIO, correo='ANA@ejemplo.com')])
+    datos = respuesta.get_json()
+    assert respuesta.status_code == 201
+    assert (datos['creados'], datos['conflictos']) == (2, 1)
+    assert [r.get('id_usuario') for r in datos['resultados']] == [10, 12, None]
+    assert len(base.ejecutadas('INSERT INTO usuarios')) == 1
+
+
+@pytest.mark.parametrize('error, mensaje', [
+    (errors.IntegrityError(errno=1062, msg="Duplicate entry 'aruiz' for key 'nombre_usuario'"),
+     'El nombre de usuario o el correo ya existe'),
+    (errors.DatabaseError(errno=1213, msg='Deadlock found when trying to get lock'),
+     'No se pudo crear el usuario'),
+])
+def test_error_al_insertar_no_expone_el_mensaje_de_mysql(base, cliente_usuarios, error, mensaje):
+    base.cuando('INSERT INTO usuarios', error=error)
+    datos = _crear(cliente_usuarios, [USUARIO]).get_json()
+    assert datos['creados'] == 0
+    assert datos['resultados'][0]['errores'] == [mensaje]
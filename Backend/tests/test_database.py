@@ -0,0 +1,88 @@
+import pytest
+
+import database
+from database import PoolAgotadoError, PoolConexiones
+
+
+class ConexionFalsa:
+
+    def __init__(self):
+        self.in_transaction = False
+        self.cerrada = False
+        self.revertida = False
+
+    def rollback(self):
+        self.revertida = True
+        self.in_transaction = False
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        self.cerrada = True
+
+
+@pytest.fixture
+def conexiones(monkeypatch):
+    abiertas = []
+
+    def conectar(**config):
+        conn = ConexionFalsa()
+        abiertas.append(conn)
+        return conn
+
+    monkeypatch.setattr(database.mysql.connector, 'connect', conectar)
+    return abiertas
+
+
+def test_reutiliza_la_conexion_devuelta(conexiones):
+    pool = PoolConexiones({}, tamano=2, max_desborde=0)
+    conn = pool.obtener()
+    conn.close()
+    pool.obtener().close()
+    assert len(conexiones) == 1
+    assert pool.estadisticas()['prestamos'] == 2
+
+
+def test_close_dos_veces_no_devuelve_dos_veces(conexiones):
+    pool = PoolConexiones({}, tamano=2, max_desborde=0)
+    conn = pool.obtener()
+    conn.close()
+    conn.close()
+    assert pool.estadisticas()['libres'] == 1
+    assert pool.estadisticas()['en_uso'] == 0
+
+
+def test_desborde_se_cierra_al_devolverse(conexiones):
+    pool = PoolConexiones({}, tamano=1, max_desborde=1)
+    primera, segunda = pool.obtener(), pool.obtener()
+    segunda.close()
+    primera.close()
+    assert sum(c.cerrada for c in conexiones) == 1
+    assert pool.estadisticas()['abiertas'] == 1
+
+
+def test_agotado_tras_el_timeout(conexiones):
+    pool = PoolConexiones({}, tamano=1, max_desborde=0, timeout=0.05)
+    pool.obtener()
+    with pytest.raises(PoolAgotadoError):
+        pool.obtener()
+    assert pool.estadisticas()['timeouts'] == 1
+
+
+def test_revierte_la_transaccion_pendiente_al_devolver(conexiones):
+    pool = PoolConexiones({}, tamano=1, max_desborde=0)
+    conn = pool.obtener()
+    conexiones[0].in_transaction = True
+    conn.close()
+    assert conexiones[0].revertida
+
+
+def test_recicla_las_conexiones_viejas(conexiones):
+    pool = PoolConexiones({}, tamano=1, max_desborde=0, reciclar=0.01)
+    pool.obtener().close()
+    pool._libres[0] = (conexiones[0], 0, 0)  # creada hace mucho
+    pool.obtener().close()
+    assert conexiones[0].cerrada
+    assert len(conexiones) == 2
+    assert pool.estadisticas()['recicladas'] == 1
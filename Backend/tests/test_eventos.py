@@ -0,0 +1,91 @@
+import pytest
+from flask import Flask, g, request
+
+from eventos import CanalEventos, CanalLleno
+from routes import usuarios
+
+
+def test_filtra_por_valor_nuevo_o_anterior():
+    canal = CanalEventos()
+    _, anterior = canal.suscribir({'id_tecnico': 5})
+    _, nuevo = canal.suscribir({'id_tecnico': 9})
+    _, ajeno = canal.suscribir({'id_tecnico': 3})
+    canal.publicar({'id_ticket': 1, 'id_tecnico': 9, 'id_tecnico_anterior': 5})
+    assert (anterior.qsize(), nuevo.qsize(), ajeno.qsize()) == (1, 1, 0)
+
+
+def test_todos_los_filtros_deben_coincidir():
+    canal = CanalEventos()
+    _, cola = canal.suscribir({'id_tecnico': 9, 'id_grupo': 2})
+    canal.publicar({'id_ticket': 1, 'id_tecnico': 9, 'id_grupo': 4})
+    assert cola.qsize() == 0
+
+
+def test_cola_llena_descarta_lo_mas_viejo():
+    canal = CanalEventos(tamano_cola=2)
+    _, cola = canal.suscribir()
+    for i in range(3):
+        canal.publicar({'id_ticket': i})
+    assert [cola.get_nowait()['id_ticket'] for _ in range(2)] == [1, 2]
+
+
+def test_canal_lleno_rechaza_la_suscripcion():
+    canal = CanalEventos(max_suscriptores=1)
+    token, _ = canal.suscribir()
+    with pytest.raises(CanalLleno):
+        canal.suscribir()
+    canal.desuscribir(token)
+    canal.suscribir()
+
+
+@pytest.fixture
+def canal(monkeypatch):
+    canal = CanalEventos(max_suscriptores=1)
+    monkeypatch.setattr(usuarios, 'canal_tickets', canal)
+    return canal
+
+
+@pytest.fixture
+def cliente():
+    app = Flask(__name__)
+    app.register_blueprint(usuarios.usuarios_bp, url_prefix='/usuarios')
+
+    @app.before_request
+    def _sesion():
+        # Sesión de prueba: ?sesion=<rol>:<id>
+        rol, _, id_usuario = (request.args.get('sesion') or '').partition(':')
+        if rol:
+            g.sesion = {'id': int(id_usuario), 'rol': rol}
+
+    return app.test_client()
+
+
+def _filtros(canal):
+    return [filtros for _, filtros in canal._suscriptores.values()]
+
+
+def test_rol_usuario_solo_recibe_sus_tickets(canal, cliente):
+    respuesta = cliente.get('/usuarios/tickets/eventos?sesion=usuario:7&solicitante=8&grupo=2')
+    assert respuesta.status_code == 200
+    assert _filtros(canal) == [{'id_grupo': 2, 'id_solicitante': 7}]
+    respuesta.close()
+    assert canal.total_suscriptores() == 0
+
+
+@pytest.mark.parametrize('consulta, estado', [
+    ('', 401),
+    ('sesion=tecnico:3', 403),
+    ('sesion=tecnico:3&tecnico=3', 200),
+    ('sesion=administrador:1', 200),
+])
+def test_permisos_de_suscripcion(canal, cliente, consulta, estado):
+    respuesta = cliente.get(f'/usuarios/tickets/eventos?{consulta}')
+    assert respuesta.status_code == estado
+    respuesta.close()
+
+
+def test_canal_lleno_responde_503(canal, cliente):
+    abierta = cliente.get('/usuarios/tickets/eventos?sesion=administrador:1')
+    respuesta = cliente.get('/usuarios/tickets/eventos?sesion=administrador:1')
+    assert respuesta.status_code == 503
+    abierta.close()
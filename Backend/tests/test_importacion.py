@@ -0,0 +1,126 @@
+from datetime import datetime
+
+import pytest
+
+from importacion import ErrorFormato, detectar_formato, leer_filas, validar_fila
+
+AHORA = datetime(2026, 1, 15, 10, 0, 0)
+REFERENCIAS = {
+    'categoria': {'redes': 1, '1': 1},
+    'grupo': {'soporte': 2, '2': 2},
+    'usuario': {'ana': (7, 'usuario'), 'luis': (9, 'tecnico')},
+}
+
+
+def fila(**cambios):
+    datos = {'titulo': 'Sin red', 'descripcion': 'No hay conexión', 'prioridad': 'Alta',
+             'tipo': 'incidencia', 'ubicacion': 'Piso 2', 'solicitante': 'ana'}
+    datos.update(cambios)
+    return datos
+
+
+@pytest.mark.parametrize('nombre, tipo, esperado', [
+    ('tickets.csv', None, 'csv'),
+    ('tickets.jsonl', None, 'ndjson'),
+    (None, 'text/csv; charset=utf-8', 'csv'),
+    (None, 'application/x-ndjson', 'ndjson'),
+    ('tickets.xlsx', None, None),
+])
+def test_detectar_formato(nombre, tipo, esperado):
+    assert detectar_formato(nombre, tipo) == esperado
+
+
+def test_leer_csv_con_punto_y_coma():
+    filas = leer_filas('Titulo;Prioridad\nSin red;alta\nLento;baja;extra\n', 'csv')
+    assert filas[0] == (2, {'titulo': 'Sin red', 'prioridad': 'alta'}, None)
+    assert filas[1][1] is None and 'más columnas' in filas[1][2]
+
+
+def test_leer_ndjson_informa_lineas_invalidas():
+    filas = leer_filas('{"titulo": "a"}\n\n{roto\n[1]\n', 'ndjson')
+    assert [(numero, error is None) for numero, _, error in filas] == [(1, True), (3, False), (4, False)]
+
+
+def test_leer_limite_de_filas():
+    with pytest.raises(ErrorFormato):
+        leer_filas('titulo\na\nb\nc\n', 'csv', max_filas=2)
+
+
+def test_fila_valida():
+    valores, errores = validar_fila(fila(categoria='Redes', grupo='2', tecnico='luis'), REFERENCIAS, AHORA)
+    assert errores == []
+    assert valores[:8] == ('alta', 'incidencia', 'Sin red', 'No hay conexión', 'Piso 2', 1, 7, 'nuevo')
+    assert valores[10:] == (2, 9, None)
+
+
+def test_fecha_actualizacion_es_la_de_la_importacion():
+    valores, _ = validar_fila(fila(fecha_creacion='2020-03-01'), REFERENCIAS, AHORA)
+    fecha_creacion, fecha_actualizacion = valores[8], valores[9]
+    assert fecha_creacion == datetime(2020, 3, 1)
+    assert fecha_actualizacion == AHORA
+
+
+def test_errores_de_la_fila():
+    valores, errores = validar_fila(
+        fila(titulo='', prioridad='urgente', solicitante='nadie', tecnico='ana',
+             fecha_cierre='ayer'),
+        REFERENCIAS, AHORA)
+    assert valores is None
+    assert errores == [
+        'titulo es requerido',
+        "prioridad inválida 'urgente'",
+        "solicitante 'nadie' no existe",
+        "tecnico 'ana' no es técnico ni administrador",
+        "fecha_cierre inválida 'ayer' (use AAAA-MM-DD HH:MM:SS)",
+    ]
+
+
+CSV = ('titulo,descripcion,prioridad,tipo,ubicacion,solicitante\n'
+       'Sin red,No hay conexión,alta,incidencia,Piso 2,ana\n'
+       'Lento,Tarda,urgente,incidencia,Piso 3,ana\n')
+
+
+@pytest.fixture
+def referencias(base):
+    base.cuando('FROM usuarios WHERE', [(7, 'ana', 'ana@ejemplo.com', 'usuario')])
+    return base
+
+
+def _importar(cliente, consulta='', cuerpo=CSV, tipo='text/csv'):
+    return cliente.post('/usuarios/tickets/importar' + consulta, data=cuerpo.encode('utf-8'),
+                        content_type=tipo)
+
+
+def test_importar_inserta_las_filas_validas(referencias, cliente_usuarios):
+    respuesta = _importar(cliente_usuarios)
+    datos = respuesta.get_json()
+    assert respuesta.status_code == 200
+    assert (datos['total'], datos['creados'], datos['errores']) == (2, 1, 1)
+    assert datos['filas'][0] == {'fila': 2, 'ok': True, 'id_ticket': 101}
+    assert datos['filas'][1]['errores'] == ["prioridad inválida 'urgente'"]
+    [(_, params)] = referencias.ejecutadas('INSERT INTO usuarios_tickets')
+    assert list(params) == [(7, 101)]
+
+
+def test_importar_solo_validar_no_inserta(referencias, cliente_usuarios):
+    datos = _importar(cliente_usuarios, '?validar=1').get_json()
+    assert (datos['validas'], datos['errores']) == (1, 1)
+    assert not referencias.ejecutadas('INSERT')
+
+
+def test_importar_lote_fallido_no_expone_el_error(referencias, cliente_usuarios):
+    referencias.cuando('INSERT INTO tickets', error=RuntimeError("Duplicate entry 'x' for key 'PRIMARY'"))
+    datos = _importar(cliente_usuarios).get_json()
+    assert datos['filas'][0]['errores'] == ['Lote revertido por un error de la base de datos']
+    assert referencias.reversiones == 1
+
+
+@pytest.mark.parametrize('consulta, cuerpo, tipo', [
+    ('', '', 'text/csv'),
+    ('', 'titulo\nSin red\n', 'application/pdf'),
+    ('?formato=xml', 'titulo\nSin red\n', 'text/csv'),
+])
+def test_importar_entrada_invalida_responde_400(referencias, cliente_usuarios, consulta, cuerpo, tipo):
+    respuesta = _importar(cliente_usuarios, consulta, cuerpo, tipo)
+    assert respuesta.status_code == 400
+    assert not referencias.sentencias
@@ -0,0 +1,116 @@
+import json
+from datetime import datetime
+
+import pytest
+
+TICKET = {'id': 1, 'titulo': 'Red caída', 'fecha_creacion': datetime(2024, 5, 17, 8, 30)}
+URL = '/usuarios/tickets?sesion=administrador:1'
+
+
+@pytest.fixture
+def tickets(base):
+    base.cuando('FROM versiones_datos', [{'version': 5}])
+    base.cuando('ORDER BY t.fecha_creacion DESC', [TICKET])
+    return base
+
+
+def test_listado_con_etag_vigente_responde_304_sin_consultar(tickets, cliente_usuarios):
+    primera = cliente_usuarios.get(URL)
+    assert primera.status_code == 200
+    etag = primera.headers['ETag']
+    tickets.sentencias.clear()
+    segunda = cliente_usuarios.get(URL, headers={'If-None-Match': etag})
+    assert segunda.status_code == 304
+    assert [sql for sql, _ in tickets.sentencias] == [
+        'SELECT version FROM versiones_datos WHERE nombre = %s']
+
+
+def test_avanzar_la_version_cambia_el_etag(tickets, cliente_usuarios):
+    etag = cliente_usuarios.get(URL).headers['ETag']
+    tickets.cuando('FROM versiones_datos', [{'version': 6}])
+    assert cliente_usuarios.get(URL, headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_el_etag_depende_de_la_identidad(tickets, cliente_usuarios):
+    etag = cliente_usuarios.get(URL).headers['ETag']
+    otra = cliente_usuarios.get('/usuarios/tickets?sesion=usuario:7', headers={'If-None-Match': etag})
+    assert otra.status_code == 200
+
+
+def test_if_modified_since_no_basta_para_un_304(tickets, cliente_usuarios):
+    respuesta = cliente_usuarios.get(URL, headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+    assert respuesta.status_code == 200
+
+
+def test_escritura_de_tickets_avanza_la_version(tickets, cliente_usuarios):
+    tickets.cuando('FROM usuarios ORDER BY id_usuario', [('Eva Paz', 1, 'administrador')])
+    tickets.cuando('FOR UPDATE', [{'id_ticket': 1, 'id_tecnico_asignado': None, 'id_grupo1': None}])
+    respuesta = cliente_usuarios.put('/usuarios/tickets/lote?sesion=administrador:1',
+                                     json={'ids': [1], 'cambios': {'prioridad': 'alta'}, 'usuario': 'Eva Paz'})
+    assert respuesta.status_code == 200
+    [(sql, params)] = tickets.ejecutadas('INSERT INTO versiones_datos')
+    assert params == ('tickets',)
+
+
+def test_total_sin_join_si_ningun_filtro_lo_usa(tickets, cliente_usuarios):
+    tickets.cuando('AS total FROM tickets t', [{'total': 40}])
+    tickets.cuando('ORDER BY t.fecha_creacion DESC', [TICKET, dict(TICKET, id=2)])
+    datos = cliente_usuarios.get(URL + '&limit=1').get_json()
+    assert (datos['total'], len(datos['tickets'])) == (40, 1)
+    assert datos['next_cursor']
+    [(sql, _)] = tickets.ejecutadas('AS total')
+    assert sql.startswith('SELECT COUNT(*) AS total FROM tickets t WHERE')
+    assert 'usuarios_tickets' not in sql
+
+
+def test_total_del_rol_usuario_cuenta_tickets_distintos(tickets, cliente_usuarios):
+    tickets.cuando('AS total FROM tickets t', [{'total': 3}])
+    cliente_usuarios.get('/usuarios/tickets?sesion=usuario:7&limit=10')
+    [(sql, params)] = tickets.ejecutadas('AS total')
+    assert sql.startswith('SELECT COUNT(DISTINCT t.id_ticket) AS total FROM tickets t '
+                          'LEFT JOIN usuarios_tickets ut ON t.id_ticket = ut.id_ticket3 WHERE')
+    assert params == ['7']
+
+
+def test_fields_selecciona_solo_las_columnas_pedidas(tickets, cliente_usuarios):
+    respuesta = cliente_usuarios.get(URL + '&fields=titulo')
+    assert respuesta.status_code == 200
+    [(sql, _)] = tickets.ejecutadas('ORDER BY t.fecha_creacion DESC')
+    # id y fecha_creacion siempre van: los necesitan el orden y el cursor
+    assert sql.startswith('SELECT t.id_ticket AS id, t.fecha_creacion AS fecha_creacion, '
+                          't.titulo AS titulo FROM tickets t WHERE')
+    assert 'JOIN' not in sql
+
+
+def test_fields_perfil_lista_une_solo_lo_que_muestra(tickets, cliente_usuarios):
+    cliente_usuarios.get(URL + '&fields=lista')
+    [(sql, _)] = tickets.ejecutadas('ORDER BY t.fecha_creacion DESC')
+    assert 'usuarios_tickets ut' in sql and 'usuarios tec' in sql
+    assert 'categorias' not in sql and 'grupos' not in sql
+
+
+def test_fields_desconocido_responde_400(tickets, cliente_usuarios):
+    respuesta = cliente_usuarios.get(URL + '&fields=titulo,contraseña')
+    assert respuesta.status_code == 400
+    assert 'contraseña' in respuesta.get_json()['message']
+    assert not tickets.ejecutadas('FROM tickets')
+
+
+@pytest.mark.parametrize('formato, tipo', [('stream', 'application/json'),
+                                          ('ndjson', 'application/x-ndjson')])
+def test_formato_streaming_envia_todas_las_filas(tickets, cliente_usuarios, formato, tipo):
+    tickets.cuando('ORDER BY t.fecha_creacion DESC', [TICKET, dict(TICKET, id=2)])
+    respuesta = cliente_usuarios.get(URL + f'&formato={formato}&fields=id')
+    assert respuesta.status_code == 200
+    assert respuesta.mimetype == tipo
+    texto = respuesta.get_data(as_text=True)
+    filas = json.loads(texto) if formato == 'stream' else [json.loads(linea) for linea in texto.splitlines()]
+    assert [(f['id'], f['fecha_creacion']) for f in filas] == [(1, '2024-05-17 08:30:00'),
+                                                               (2, '2024-05-17 08:30:00')]
+    [(sql, _)] = tickets.ejecutadas('ORDER BY t.fecha_creacion DESC')
+    assert 'LIMIT' not in sql and not tickets.ejecutadas('AS total')
+
+
+@pytest.mark.parametrize('consulta', ['&formato=xml', '&formato=ndjson&limit=10'])
+def test_formato_streaming_invalido_responde_400(tickets, cliente_usuarios, consulta):
+    assert cliente_usuarios.get(URL + consulta).status_code == 400
@@ -0,0 +1,52 @@
+import pytest
+
+USUARIOS = [('Ana Ruiz', 7, 'usuario'), ('Luis Mora', 3, 'tecnico'), ('Eva Paz', 1, 'administrador')]
+
+
+@pytest.fixture
+def tickets(base):
+    base.cuando('FROM usuarios ORDER BY id_usuario', USUARIOS)
+    base.cuando('FOR UPDATE', [{'id_ticket': 1, 'id_tecnico_asignado': None, 'id_grupo1': None},
+                               {'id_ticket': 2, 'id_tecnico_asignado': 3, 'id_grupo1': 4}])
+    base.cuando('UPDATE tickets', rowcount=2)
+    return base
+
+
+def _actualizar(cliente, cuerpo):
+    return cliente.put('/usuarios/tickets/lote?sesion=administrador:1',
+                       json=dict({'usuario': 'Eva Paz'}, **cuerpo))
+
+
+def test_reasigna_por_ids(tickets, cliente_usuarios):
+    respuesta = _actualizar(cliente_usuarios, {'ids': [1, 2, 9], 'cambios': {'asignadoA': 'Luis Mora'}})
+    datos = respuesta.get_json()
+    assert respuesta.status_code == 200
+    assert (datos['actualizados'], datos['no_encontrados']) == (2, [9])
+    [(sql, params)] = tickets.ejecutadas('UPDATE tickets')
+    assert 'id_tecnico_asignado = %s' in sql
+    assert list(params) == [3, 1, 2]
+    # La del lote y, después, la del contador de versiones
+    assert tickets.confirmaciones == 2
+
+
+@pytest.mark.parametrize('asignado', ['Ana Ruiz', 'Nadie'])
+def test_asignado_debe_ser_tecnico_o_administrador(tickets, cliente_usuarios, asignado):
+    respuesta = _actualizar(cliente_usuarios, {'ids': [1], 'cambios': {'asignadoA': asignado}})
+    assert respuesta.status_code == 400
+    assert not tickets.ejecutadas('UPDATE tickets')
+
+
+@pytest.mark.parametrize('filtro', [{'estado': 'archivado'}, {'prioridad': 'urgente'},
+                                    {'estado': 'eliminado'}, {'tecnico': 'Luis'}])
+def test_filtro_invalido_responde_400(tickets, cliente_usuarios, filtro):
+    respuesta = _actualizar(cliente_usuarios, {'filtro': filtro, 'cambios': {'prioridad': 'alta'}})
+    assert respuesta.status_code == 400
+    assert not tickets.sentencias
+
+
+def test_filtro_normaliza_estado_y_prioridad(tickets, cliente_usuarios):
+    respuesta = _actualizar(cliente_usuarios, {'filtro': {'estado': 'En-Curso', 'prioridad': 'ALTA', 'tecnico': '3'},
+                                               'cambios': {'estado': 'cerrado'}})
+    assert respuesta.status_code == 200
+    [(_, params)] = tickets.ejecutadas('FOR UPDATE')
+    assert list(params)[:3] == ['en-curso', 'alta', 3]
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+import pytest
+
+from routes.usuarios import (_codificar_cursor, _codificar_cursor_id, _decodificar_cursor,
+                             _decodificar_cursor_id)
+
+
+def test_cursor_de_tickets_ida_y_vuelta():
+    fecha = datetime(2024, 5, 17, 8, 30, 15)
+    assert _decodificar_cursor(_codificar_cursor(fecha, 42)) == (fecha, 42)
+
+
+def test_cursor_de_id_ida_y_vuelta():
+    assert _decodificar_cursor_id(_codificar_cursor_id(1234)) == 1234
+
+
+@pytest.mark.parametrize('valor', ['', 'no-es-base64', 'WyJ4Il0=', _codificar_cursor_id(1)])
+def test_cursor_de_tickets_invalido(valor):
+    with pytest.raises(ValueError, match='cursor inválido'):
+        _decodificar_cursor(valor)
+
+
+@pytest.mark.parametrize('valor', ['', 'no-es-base64', 'WyJ4Il0='])
+def test_cursor_de_id_invalido(valor):
+    with pytest.raises(ValueError, match='cursor inválido'):
+        _decodificar_cursor_id(valor)
@@ -0,0 +1,205 @@
+import time
+
+import pytest
+from flask import Flask
+
+import sesiones
+from config.config import SESION_CONFIG
+from routes import auth
+from sesiones import ErrorSesion, ListaRevocacion, emitir_token, verificar_token
+
+USUARIO = (7, 'Ana Ruiz', 'ana', 'usuario', 'activo', 1)
+
+
+class CursorFalso:
+
+    def __init__(self, filas):
+        self._filas = filas
+
+    def execute(self, consulta, params=()):
+        pass
+
+    def fetchone(self):
+        return self._filas[0] if self._filas else None
+
+    def fetchall(self):
+        return list(self._filas)
+
+    def close(self):
+        pass
+
+
+class ConexionFalsa:
+
+    def __init__(self, filas):
+        self._filas = filas
+
+    def cursor(self, **kwargs):
+        return CursorFalso(self._filas)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def revocados(monkeypatch):
+    """Filas (id_usuario, estado, tokens_validos_desde) de la lista de
+    revocación; se leen al llamar a sesiones.revocaciones.recargar(), como
+    hace el hilo de fondo."""
+    filas = []
+    monkeypatch.setattr(sesiones, 'get_db_connection', lambda: ConexionFalsa(filas))
+    monkeypatch.setattr(sesiones, 'revocaciones', ListaRevocacion(3600, 30))
+    return filas
+
+
+@pytest.fixture
+def cliente(monkeypatch, revocados):
+    monkeypatch.setattr(auth, 'get_db_connection', lambda: ConexionFalsa([USUARIO]))
+    app = Flask(__name__)
+    sesiones.init_app(app)
+    app.register_blueprint(auth.auth_bp, url_prefix='/auth')
+
+    @app.route('/privada')
+    def privada():
+        return {'identidad': list(sesiones.identidad_solicitud())}
+
+    return app.test_client()
+
+
+def test_token_ida_y_vuelta(revocados):
+    datos = verificar_token(emitir_token(7, 'Ana Ruiz', 'usuario'))
+    assert (datos['id'], datos['nombre'], datos['rol']) == (7, 'Ana Ruiz', 'usuario')
+    assert datos['expira'] == datos['emitido'] + SESION_CONFIG['duracion']
+
+
+def test_token_alterado(revocados):
+    token = emitir_token(7, 'Ana Ruiz', 'usuario')
+    with pytest.raises(ErrorSesion, match='inválido'):
+        verificar_token(token[:-2] + ('AA' if token[-2:] != 'AA' else 'BB'))
+
+
+def test_token_vencido(revocados, monkeypatch):
+    token = emitir_token(7, 'Ana Ruiz', 'usuario')
+    monkeypatch.setitem(SESION_CONFIG, 'duracion', -1)
+    with pytest.raises(ErrorSesion, match='expiró'):
+        verificar_token(token)
+
+
+def test_revocado_si_el_usuario_esta_inactivo(revocados):
+    token = emitir_token(7, 'Ana Ruiz', 'usuario')
+    revocados.append((7, 'inactivo', 0))
+    sesiones.revocaciones.recargar()
+    with pytest.raises(ErrorSesion, match='revocada'):
+        verificar_token(token)
+
+
+def test_revocado_si_se_emitio_antes_de_tokens_validos_desde(revocados):
+    token = emitir_token(7, 'Ana Ruiz', 'usuario')
+    revocados.append((7, 'activo', int(time.time()) + 5))
+    sesiones.revocaciones.recargar()
+    with pytest.raises(ErrorSesion, match='revocada'):
+        verificar_token(token)
+
+
+def test_cambio_anterior_al_token_no_lo_revoca(revocados):
+    revocados.append((7, 'activo', int(time.time()) - 60))
+    sesiones.revocaciones.recargar()
+    assert verificar_token(emitir_token(7, 'Ana Ruiz', 'usuario'))['id'] == 7
+
+
+def test_verificar_no_recarga_la_lista(revocados):
+    lista = sesiones.revocaciones
+    revocados.append((7, 'inactivo', 0))
+    assert not lista.revocado(7, 0)
+    assert lista.estadisticas()['recargas'] == 0
+    lista.recargar()
+    assert lista.revocado(7, 0)
+
+
+def test_invalidar_despierta_al_hilo_de_recarga():
+    lista = ListaRevocacion(3600, 30)
+    lista.invalidar()
+    inicio = time.monotonic()
+    lista.esperar()
+    assert time.monotonic() - inicio < 1
+    # El aviso se consume: la siguiente espera dura el intervalo
+    assert not lista._despertar.is_set()
+
+
+def test_login_devuelve_token(cliente):
+    respuesta = cliente.post('/auth/login', json={'usuario': 'ana', 'password': 'x'})
+    assert respuesta.status_code == 200
+    assert verificar_token(respuesta.json['token'])['id'] == 7
+    assert respuesta.json['expira_en'] == SESION_CONFIG['duracion']
+
+
+@pytest.mark.parametrize('cabecera', ['Bearer basura', 'Bearer {revocado}'])
+def test_login_con_token_viejo_en_la_cabecera(cliente, revocados, cabecera):
+    # Un cliente que siempre envía su token guardado debe poder volver a entrar
+    token = emitir_token(7, 'Ana Ruiz', 'usuario')
+    revocados.append((7, 'activo', int(time.time()) + 5))
+    sesiones.revocaciones.recargar()
+    respuesta = cliente.post('/auth/login', json={'usuario': 'ana', 'password': 'x'},
+                             headers={'Authorization': cabecera.format(revocado=token)})
+    assert respuesta.status_code == 200
+
+
+def test_sesion_valida_y_revocada(cliente, revocados):
+    token = emitir_token(7, 'Ana Ruiz', 'usuario')
+    cabeceras = {'Authorization': f'Bearer {token}'}
+    assert cliente.get('/auth/sesion', headers=cabeceras).json['rol'] == 'usuario'
+    revocados.append((7, 'inactivo', 0))
+    sesiones.revocaciones.recargar()
+    assert cliente.get('/auth/sesion', headers=cabeceras).status_code == 401
+
+
+def test_identidad_sale_del_token_y_no_de_la_query(cliente):
+    token = emitir_token(7, 'Ana Ruiz', 'usuario')
+    respuesta = cliente.get('/privada?rol=administrador&usuario_id=1',
+                            headers={'Authorization': f'Bearer {token}'})
+    assert respuesta.json['identidad'] == ['usuario', '7']
+
+
+def test_sin_token_no_se_lee_la_query(cliente):
+    assert cliente.get('/privada?rol=administrador&usuario_id=1').json['identidad'] == [None, None]
+
+
+def test_respaldo_por_query_solo_con_identidad_query_y_sin_exigir(cliente, monkeypatch):
+    monkeypatch.setitem(SESION_CONFIG, 'identidad_query', True)
+    assert cliente.get('/privada?rol=tecnico&usuario_id=3').json['identidad'] == ['tecnico', '3']
+    monkeypatch.setitem(SESION_CONFIG, 'exigir', True)
+    assert cliente.get('/privada?rol=tecnico&usuario_id=3').status_code == 401
+
+
+def test_sesion_requerida_sin_identidad_responde_401(cliente_usuarios):
+    assert cliente_usuarios.get('/usuarios/tickets?rol=administrador&usuario_id=1').status_code == 401
+    assert cliente_usuarios.get('/usuarios/buscar?q=red').status_code == 401
+
+
+def test_token_en_la_query_solo_para_eventos():
+    # EventSource no envía cabeceras: solo el canal SSE acepta ?token=
+    app = Flask(__name__)
+    app.add_url_rule('/usuarios/tickets/eventos', 'usuarios.eventos_tickets',
+                     lambda: {'token': sesiones.token_solicitud()})
+    app.add_url_rule('/usuarios/tickets', 'usuarios.obtener_tickets',
+                     lambda: {'token': sesiones.token_solicitud()})
+    cliente = app.test_client()
+    assert cliente.get('/usuarios/tickets/eventos?token=abc').json['token'] == 'abc'
+    assert cliente.get('/usuarios/tickets?token=abc').json['token'] is None
+
+
+@pytest.mark.parametrize('cuerpo, revoca', [
+    ({'contrasena': 'nueva'}, 'tokens_validos_desde = NOW(),'),
+    ({}, 'tokens_validos_desde = IF(rol <=> %s AND estado <=> %s, tokens_validos_desde, NOW()),'),
+])
+def test_editar_el_perfil_solo_revoca_por_contrasena_rol_o_estado(base, cliente_usuarios, cuerpo, revoca):
+    base.cuando('SELECT id_usuario FROM usuarios WHERE id_usuario', [(5,)])
+    base.cuando('UPDATE usuarios', rowcount=1)
+    datos = dict({'nombre_usuario': 'luis', 'nombre_completo': 'Luis Mora', 'telefono': '1',
+                  'correo': 'l@x.co', 'rol': 'tecnico', 'estado': 'activo'}, **cuerpo)
+    respuesta = cliente_usuarios.put('/usuarios/actualizacion/5', json=datos)
+    assert respuesta.status_code == 200
+    [(sql, params)] = base.ejecutadas('UPDATE usuarios')
+    assert sql.startswith(f'UPDATE usuarios SET {revoca}')
+    if not cuerpo:
+        assert params[:2] == ('tecnico', 'activo')
@@ -0,0 +1,276 @@
+"""Comprueba con EXPLAIN que las consultas críticas usan su índice.
+
+Uso:
+    python verificar_indices.py                  # solo EXPLAIN
+    python verificar_indices.py --sembrar 50000  # siembra datos y luego EXPLAIN
+    python verificar_indices.py --limpiar        # borra los datos sembrados
+
+Con tablas casi vacías el optimizador prefiere recorrerlas completas, por
+eso la comprobación tiene sentido sobre un volumen realista. --sembrar
+inserta tickets sintéticos (título con prefijo SEMILLA) y su historial;
+úsese sobre una base de pruebas, no en producción.
+"""
+import argparse
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+from database import get_db_connection
+
+PREFIJO_SEMILLA = '[SEMILLA]'
+ESTADOS = ['nuevo', 'en-curso', 'en-espera', 'resuelto', 'cerrado', 'eliminado']
+LOTE = 1000
+
+# (nombre, tabla/alias a revisar en el EXPLAIN, índice esperado, consulta)
+CONSULTAS = [
+    (
+        'listado de tickets',
+        't', 'idx_tickets_fecha_creacion',
+        """
+        SELECT t.id_ticket, t.titulo, c.nombre_categoria, tec.nombre_completo
+        FROM tickets t
+        LEFT JOIN categorias c ON t.id_categoria1 = c.id_categoria
+        LEFT JOIN usuarios_tickets ut ON t.id_ticket = ut.id_ticket3
+        LEFT JOIN usuarios u ON ut.id_usuario1 = u.id_usuario
+        LEFT JOIN usuarios tec ON t.id_tecnico_asignado = tec.id_usuario
+        WHERE t.estado_ticket != 'eliminado'
+        ORDER BY t.fecha_creacion DESC, t.id_ticket DESC
+        LIMIT 51
+        """
+    ),
+    (
+        'tickets por estado',
+        't', 'idx_tickets_estado_fecha',
+        """
+        SELECT t.id_ticket, t.titulo
+        FROM tickets t
+        WHERE t.estado_ticket = 'nuevo'
+        ORDER BY t.fecha_creacion DESC, t.id_ticket DESC
+        LIMIT 51
+        """
+    ),
+    (
+        'tickets por técnico',
+        't', 'idx_tickets_tecnico_fecha',
+        """
+        SELECT t.id_ticket, t.titulo
+        FROM tickets t
+        WHERE t.id_tecnico_asignado = {tecnico} AND t.estado_ticket != 'eliminado'
+        ORDER BY t.fecha_creacion DESC, t.id_ticket DESC
+        LIMIT 51
+        """
+    ),
+    (
+        'tickets modificados desde una marca',
+        't', 'idx_tickets_fecha_actualizacion',
+        """
+        SELECT t.id_ticket, t.titulo, t.estado_ticket
+        FROM tickets t
+        WHERE (t.fecha_actualizacion > NOW() - INTERVAL 1 DAY
+               OR (t.fecha_actualizacion = NOW() - INTERVAL 1 DAY AND t.id_ticket > 0))
+        ORDER BY t.fecha_actualizacion ASC, t.id_ticket ASC
+        LIMIT 501
+        """
+    ),
+    (
+        'seguimientos de un ticket',
+        'historial_tickets', 'idx_historial_ticket_campo_fecha',
+        """
+        SELECT id_historial, campo_modificado, valor_nuevo, fecha_modificacion
+        FROM historial_tickets
+        WHERE id_ticket2 = {ticket} AND campo_modificado IN ('seguimiento','solucion')
+        ORDER BY fecha_modificacion ASC
+        """
+    ),
+    (
+        'historial completo de un ticket',
+        'historial_tickets', 'idx_historial_ticket_fecha',
+        """
+        SELECT id_historial, campo_modificado, valor_anterior, valor_nuevo, fecha_modificacion
+        FROM historial_tickets
+        WHERE id_ticket2 = {ticket}
+        ORDER BY fecha_modificacion ASC
+        """
+    ),
+    (
+        'historial archivado de un ticket',
+        'historial_tickets_archivo', 'idx_historial_archivo_ticket_fecha',
+        """
+        SELECT id_historial, campo_modificado, valor_anterior, valor_nuevo, fecha_modificacion
+        FROM historial_tickets_archivo
+        WHERE id_ticket2 = {ticket}
+        ORDER BY fecha_modificacion ASC
+        """
+    ),
+    (
+        'encuestas por calificación',
+        'historial_tickets', 'idx_historial_campo_calificacion',
+        """
+        SELECT calificacion, COUNT(*)
+        FROM historial_tickets
+        WHERE campo_modificado = 'encuesta' AND calificacion <= 2
+        GROUP BY calificacion
+        """
+    ),
+    (
+        'directorio de técnicos activos',
+        'u', 'idx_usuarios_rol_estado',
+        """
+        SELECT u.id_usuario, u.nombre_completo
+        FROM usuarios u
+        WHERE u.rol IN ('tecnico') AND u.estado IN ('activo') AND u.id_usuario > 0
+        ORDER BY u.id_usuario
+        LIMIT 51
+        """
+    ),
+    (
+        'sugerencias por nombre completo',
+        'u', 'idx_usuarios_nombre_completo',
+        """
+        SELECT u.id_usuario AS id, u.nombre_completo AS nombre
+        FROM usuarios u
+        WHERE u.nombre_completo LIKE 'a%' AND u.estado = 'activo'
+        ORDER BY u.nombre_completo
+        LIMIT 10
+        """
+    ),
+]
+
+
+def sembrar(conn, cursor, cantidad):
+    cursor.execute("SELECT id_usuario FROM usuarios WHERE rol = 'tecnico'")
+    tecnicos = [r[0] for r in cursor.fetchall()] or [None]
+    cursor.execute("SELECT id_usuario FROM usuarios WHERE rol = 'usuario'")
+    solicitantes = [r[0] for r in cursor.fetchall()]
+    if not solicitantes:
+        cursor.execute("SELECT id_usuario FROM usuarios")
+        solicitantes = [r[0] for r in cursor.fetchall()]
+    cursor.execute("SELECT id_categoria FROM categorias")
+    categorias = [r[0] for r in cursor.fetchall()] or [None]
+
+    inicio = datetime.now() - timedelta(days=730)
+    # Marca de esta ejecución: los títulos no se repiten aunque se siembre dos veces
+    marca = uuid.uuid4().hex[:8]
+    insertados = 0
+    while insertados < cantidad:
+        n = min(LOTE, cantidad - insertados)
+        filas = []
+        for i in range(n):
+            fecha = inicio + timedelta(seconds=random.randint(0, 730 * 86400))
+            filas.append((
+                random.choice(['alta', 'media', 'baja']), random.choice(ESTADOS), 'incidencia',
+                f"{PREFIJO_SEMILLA} {marca} Ticket {insertados + i}", 'Descripción de prueba', 'Oficina',
+                fecha, fecha, random.choice(categorias), random.choice(tecnicos),
+                random.choice(solicitantes)
+            ))
+        cursor.executemany("""
+            INSERT INTO tickets (prioridad, estado_ticket, tipo, titulo, descripcion, ubicacion,
+                                 fecha_creacion, fecha_actualizacion, id_categoria1,
+                                 id_tecnico_asignado, id_usuario_reporta)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, filas)
+        # Los ids de un INSERT de varias filas no son necesariamente
+        # consecutivos: se leen por título, único en esta ejecución. lastrowid
+        # es el primero del lote, así que acota el recorrido por clave primaria
+        titulos = [fila[3] for fila in filas]
+        cursor.execute(
+            f"SELECT titulo, id_ticket FROM tickets "
+            f"WHERE id_ticket >= %s AND titulo IN ({', '.join(['%s'] * n)})",
+            [cursor.lastrowid] + titulos
+        )
+        por_titulo = dict(cursor.fetchall())
+        ids = [por_titulo[titulo] for titulo in titulos]
+        cursor.executemany(
+            "INSERT IGNORE INTO usuarios_tickets (id_usuario1, id_ticket3) VALUES (%s, %s)",
+            [(fila[-1], id_ticket) for fila, id_ticket in zip(filas, ids)]
+        )
+        historial = []
+        for fila, id_ticket in zip(filas, ids):
+            for j in range(random.randint(1, 6)):
+                campo = random.choice(['seguimiento', 'solucion', 'encuesta', 'estado_ticket', 'prioridad'])
+                historial.append((
+                    id_ticket, campo, 'seguimiento de prueba',
+                    random.randint(1, 5) if campo == 'encuesta' else None,
+                    fila[6] + timedelta(hours=j + 1)
+                ))
+        cursor.executemany("""
+            INSERT INTO historial_tickets (id_ticket2, campo_modificado, descripcion, calificacion,
+                                           fecha_modificacion)
+            VALUES (%s, %s, %s, %s, %s)
+        """, historial)
+        conn.commit()
+        insertados += n
+        print(f"  {insertados}/{cantidad} tickets sembrados")
+
+    cursor.execute("ANALYZE TABLE tickets, historial_tickets, usuarios_tickets")
+    cursor.fetchall()
+
+
+def limpiar(conn, cursor):
+    cursor.execute("DELETE FROM tickets WHERE titulo LIKE %s", (PREFIJO_SEMILLA + '%',))
+    conn.commit()
+    print(f"{cursor.rowcount} tickets sembrados eliminados")
+
+
+def verificar(cursor):
+    cursor.execute("""
+        SELECT id_tecnico_asignado FROM tickets
+        WHERE id_tecnico_asignado IS NOT NULL
+        GROUP BY id_tecnico_asignado ORDER BY COUNT(*) DESC LIMIT 1
+    """)
+    fila = cursor.fetchone()
+    tecnico = fila['id_tecnico_asignado'] if fila else 0
+    cursor.execute("SELECT MAX(id_ticket2) AS id FROM historial_tickets")
+    fila = cursor.fetchone()
+    ticket = fila['id'] if fila and fila['id'] else 0
+
+    fallos = 0
+    for nombre, tabla, esperado, consulta in CONSULTAS:
+        cursor.execute("EXPLAIN " + consulta.format(tecnico=int(tecnico), ticket=int(ticket)))
+        plan = cursor.fetchall()
+        fila = next((p for p in plan if p['table'] == tabla), None)
+        usado = fila['key'] if fila else None
+        extra = (fila.get('Extra') or '') if fila else ''
+        ok = usado == esperado
+        fallos += 0 if ok else 1
+        estado = 'OK   ' if ok else 'FALLO'
+        print(f"[{estado}] {nombre}: índice={usado} (esperado {esperado}) filas={fila['rows'] if fila else '?'}"
+              + (f" extra='{extra}'" if extra else ''))
+    return fallos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sembrar', type=int, default=0, metavar='N',
+                        help='insertar N tickets sintéticos antes de verificar')
+    parser.add_argument('--limpiar', action='store_true',
+                        help='eliminar los tickets sembrados y salir')
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    if conn is None:
+        return 1
+    cursor = conn.cursor(dictionary=True)
+    try:
+        if args.limpiar:
+            limpiar(conn, cursor)
+            return 0
+        if args.sembrar:
+            print(f"Sembrando {args.sembrar} tickets...")
+            plano = conn.cursor()
+            try:
+                sembrar(conn, plano, args.sembrar)
+            finally:
+                plano.close()
+        fallos = verificar(cursor)
+        print("Todas las consultas usan su índice" if not fallos
+              else f"{fallos} consulta(s) no usan el índice esperado")
+        return 1 if fallos else 0
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""Contadores de versión de conjuntos de datos (tabla versiones_datos).
+
+El ETag de los listados de tickets se arma con el contador 'tickets' en
+lugar de recorrer tickets, historial, usuarios y catálogos en cada
+solicitud: leerlo es una búsqueda por clave primaria. Las escrituras que
+cambian lo que muestra un listado (tickets, seguimientos, usuarios,
+categorías y grupos) lo avanzan después de su commit. Al estar en la base,
+el contador es común a todos los procesos.
+"""
+from database import get_db_connection
+
+
+def leer_version(cursor, nombre):
+    """Valor actual del contador `nombre` (0 si todavía no existe)."""
+    cursor.execute("SELECT version FROM versiones_datos WHERE nombre = %s", (nombre,))
+    fila = cursor.fetchone()
+    if fila is None:
+        return 0
+    return fila['version'] if isinstance(fila, dict) else fila[0]
+
+
+def avanzar_version(nombre):
+    """Suma uno al contador `nombre` en su propia transacción. Se llama
+    después del commit de la escritura; un fallo aquí no afecta la respuesta."""
+    conn = get_db_connection()
+    if conn is None:
+        return
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            """
+            INSERT INTO versiones_datos (nombre, version) VALUES (%s, 1)
+            ON DUPLICATE KEY UPDATE version = version + 1
+            """,
+            (nombre,)
+        )
+        conn.commit()
+    except Exception as e:
+        print(f"Error al avanzar la versión de {nombre}: {e}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
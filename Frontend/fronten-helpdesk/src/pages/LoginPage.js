@@ -60,7 +60,8 @@ const Login = () => {
       });
       
       if (response.status === 200) {
-        const { nombre, usuario, rol, id_usuario } = response.data;
+        const { nombre, usuario, rol, id_usuario, token } = response.data;
+        localStorage.setItem("token", token);
         localStorage.setItem("id_usuario", id_usuario);
         localStorage.setItem("nombre", nombre);
         localStorage.setItem("usuario", usuario);
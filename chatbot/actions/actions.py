@@ -135,21 +135,45 @@ class ActionEstadoTicket(Action):
 		if not numeros:
 			dispatcher.utter_message(text="No encontré un número de ticket en tu mensaje. Ejemplo: 'estado ticket 123'.")
 			return []
+		if len(numeros) > 1:
+			return self._estado_varios(dispatcher, list(dict.fromkeys(str(int(n)) for n in numeros)))
 		ticket_id = numeros[0]
 		try:
 			resp = requests.get(f"{API_BASE}/tickets/{ticket_id}", timeout=10)
 			if resp.status_code == 200:
 				data = resp.json()
-				estado = data.get("estado") or data.get("estado_ticket") or "desconocido"
-				prioridad = data.get("prioridad", "?")
-				titulo = data.get("titulo", "(sin título)")
-				dispatcher.utter_message(text=f"Ticket {ticket_id}: '{titulo}' | Estado: {estado} | Prioridad: {prioridad}")
+				dispatcher.utter_message(text=self._resumen(ticket_id, data))
 			else:
 				dispatcher.utter_message(text=f"No pude obtener el ticket {ticket_id}. Código {resp.status_code}.")
 		except Exception as e:
 			dispatcher.utter_message(text=f"Error consultando ticket {ticket_id}: {e}")
 		return []
 
+	@staticmethod
+	def _resumen(ticket_id: Text, data: Dict[Text, Any]) -> Text:
+		estado = data.get("estado") or data.get("estado_ticket") or "desconocido"
+		prioridad = data.get("prioridad", "?")
+		titulo = data.get("titulo", "(sin título)")
+		return f"Ticket {ticket_id}: '{titulo}' | Estado: {estado} | Prioridad: {prioridad}"
+
+	def _estado_varios(self, dispatcher: CollectingDispatcher, ids: List[Text]) -> List[Dict[Text, Any]]:
+		"""Varios números en el mensaje: una sola llamada al endpoint por lote."""
+		try:
+			resp = requests.post(f"{API_BASE}/tickets/lote", json={"ids": ids}, timeout=10)
+			if resp.status_code != 200:
+				dispatcher.utter_message(text=f"No pude obtener los tickets {', '.join(ids)}. Código {resp.status_code}.")
+				return []
+			data = resp.json()
+			tickets = data.get("tickets", {})
+			lineas = [self._resumen(i, tickets[i]) for i in ids if i in tickets]
+			faltantes = [str(i) for i in data.get("no_encontrados", [])]
+			if faltantes:
+				lineas.append(f"No encontré los tickets: {', '.join(faltantes)}.")
+			dispatcher.utter_message(text="\n".join(lineas))
+		except Exception as e:
+			dispatcher.utter_message(text=f"Error consultando tickets {', '.join(ids)}: {e}")
+		return []
+
 
 class ActionReiniciarPassword(Action):
 	def name(self) -> Text: